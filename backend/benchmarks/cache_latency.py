@@ -0,0 +1,89 @@
+# benchmarks/cache_latency.py
+"""
+Compare get/set/incr latency of the shared SQLite cache with Django's database
+cache on the configured database (and the per-process LocMemCache, for scale).
+
+    cd backend && python benchmarks/cache_latency.py [--ops 5000] [--size 2000]
+
+--size is the byte size of the set values; papers are tens of kilobytes,
+OTPs a few bytes. Each backend gets a throwaway location or table.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'exam_backend.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+from django.core.cache.backends.db import DatabaseCache  # noqa: E402
+from django.core.cache.backends.locmem import LocMemCache  # noqa: E402
+
+from exam_backend.cache_backends import SQLiteCache  # noqa: E402
+
+DB_TABLE = 'benchmark_cache'
+PARAMS = {'TIMEOUT': 300, 'OPTIONS': {'MAX_ENTRIES': 1_000_000}}
+
+
+def measure(operation, ops):
+    """Per-call latencies of operation(i) for i in range(ops), in microseconds."""
+    latencies = []
+    for i in range(ops):
+        start = time.perf_counter()
+        operation(i)
+        latencies.append((time.perf_counter() - start) * 1e6)
+    return latencies
+
+
+def report(name, latencies):
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"  {name:<5} median {statistics.median(latencies):9.1f} us   p99 {p99:9.1f} us")
+
+
+def run(label, cache, ops, value):
+    print(label)
+    keys = [f"bench:{i}" for i in range(ops)]
+    report('set', measure(lambda i: cache.set(keys[i], value), ops))
+    report('get', measure(lambda i: cache.get(keys[i]), ops))
+    report('miss', measure(lambda i: cache.get(f"absent:{i}"), ops))
+    cache.set('bench:counter', 0, timeout=None)
+    report('incr', measure(lambda i: cache.incr('bench:counter'), ops))
+    cache.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--ops', type=int, default=5000)
+    parser.add_argument('--size', type=int, default=2000)
+    args = parser.parse_args()
+    value = 'x' * args.size
+
+    with tempfile.TemporaryDirectory() as directory:
+        run('SQLiteCache (shared file)', SQLiteCache(os.path.join(directory, 'cache.sqlite3'), PARAMS),
+            args.ops, value)
+
+    caches = {'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': DB_TABLE}}
+    with override_settings(CACHES=caches):
+        call_command('createcachetable', DB_TABLE, verbosity=0)
+    try:
+        run(f'DatabaseCache ({connection.vendor})', DatabaseCache(DB_TABLE, PARAMS), args.ops, value)
+    finally:
+        with connection.schema_editor() as editor:
+            editor.execute(f'DROP TABLE {editor.quote_name(DB_TABLE)}')
+
+    run('LocMemCache (per process, not shared)', LocMemCache('benchmark', PARAMS), args.ops, value)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CandidateEnrollmentConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "candidate_enrollment"
+
+    def ready(self):
+        from . import signals  # noqa: F401
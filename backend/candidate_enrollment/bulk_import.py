@@ -0,0 +1,259 @@
+# candidate_enrollment/bulk_import.py
+
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, connections, transaction
+from django.utils.dateparse import parse_date
+from openpyxl import load_workbook
+
+from notifications.outbox import enqueue_emails
+from notifications.rendering import render_many
+from .identity import sync_identities
+from .models import InternalCandidate, ExternalCandidate
+from .user_ids import USER_ID_PREFIXES, allocate_user_ids
+from .utils import generate_random_password
+
+IMPORT_BATCH_SIZE = 1000
+HASH_CHUNK_SIZE = 32
+
+MODELS = {'internal': InternalCandidate, 'external': ExternalCandidate}
+COMMON_FIELDS = ('first_name', 'last_name', 'gender', 'email', 'phone_number')
+REQUIRED_FIELDS = {
+    'internal': COMMON_FIELDS + ('employee_id', 'designation'),
+    'external': COMMON_FIELDS,
+}
+OPTIONAL_FIELDS = {
+    'internal': (),
+    'external': ('dob', 'address', 'pin_code', 'city', 'aadhar_number', 'highest_qualification'),
+}
+
+
+class ImportReport(NamedTuple):
+    created: int
+    errors: list            # (row number, message)
+    emails_queued: int
+
+
+def _header(value):
+    return str(value or '').strip().lower().replace(' ', '_')
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)      # spreadsheet numbers, e.g. phone numbers and pin codes
+    return str(value).strip()
+
+
+def read_rows(path):
+    """
+    Yield (row number, {column: value}) from a CSV or XLSX file, one row at a
+    time: openpyxl's read-only mode streams the sheet instead of loading it.
+    Row numbers match what a spreadsheet shows, the header being row 1.
+    """
+    if os.path.splitext(path)[1].lower() in ('.xlsx', '.xlsm'):
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            headers = [_header(h) for h in next(rows, ())]
+            for number, values in enumerate(rows, start=2):
+                if any(v not in (None, '') for v in values):
+                    yield number, dict(zip(headers, values))
+        finally:
+            workbook.close()
+    else:
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            reader = csv.reader(f)
+            headers = [_header(h) for h in next(reader, [])]
+            for number, values in enumerate(reader, start=2):
+                if any(v.strip() for v in values):
+                    yield number, dict(zip(headers, values))
+
+
+def _clean(raw, default_type):
+    """Normalize one row into (candidate type, field dict); raises ValidationError."""
+    row = {k: _text(v) for k, v in raw.items() if k}
+    candidate_type = (row.get('type') or default_type or '').lower()
+    if candidate_type not in MODELS:
+        raise ValidationError("type must be internal or external")
+
+    fields = {}
+    missing = [f for f in REQUIRED_FIELDS[candidate_type] if not row.get(f)]
+    if missing:
+        raise ValidationError(f"missing {', '.join(missing)}")
+    for name in REQUIRED_FIELDS[candidate_type] + OPTIONAL_FIELDS[candidate_type]:
+        value = row.get(name) or None
+        if value is not None:
+            max_length = MODELS[candidate_type]._meta.get_field(name).max_length
+            if max_length and len(value) > max_length:
+                raise ValidationError(f"{name} is longer than {max_length} characters")
+        fields[name] = value
+
+    fields['email'] = fields['email'].lower()
+    validate_email(fields['email'])
+    if fields.get('dob'):
+        # XLSX date cells read as "YYYY-MM-DD 00:00:00"
+        fields['dob'] = parse_date(fields['dob'][:10])
+        if fields['dob'] is None:
+            raise ValidationError("dob must be a date (YYYY-MM-DD)")
+    return candidate_type, fields
+
+
+def _hash_passwords(passwords, pool):
+    if pool is None:
+        return [make_password(p) for p in passwords]
+    return list(pool.map(make_password, passwords, chunksize=HASH_CHUNK_SIZE))
+
+
+def _credential_emails(candidates, password_of):
+    """Outbox messages with the credentials of a batch, rendered with one template pass."""
+    bodies = render_many('emails/registration.html', [
+        {
+            'first_name': c.first_name,
+            'last_name': c.last_name,
+            'user_id': c.user_id,
+            'password': password_of[id(c)],
+        }
+        for c in candidates
+    ])
+    return [
+        {
+            'to': c.email,
+            'subject': "Exam Portal Registration Details",
+            'html_body': body,
+            'from_email': settings.EMAIL_HOST_USER,
+        }
+        for c, body in zip(candidates, bodies)
+    ]
+
+
+def _insert(model, objs, after_insert):
+    """
+    bulk_create a batch; if it hits a unique conflict (e.g. someone registered
+    the same email meanwhile), insert row by row to find the offenders.
+    after_insert(objects) runs in the transaction that inserted them.
+    Returns (inserted objects, [(obj, error)]).
+    """
+    try:
+        with transaction.atomic():
+            model.objects.bulk_create(objs)
+            # bulk_create skips the signal that maintains the identity index
+            sync_identities(objs)
+            after_insert(objs)
+        return objs, []
+    except IntegrityError:
+        pass
+
+    inserted, failed = [], []
+    for obj in objs:
+        try:
+            with transaction.atomic():
+                obj.save(force_insert=True)
+                after_insert([obj])
+            inserted.append(obj)
+        except IntegrityError:
+            failed.append((obj, "email, employee_id or user_id is already registered"))
+    return inserted, failed
+
+
+def _import_batch(batch, default_type, pool, send_emails, errors):
+    """Validate, number, hash and insert one batch; returns (created, emails queued)."""
+    parsed = {'internal': [], 'external': []}
+    for number, raw in batch:
+        try:
+            candidate_type, fields = _clean(raw, default_type)
+        except ValidationError as exc:
+            errors.append((number, '; '.join(exc.messages)))
+            continue
+        parsed[candidate_type].append((number, fields))
+
+    created, emails_queued = 0, 0
+    for candidate_type, rows in parsed.items():
+        if not rows:
+            continue
+        model = MODELS[candidate_type]
+
+        # One query per unique column finds rows that clash with existing candidates
+        unique_fields = ['email'] + (['employee_id'] if candidate_type == 'internal' else [])
+        taken = {
+            f: set(model.objects.filter(**{f'{f}__in': [r[f] for _, r in rows]}).values_list(f, flat=True))
+            for f in unique_fields
+        }
+        valid = []
+        for number, fields in rows:
+            clash = next((f for f in unique_fields if fields[f] in taken[f]), None)
+            if clash:
+                errors.append((number, f"{clash} {fields[clash]} is already registered or repeated in the file"))
+                continue
+            for f in unique_fields:
+                taken[f].add(fields[f])
+            valid.append((number, fields))
+        if not valid:
+            continue
+
+        user_ids = allocate_user_ids(USER_ID_PREFIXES[candidate_type], len(valid))
+        raw_passwords = [generate_random_password() for _ in valid]
+        hashes = _hash_passwords(raw_passwords, pool)
+        objs = [
+            model(user_id=user_id, password=hashed, **fields)
+            for (_, fields), user_id, hashed in zip(valid, user_ids, hashes)
+        ]
+        row_of = {id(obj): number for obj, (number, _) in zip(objs, valid)}
+        password_of = {id(obj): raw for obj, raw in zip(objs, raw_passwords)}
+
+        def queue_credentials(inserted):
+            if send_emails:
+                enqueue_emails(_credential_emails(inserted, password_of))
+
+        inserted, failed = _insert(model, objs, queue_credentials)
+        for obj, message in failed:
+            errors.append((row_of[id(obj)], message))
+        created += len(inserted)
+        if send_emails:
+            emails_queued += len(inserted)
+    return created, emails_queued
+
+
+def import_candidates(rows, default_type=None, workers=None, send_emails=True, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Create candidates from (row number, {column: value}) rows, e.g. read_rows().
+
+    Rows are validated and inserted in batches: duplicates are checked with
+    one query per unique column, user_ids come from a block allocator,
+    passwords are hashed in a process pool of `workers` processes (hashing
+    dominates the cost), and each batch is inserted with bulk_create. The
+    credential emails of a batch are queued in the outbox in the same
+    transaction, for the run_outbox worker. Invalid rows are skipped and reported.
+    """
+    workers = os.cpu_count() if workers is None else workers
+    pool = None
+    if workers > 1:
+        # Forked workers must not share the parent's database sockets
+        connections.close_all()
+        pool = ProcessPoolExecutor(max_workers=workers)
+
+    created, emails_queued, errors = 0, 0, []
+    try:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                counts = _import_batch(batch, default_type, pool, send_emails, errors)
+                created, emails_queued = created + counts[0], emails_queued + counts[1]
+                batch = []
+        if batch:
+            counts = _import_batch(batch, default_type, pool, send_emails, errors)
+            created, emails_queued = created + counts[0], emails_queued + counts[1]
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return ImportReport(created, sorted(errors), emails_queued)
@@ -0,0 +1,63 @@
+# candidate_enrollment/export.py
+
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import InternalCandidate, ExternalCandidate
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = ('csv', 'ndjson')
+
+COMMON_FIELDS = ('id', 'user_id', 'first_name', 'last_name', 'gender', 'email', 'phone_number', 'registered_on')
+SOURCES = {
+    'internal': (InternalCandidate, COMMON_FIELDS + ('employee_id', 'designation')),
+    'external': (ExternalCandidate, COMMON_FIELDS + (
+        'dob', 'address', 'pin_code', 'city', 'aadhar_number', 'highest_qualification',
+    )),
+}
+# CSV columns: the union of both tables' fields; passwords are never exported
+CSV_COLUMNS = ('type',) + COMMON_FIELDS + tuple(
+    f for kind in SOURCES for f in SOURCES[kind][1] if f not in COMMON_FIELDS
+)
+
+
+def iter_candidates(filters, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield candidate rows as dicts, one table after the other, in registration
+    order. `filters` maps 'internal'/'external' to a Q (see picker.parse_filters);
+    tables without an entry are skipped. Rows are streamed from the database
+    in chunks of `chunk_size` as plain values, so memory stays flat.
+    """
+    for kind, condition in filters.items():
+        model, fields = SOURCES[kind]
+        rows = model.objects.filter(condition).order_by('registered_on', 'id').values(*fields)
+        for row in rows.iterator(chunk_size=chunk_size):
+            row['type'] = kind
+            yield row
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+
+class _Echo:
+    """File-like object whose write() returns the line, so csv.writer can feed a generator."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.DictWriter(_Echo(), fieldnames=CSV_COLUMNS, extrasaction='ignore')
+    yield writer.writerow(dict(zip(CSV_COLUMNS, CSV_COLUMNS)))
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def export_lines(export_format, filters, chunk_size=EXPORT_CHUNK_SIZE):
+    """Lines of a candidate export in 'csv' or 'ndjson' format."""
+    rows = iter_candidates(filters, chunk_size)
+    return csv_lines(rows) if export_format == 'csv' else ndjson_lines(rows)
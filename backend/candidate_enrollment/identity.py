@@ -0,0 +1,29 @@
+# candidate_enrollment/identity.py
+
+from .models import CandidateIdentity
+
+SYNCED_FIELDS = ('kind', 'user_id', 'email', 'first_name', 'password')
+
+
+def identity_of(candidate):
+    return CandidateIdentity(id=candidate.pk, **{f: getattr(candidate, f) for f in SYNCED_FIELDS})
+
+
+def sync_identities(candidates):
+    """
+    Upsert the identity rows of saved candidates in one statement; called from
+    the save signal and by code that bulk_creates candidates, which skips signals.
+    """
+    CandidateIdentity.objects.bulk_create(
+        [identity_of(c) for c in candidates],
+        update_conflicts=True, unique_fields=['id'], update_fields=list(SYNCED_FIELDS),
+    )
+
+
+def find_by_user_id(user_id):
+    return CandidateIdentity.objects.filter(user_id=user_id).first()
+
+
+def find_by_email(email):
+    # An email registered in both tables resolves to the external candidate, as before
+    return CandidateIdentity.objects.filter(email=email).order_by('kind').first()
@@ -0,0 +1,41 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from candidate_enrollment.export import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, export_lines
+from candidate_enrollment.picker import PickerError, parse_filters
+
+
+class Command(BaseCommand):
+    help = "Stream candidates to a CSV or NDJSON file (passwords are never exported)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', dest='export_format', choices=EXPORT_FORMATS, default='csv')
+        parser.add_argument('--output', help="File to write (default: stdout)")
+        parser.add_argument('--type', choices=['internal', 'external'], help="Only one candidate table")
+        parser.add_argument('--designation', help="Internal candidates with this designation")
+        parser.add_argument('--city', help="External candidates from this city")
+        parser.add_argument('--registered-from', help="ISO date or datetime")
+        parser.add_argument('--registered-to', help="ISO date or datetime")
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            filters = parse_filters({
+                key: options[key] for key in ('type', 'designation', 'city', 'registered_from', 'registered_to')
+            })
+        except PickerError as e:
+            raise CommandError(str(e))
+
+        out = open(options['output'], 'w', newline='', encoding='utf-8') if options['output'] else sys.stdout
+        count = -1 if options['export_format'] == 'csv' else 0     # don't count the CSV header
+        try:
+            for line in export_lines(options['export_format'], filters, options['chunk_size']):
+                out.write(line)
+                count += 1
+        finally:
+            if out is not sys.stdout:
+                out.close()
+
+        if options['output']:
+            self.stdout.write(self.style.SUCCESS(f"Exported {count} candidates to {options['output']}"))
@@ -0,0 +1,46 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from candidate_enrollment.bulk_import import IMPORT_BATCH_SIZE, import_candidates, read_rows
+
+
+class Command(BaseCommand):
+    help = "Create candidates in bulk from a CSV or XLSX file and queue their credential emails"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or XLSX file; the first row holds the column names")
+        parser.add_argument('--type', choices=['internal', 'external'],
+                            help="Candidate type for rows without a type column")
+        parser.add_argument('--workers', type=int, help="Password hashing processes (default: CPU count)")
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument('--no-email', action='store_true', help="Don't queue credential emails")
+        parser.add_argument('--errors', help="Write the rejected rows to this CSV file")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        try:
+            report = import_candidates(
+                read_rows(options['path']),
+                default_type=options['type'],
+                workers=options['workers'],
+                send_emails=not options['no_email'],
+                batch_size=options['batch_size'],
+            )
+        except OSError as e:
+            raise CommandError(str(e))
+
+        if options['errors']:
+            with open(options['errors'], 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(['row', 'error'])
+                writer.writerows(report.errors)
+        else:
+            for number, message in report.errors:
+                self.stderr.write(f"Row {number}: {message}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {report.created} candidates, rejected {len(report.errors)} rows, "
+            f"{report.emails_queued} emails queued in {time.monotonic() - started:.1f}s"
+        ))
@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-18 12:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidate_enrollment', '0006_remove_externalcandidate_unique_id_proof'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='externalcandidate',
+            index=models.Index(fields=['registered_on', 'id'], name='externalcandidate_reg_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='externalcandidate',
+            index=models.Index(fields=['city', 'registered_on', 'id'], name='external_city_reg_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='internalcandidate',
+            index=models.Index(fields=['registered_on', 'id'], name='internalcandidate_reg_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='internalcandidate',
+            index=models.Index(fields=['designation', 'registered_on', 'id'], name='internal_desig_reg_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidate_enrollment', '0007_candidate_picker_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserIdCounter',
+            fields=[
+                ('prefix', models.CharField(max_length=10, primary_key=True, serialize=False)),
+                ('next_value', models.BigIntegerField()),
+            ],
+            options={
+                'db_table': 'candidate_user_id_counter',
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+import re
+
+from django.db import migrations
+
+PREFIXES = {'INT': 'InternalCandidate', 'EXT': 'ExternalCandidate'}
+FIRST_ALLOCATED = 10000
+
+
+def create_sequences(apps, schema_editor):
+    # PostgreSQL only; other databases allocate from the UserIdCounter table
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    UserIdCounter = apps.get_model('candidate_enrollment', 'UserIdCounter')
+    for prefix, model_name in PREFIXES.items():
+        # Start above every id in use, including blocks the counter table already handed out
+        start = FIRST_ALLOCATED
+        counter = UserIdCounter.objects.filter(prefix=prefix).first()
+        if counter is not None:
+            start = max(start, counter.next_value)
+        pattern = re.compile(rf'^{prefix}(\d+)$')
+        model = apps.get_model('candidate_enrollment', model_name)
+        for user_id in model.objects.filter(user_id__startswith=prefix).values_list('user_id', flat=True).iterator():
+            match = pattern.match(user_id)
+            if match:
+                start = max(start, int(match.group(1)) + 1)
+        schema_editor.execute(
+            f"CREATE SEQUENCE IF NOT EXISTS candidate_user_id_{prefix.lower()}_seq START WITH {int(start)}"
+        )
+
+
+def drop_sequences(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for prefix in PREFIXES:
+        schema_editor.execute(f"DROP SEQUENCE IF EXISTS candidate_user_id_{prefix.lower()}_seq")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidate_enrollment', '0008_useridcounter'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_sequences, drop_sequences),
+    ]
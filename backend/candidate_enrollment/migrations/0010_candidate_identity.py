@@ -0,0 +1,46 @@
+# Generated by Django 5.2 on 2026-10-18 12:43
+
+from django.db import migrations, models
+
+KINDS = {'internal': 'InternalCandidate', 'external': 'ExternalCandidate'}
+FIELDS = ('id', 'user_id', 'email', 'first_name', 'password')
+BATCH_SIZE = 2000
+
+
+def backfill_identities(apps, schema_editor):
+    CandidateIdentity = apps.get_model('candidate_enrollment', 'CandidateIdentity')
+    for kind, model_name in KINDS.items():
+        model = apps.get_model('candidate_enrollment', model_name)
+        batch = []
+        for row in model.objects.values(*FIELDS).iterator(chunk_size=BATCH_SIZE):
+            batch.append(CandidateIdentity(kind=kind, **row))
+            if len(batch) >= BATCH_SIZE:
+                # A user_id present in both tables keeps its internal row, as logins did
+                CandidateIdentity.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        CandidateIdentity.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidate_enrollment', '0009_user_id_sequences'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CandidateIdentity',
+            fields=[
+                ('id', models.UUIDField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('internal', 'Internal'), ('external', 'External')], max_length=10)),
+                ('user_id', models.CharField(max_length=20, unique=True)),
+                ('email', models.EmailField(db_index=True, max_length=254)),
+                ('first_name', models.CharField(max_length=50)),
+                ('password', models.CharField(max_length=128)),
+            ],
+            options={
+                'db_table': 'candidate_identity',
+            },
+        ),
+        migrations.RunPython(backfill_identities, migrations.RunPython.noop),
+    ]
@@ -14,21 +14,34 @@ class BaseCandidate(models.Model):
 
     class Meta:
         abstract = True
+        indexes = [
+            # Keyset pagination of the candidate picker walks (registered_on, id)
+            models.Index(fields=['registered_on', 'id'], name='%(class)s_reg_idx'),
+        ]
 
 
 # Model for Internal Candidates
 class InternalCandidate(BaseCandidate):
+    kind = 'internal'
+
     user_id = models.CharField(max_length=20, unique=True)
     password = models.CharField(max_length=128)
     employee_id = models.CharField(max_length=50, unique=True)
     designation = models.CharField(max_length=50)
 
+    class Meta(BaseCandidate.Meta):
+        indexes = BaseCandidate.Meta.indexes + [
+            models.Index(fields=['designation', 'registered_on', 'id'], name='internal_desig_reg_idx'),
+        ]
+
     def __str__(self):
         return f"{self.first_name} {self.last_name} (Internal)"
 
 
 # Model for External Candidates
 class ExternalCandidate(BaseCandidate):
+    kind = 'external'
+
     user_id = models.CharField(max_length=20, unique=True)
     password = models.CharField(max_length=128)
 
@@ -39,5 +52,42 @@ class ExternalCandidate(BaseCandidate):
     aadhar_number = models.CharField(max_length=20, blank=True, null=True)
     highest_qualification = models.CharField(max_length=100, blank=True, null=True)
 
+    class Meta(BaseCandidate.Meta):
+        indexes = BaseCandidate.Meta.indexes + [
+            models.Index(fields=['city', 'registered_on', 'id'], name='external_city_reg_idx'),
+        ]
+
     def __str__(self):
         return f"{self.first_name} {self.last_name} (External)"
+
+
+# One row per candidate of either table, kept in sync by candidate_enrollment.signals,
+# so logins and password resets find a candidate with a single indexed query
+class CandidateIdentity(models.Model):
+    KIND_CHOICES = [('internal', 'Internal'), ('external', 'External')]
+
+    id = models.UUIDField(primary_key=True)     # the candidate's own id
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    user_id = models.CharField(max_length=20, unique=True)
+    email = models.EmailField(db_index=True)
+    first_name = models.CharField(max_length=50)
+    password = models.CharField(max_length=128)
+
+    class Meta:
+        db_table = 'candidate_identity'
+
+    def get_candidate(self):
+        model = InternalCandidate if self.kind == 'internal' else ExternalCandidate
+        return model.objects.get(pk=self.id)
+
+    def __str__(self):
+        return f"{self.user_id} ({self.kind})"
+
+
+# Next free numeric suffix per user_id prefix ("INT", "EXT"); see candidate_enrollment.user_ids
+class UserIdCounter(models.Model):
+    prefix = models.CharField(max_length=10, primary_key=True)
+    next_value = models.BigIntegerField()
+
+    class Meta:
+        db_table = 'candidate_user_id_counter'
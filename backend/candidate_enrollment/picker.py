@@ -0,0 +1,110 @@
+# candidate_enrollment/picker.py
+
+import base64
+import binascii
+import uuid
+from datetime import datetime, time
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import InternalCandidate, ExternalCandidate
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+COMMON_FIELDS = ('id', 'user_id', 'first_name', 'last_name', 'email', 'registered_on')
+SOURCES = {
+    'internal': (InternalCandidate, COMMON_FIELDS + ('employee_id', 'designation')),
+    'external': (ExternalCandidate, COMMON_FIELDS + ('city',)),
+}
+
+
+class PickerError(ValueError):
+    """Raised for malformed picker filters or cursors."""
+
+
+def encode_cursor(row):
+    raw = f"{row['registered_on'].isoformat()}|{row['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        registered_on, candidate_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        registered_on = parse_datetime(registered_on)
+        candidate_id = uuid.UUID(candidate_id)
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        raise PickerError("Invalid cursor")
+    if registered_on is None:
+        raise PickerError("Invalid cursor")
+    return registered_on, candidate_id
+
+
+def _parse_moment(value, end_of_day):
+    """A registration bound given as an ISO date or datetime."""
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise PickerError(f"Invalid date: {value}")
+        moment = datetime.combine(day, time.max if end_of_day else time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def parse_filters(params):
+    """Picker filters from query parameters: type, designation, city, registered_from, registered_to."""
+    kinds = set(SOURCES)
+    candidate_type = (params.get('type') or '').lower()
+    if candidate_type:
+        if candidate_type not in SOURCES:
+            raise PickerError("type must be internal or external")
+        kinds = {candidate_type}
+
+    filters = {'internal': Q(), 'external': Q()}
+    # Designation only exists on internal candidates and city on external ones
+    if params.get('designation'):
+        kinds.discard('external')
+        filters['internal'] &= Q(designation=params['designation'])
+    if params.get('city'):
+        kinds.discard('internal')
+        filters['external'] &= Q(city=params['city'])
+
+    dates = Q()
+    if params.get('registered_from'):
+        dates &= Q(registered_on__gte=_parse_moment(params['registered_from'], end_of_day=False))
+    if params.get('registered_to'):
+        dates &= Q(registered_on__lte=_parse_moment(params['registered_to'], end_of_day=True))
+
+    return {kind: filters[kind] & dates for kind in sorted(kinds)}
+
+
+def list_candidates(filters, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    One page of candidates from both tables, newest registration first.
+
+    Each table is read with a keyset condition on (registered_on, id) and
+    LIMIT page size + 1, which the (registered_on, id) indexes serve without
+    scanning earlier pages; the two short lists are merged in Python. Only
+    the picker's fields are selected. Returns (rows, next_cursor).
+    """
+    after = Q()
+    if cursor:
+        registered_on, candidate_id = decode_cursor(cursor)
+        after = Q(registered_on__lt=registered_on) | Q(registered_on=registered_on, id__lt=candidate_id)
+
+    rows = []
+    for kind, condition in filters.items():
+        model, fields = SOURCES[kind]
+        page = model.objects.filter(condition, after).order_by('-registered_on', '-id') \
+            .values(*fields)[:limit + 1]
+        rows += [dict(row, type=kind) for row in page]
+
+    rows.sort(key=lambda row: (row['registered_on'], row['id']), reverse=True)
+    page, more = rows[:limit], len(rows) > limit
+    for row in page:
+        row['id'] = str(row['id'])
+    return page, encode_cursor(page[-1]) if more else None
@@ -5,9 +5,11 @@ class InternalCandidateSerializer(serializers.ModelSerializer):
     class Meta:
         model = InternalCandidate
         fields = '__all__'
+        extra_kwargs = {'password': {'write_only': True}}
 
 
 class ExternalCandidateSerializer(serializers.ModelSerializer):
     class Meta:
         model = ExternalCandidate
         fields = '__all__'
+        extra_kwargs = {'password': {'write_only': True}}
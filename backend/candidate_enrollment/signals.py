@@ -0,0 +1,20 @@
+# candidate_enrollment/signals.py
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .identity import sync_identities
+from .models import InternalCandidate, ExternalCandidate, CandidateIdentity
+
+
+@receiver(post_save, sender=InternalCandidate)
+@receiver(post_save, sender=ExternalCandidate)
+def sync_identity(sender, instance, raw=False, **kwargs):
+    if not raw:
+        sync_identities([instance])
+
+
+@receiver(post_delete, sender=InternalCandidate)
+@receiver(post_delete, sender=ExternalCandidate)
+def delete_identity(sender, instance, **kwargs):
+    CandidateIdentity.objects.filter(pk=instance.pk).delete()
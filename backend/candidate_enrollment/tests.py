@@ -1,3 +1,63 @@
-from django.test import TestCase
+import threading
+from unittest import mock
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+
+from .models import ExternalCandidate, UserIdCounter
+from .user_ids import FIRST_ALLOCATED, UserIdAllocator, _counter_values
+
+
+def external(user_id):
+    return ExternalCandidate.objects.create(
+        first_name='F', last_name='L', gender='F', email=f'{user_id.lower()}@example.com',
+        phone_number='1', user_id=user_id, password='x',
+    )
+
+
+class CounterTests(TestCase):
+    def test_counter_starts_above_existing_suffixes(self):
+        for user_id in ('EXT1234', 'EXT12345', 'EXTERNAL7'):
+            external(user_id)
+        self.assertEqual(_counter_values('EXT', 3), [12346, 12347, 12348])
+        self.assertEqual(_counter_values('EXT', 1), [12349])
+        # Registration used random suffixes below FIRST_ALLOCATED
+        self.assertEqual(_counter_values('INT', 1), [FIRST_ALLOCATED])
+
+    def test_allocator_hands_out_its_block_before_reserving(self):
+        allocator = UserIdAllocator(block_size=3)
+        self.assertEqual(allocator.allocate('EXT', 2), ['EXT10000', 'EXT10001'])
+        self.assertEqual(UserIdCounter.objects.get(prefix='EXT').next_value, 10005)
+        # Three left in the block: two are used, the last carries over to the next call
+        self.assertEqual(allocator.allocate('EXT', 2), ['EXT10002', 'EXT10003'])
+        self.assertEqual(allocator.allocate('EXT', 3), ['EXT10004', 'EXT10005', 'EXT10006'])
+        self.assertEqual(allocator.next_id('EXT'), 'EXT10007')
+        self.assertEqual(UserIdCounter.objects.get(prefix='EXT').next_value, 10010)
+
+
+class ConcurrentAllocationTests(TransactionTestCase):
+    @skipUnlessDBFeature('test_db_allows_multiple_connections')
+    @mock.patch('candidate_enrollment.user_ids.reserve', _counter_values)
+    def test_processes_never_share_an_id_on_the_counter_table(self):
+        results, errors = [], []
+
+        def register():
+            # One allocator per thread stands in for one worker process
+            allocator = UserIdAllocator(block_size=4)
+            try:
+                ids = [allocator.next_id('EXT') for _ in range(10)] + allocator.allocate('EXT', 7)
+                results.extend(ids)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=register) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(results), 8 * 17)
+        self.assertEqual(len(set(results)), len(results))
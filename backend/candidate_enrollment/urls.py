@@ -4,6 +4,8 @@ from .views import (
     VerifyOTPAndRegisterView,
     LoginView,
     CandidateListView,
+    CandidatePickerView,
+    CandidateExportView,
     SendResetOTPView,
     ResetPasswordView,
     InternalCandidateListCreateView,
@@ -18,6 +20,8 @@ urlpatterns = [
     path('verify-otp-register/', VerifyOTPAndRegisterView.as_view(), name='verify-otp-register'),  # http://localhost:8000/api/candidate/verify-otp-register
     path('login/', LoginView.as_view(), name='login'),  # http://localhost:8000/api/candidate/login
     path('candidateList/', CandidateListView.as_view(), name='candidate-list'),  # http://localhost:8000/api/candidate/candidateList
+    path('picker/', CandidatePickerView.as_view(), name='candidate-picker'),  # http://localhost:8000/api/candidate/picker
+    path('export/', CandidateExportView.as_view(), name='candidate-export'),  # http://localhost:8000/api/candidate/export
 
     # Password Reset
     path('reset/send-otp/', SendResetOTPView.as_view(), name='reset-send-otp'),
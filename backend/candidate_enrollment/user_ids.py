@@ -0,0 +1,102 @@
+# candidate_enrollment/user_ids.py
+
+import re
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+
+from .models import InternalCandidate, ExternalCandidate, UserIdCounter
+
+USER_ID_PREFIXES = {'internal': 'INT', 'external': 'EXT'}
+CANDIDATE_MODELS = {'INT': InternalCandidate, 'EXT': ExternalCandidate}
+
+# Registration used to draw random suffixes from 1000-9999; allocated ids start above them
+FIRST_ALLOCATED = 10000
+
+
+def sequence_name(prefix):
+    return f"candidate_user_id_{prefix.lower()}_seq"
+
+
+def first_free(prefix):
+    """One-off scan for the lowest suffix above every existing user_id of the prefix."""
+    pattern = re.compile(rf'^{prefix}(\d+)$')
+    highest = FIRST_ALLOCATED - 1
+    for user_id in CANDIDATE_MODELS[prefix].objects.filter(user_id__startswith=prefix) \
+            .values_list('user_id', flat=True).iterator():
+        match = pattern.match(user_id)
+        if match:
+            highest = max(highest, int(match.group(1)))
+    return highest + 1
+
+
+def _sequence_values(prefix, count):
+    # nextval() never blocks and is never rolled back, so concurrent callers can't collide
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT nextval(%s) FROM generate_series(1, %s)", [sequence_name(prefix), count])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _counter_values(prefix, count):
+    # Table fallback (SQLite): increment first, so the write lock is taken by the
+    # UPDATE itself and concurrent callers queue instead of upgrading a read lock
+    with transaction.atomic():
+        counters = UserIdCounter.objects.filter(prefix=prefix)
+        if not counters.update(next_value=F('next_value') + count):
+            try:
+                with transaction.atomic():
+                    UserIdCounter.objects.create(prefix=prefix, next_value=first_free(prefix) + count)
+            except IntegrityError:
+                # Another process created it first
+                counters.update(next_value=F('next_value') + count)
+        end = counters.values_list('next_value', flat=True).get()
+    return list(range(end - count, end))
+
+
+def reserve(prefix, count):
+    """`count` fresh suffixes for a prefix from the PostgreSQL sequence, or the counter table elsewhere."""
+    if connection.vendor == 'postgresql':
+        return _sequence_values(prefix, count)
+    return _counter_values(prefix, count)
+
+
+class UserIdAllocator:
+    """
+    Hands out candidate user_ids (INT10000, EXT10001, ...) from blocks the
+    process reserves `block_size` at a time, so most registrations take an
+    id without touching the database. Ids of a block the process doesn't
+    use before exiting are skipped; ids are unique, not gapless.
+    """
+
+    def __init__(self, block_size):
+        self.block_size = block_size
+        self._blocks = {}           # prefix -> list of reserved suffixes, next one last
+        self._lock = threading.Lock()
+
+    def next_id(self, prefix):
+        return self.allocate(prefix, 1)[0]
+
+    def allocate(self, prefix, count):
+        """`count` user_ids for a prefix; bulk requests reserve what they need in one go."""
+        with self._lock:
+            block = self._blocks.setdefault(prefix, [])
+            taken = [block.pop() for _ in range(min(count, len(block)))]
+            missing = count - len(taken)
+            if missing:
+                fresh = reserve(prefix, missing + self.block_size)
+                taken += fresh[:missing]
+                block[:] = reversed(fresh[missing:])
+        return [f"{prefix}{n}" for n in taken]
+
+    def clear(self):
+        with self._lock:
+            self._blocks.clear()
+
+
+user_ids = UserIdAllocator(block_size=getattr(settings, 'CANDIDATE_USER_ID_BLOCK_SIZE', 50))
+
+
+def allocate_user_ids(prefix, count):
+    return user_ids.allocate(prefix, count) if count > 0 else []
@@ -1,25 +1,69 @@
 # candidate_enrollment/utils.py
 
-from candidate_enrollment.models import InternalCandidate, ExternalCandidate
-from django.contrib.auth.models import User
+import random
+import string
+
 from django.contrib.auth.hashers import check_password
-from rest_framework_simplejwt.tokens import RefreshToken
+from .authentication import CandidateRefreshToken
+from .identity import find_by_user_id
 
 
-def authenticate_candidate(user_id, password):
-    candidate = InternalCandidate.objects.filter(user_id=user_id).first() or \
-                ExternalCandidate.objects.filter(user_id=user_id).first()
+def verify_candidate(user_id, password, password_checker=check_password):
+    """
+    Return the CandidateIdentity matching the credentials, or None; it carries
+    the id, user_id, kind and first_name tokens need, so this is one query.
+    password_checker lets callers route the hash through their own executor.
+    """
+    candidate = find_by_user_id(user_id)
+
+    if candidate and password_checker(password, candidate.password):
+        return candidate
+    return None
+
+
+def issue_candidate_tokens(candidate, assignment_ids=()):
+    refresh = CandidateRefreshToken.for_candidate(candidate, assignment_ids)
+
+    return {
+        "message": "Candidate login successful",
+        "role": candidate.kind,
+        "candidate_id": str(candidate.id),
+        "access": str(refresh.access_token),
+        "refresh": str(refresh)
+    }
+
 
-    if candidate and check_password(password, candidate.password):
-        temp_user, _ = User.objects.get_or_create(username=f"candidate_{user_id}")
-        refresh = RefreshToken.for_user(temp_user)
+def authenticate_candidate(user_id, password):
+    candidate = verify_candidate(user_id, password)
 
-        return {
-            "message": "Candidate login successful",
-            "role": "internal" if isinstance(candidate, InternalCandidate) else "external",
-            "candidate_id": str(candidate.id),
-            "access": str(refresh.access_token),
-            "refresh": str(refresh)
-        }, candidate
+    if candidate:
+        # Imported here: exam_allotment.models depends on this app's models
+        from exam_allotment.models import ExamAssignment
+        assignment_ids = ExamAssignment.objects.filter(user_id=candidate.user_id) \
+                                               .values_list('assignment_id', flat=True)
+        return issue_candidate_tokens(candidate, assignment_ids), candidate
 
     return None, None
+
+
+# Helper function to generate random password
+def generate_random_password(length=8):
+    if length < 4:
+        raise ValueError("Password length must be at least 4 characters to include all required types.")
+
+    # Define allowed character sets
+    upper = random.choice(string.ascii_uppercase)
+    lower = random.choice(string.ascii_lowercase)
+    digit = random.choice(string.digits)
+    special_chars = '*&#?/'
+    special = random.choice(special_chars)
+
+    # Pool of allowed characters
+    allowed_chars = string.ascii_letters + string.digits + special_chars
+    remaining = random.choices(allowed_chars, k=length - 4)
+
+    # Combine and shuffle
+    password_list = [upper, lower, digit, special] + remaining
+    random.shuffle(password_list)
+
+    return ''.join(password_list)
@@ -1,4 +1,5 @@
 from django.core.mail import send_mail
+from django.http import StreamingHttpResponse
 from django.core.cache import cache
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -13,13 +14,21 @@ import string
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.conf import settings
+from django.db import transaction
 from django.db.models import Q
 from rest_framework.response import Response
 from rest_framework.decorators import api_view
+from rest_framework.permissions import IsAdminUser
+from notifications.outbox import enqueue_email
+from notifications.rendering import render_email
+from .authentication import CandidateOrUserJWTAuthentication
 from .filters import CandidateFilter
+from .export import EXPORT_FORMATS, export_lines
+from .identity import find_by_email
+from .user_ids import user_ids
+from .picker import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, PickerError, parse_filters, list_candidates
+from .utils import authenticate_candidate, generate_random_password
 from django.core.cache import cache
-from django.template.loader import render_to_string
-from django.core.mail import EmailMultiAlternatives
 #from .utils import generate_otp 
 
 from rest_framework import generics
@@ -32,9 +41,7 @@ class CandidateRegisterView(APIView):
 
         if user_type == 'external':
             # Generate user_id and password
-            prefix = "EXT"
-            count = ExternalCandidate.objects.count() + 1
-            user_id = f"{prefix}{1000 + count}"
+            user_id = user_ids.next_id("EXT")
             raw_password = ''.join(random.choices(string.ascii_letters + string.digits, k=8))
             hashed_password = make_password(raw_password)
 
@@ -44,36 +51,27 @@ class CandidateRegisterView(APIView):
             serializer = ExternalCandidateSerializer(data=data)
 
             if serializer.is_valid():
-                serializer.save()
-
-                # Send email with HTML template
+                # Queued in the same transaction as the candidate; run_outbox sends it
                 context = {
                     'first_name': data['first_name'],
                     'last_name': data['last_name'],
                     'user_id': user_id,
                     'password': raw_password,
-                     "logo_url": "https://res.cloudinary.com/dwybblnpz/image/upload/ChatGPT_Image_May_14_2025_02_21_41_PM_ovhtkx_c_crop_w_810_h_389_x_0_y_0_szcgmn.png",
                 }
                 
-                html_content = render_to_string('emails/registration.html', context)
+                html_content = render_email('emails/registration.html', context)
                 
-                msg = EmailMultiAlternatives(
-                    subject="Exam Portal Registration Details",
-                    body="",  # Plain text body (empty since we're using HTML)
-                    from_email="noreply@example.com",
-                    to=[data['email']]
-                )
-                msg.attach_alternative(html_content, "text/html")
-                msg.send()
+                with transaction.atomic():
+                    serializer.save()
+                    enqueue_email(data['email'], "Exam Portal Registration Details", html_content,
+                                  from_email="noreply@example.com")
 
                 return Response({"message": "External candidate registered successfully."}, status=status.HTTP_201_CREATED)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         elif user_type == 'internal':
             # Generate user_id and password
-            prefix = "INT"
-            count = InternalCandidate.objects.count() + 1
-            user_id = f"{prefix}{1000 + count}"
+            user_id = user_ids.next_id("INT")
             raw_password = ''.join(random.choices(string.ascii_letters + string.digits, k=8))
             hashed_password = make_password(raw_password)
 
@@ -83,27 +81,20 @@ class CandidateRegisterView(APIView):
             serializer = InternalCandidateSerializer(data=data)
 
             if serializer.is_valid():
-                serializer.save()
-
-                # Send email with HTML template
+                # Queued in the same transaction as the candidate; run_outbox sends it
                 context = {
                     'first_name': data['first_name'],
                     'last_name': data['last_name'],
                     'user_id': user_id,
                     'password': raw_password,
-                     "logo_url": "https://res.cloudinary.com/dwybblnpz/image/upload/ChatGPT_Image_May_14_2025_02_21_41_PM_ovhtkx_c_crop_w_810_h_389_x_0_y_0_szcgmn.png",
                 }
                 
-                html_content = render_to_string('emails/registration.html', context)
+                html_content = render_email('emails/registration.html', context)
                 
-                msg = EmailMultiAlternatives(
-                    subject="Exam Portal Registration Details",
-                    body="",  # Plain text body (empty since we're using HTML)
-                    from_email="noreply@example.com",
-                    to=[data['email']]
-                )
-                msg.attach_alternative(html_content, "text/html")
-                msg.send()
+                with transaction.atomic():
+                    serializer.save()
+                    enqueue_email(data['email'], "Exam Portal Registration Details", html_content,
+                                  from_email="noreply@example.com")
 
                 return Response({"message": "Internal candidate registered successfully."}, status=status.HTTP_201_CREATED)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -128,48 +119,18 @@ class SendOTPView(APIView):
         # Save OTP in cache with a timeout of 5 minutes
         cache.set(f"otp_{email}", otp, timeout=300)
 
-        # Send OTP email with HTML template
+        # Queue the OTP email with HTML template; run_outbox sends it
         context = {
             'otp': otp,
         }
         
-        html_content = render_to_string('emails/otp.html', context)
+        html_content = render_email('emails/otp.html', context)
         
-        msg = EmailMultiAlternatives(
-            subject="Your OTP for Registration",
-            body="",  # Plain text body (empty since we're using HTML)
-            from_email="noreply@example.com",
-            to=[email]
-        )
-        msg.attach_alternative(html_content, "text/html")
-        msg.send()
+        enqueue_email(email, "Your OTP for Registration", html_content, from_email="noreply@example.com")
 
         return Response({"message": "OTP sent to your email."}, status=status.HTTP_200_OK)
 
 
-# Helper function to generate random password
-def generate_random_password(length=8):
-    if length < 4:
-        raise ValueError("Password length must be at least 4 characters to include all required types.")
-
-    # Define allowed character sets
-    upper = random.choice(string.ascii_uppercase)
-    lower = random.choice(string.ascii_lowercase)
-    digit = random.choice(string.digits)
-    special_chars = '*&#?/'
-    special = random.choice(special_chars)
-
-    # Pool of allowed characters
-    allowed_chars = string.ascii_letters + string.digits + special_chars
-    remaining = random.choices(allowed_chars, k=length - 4)
-
-    # Combine and shuffle
-    password_list = [upper, lower, digit, special] + remaining
-    random.shuffle(password_list)
-
-    return ''.join(password_list)
-
-
 # View to verify OTP and register user
 class VerifyOTPAndRegisterView(APIView):
     def post(self, request):
@@ -190,7 +151,7 @@ class VerifyOTPAndRegisterView(APIView):
         password_hashed = make_password(password_plain)
 
         if user_type == 'internal':
-            user_id = f"INT{random.randint(1000, 9999)}"
+            user_id = user_ids.next_id("INT")
             data = {
                 'first_name': request.data.get('first_name'),
                 'last_name': request.data.get('last_name'),
@@ -205,7 +166,7 @@ class VerifyOTPAndRegisterView(APIView):
             serializer = InternalCandidateSerializer(data=data)
 
         elif user_type == 'external':
-            user_id = f"EXT{random.randint(1000, 9999)}"
+            user_id = user_ids.next_id("EXT")
             data = {
                 'first_name': request.data.get('first_name'),
                 'last_name': request.data.get('last_name'),
@@ -227,27 +188,19 @@ class VerifyOTPAndRegisterView(APIView):
             return Response({"error": "Invalid user type."}, status=status.HTTP_400_BAD_REQUEST)
 
         if serializer.is_valid():
-            serializer.save()
-
-            # Send confirmation email with HTML template
+            # Confirmation email, queued in the same transaction as the candidate
             context = {
                 'first_name': data['first_name'],
                 'last_name': data['last_name'],
                 'user_id': user_id,
                 'password': password_plain,
-                 "logo_url": "https://res.cloudinary.com/dwybblnpz/image/upload/ChatGPT_Image_May_14_2025_02_21_41_PM_ovhtkx_c_crop_w_810_h_389_x_0_y_0_szcgmn.png",
             }
             
-            html_content = render_to_string('emails/registration_confirmation.html', context)
+            html_content = render_email('emails/registration_confirmation.html', context)
             
-            msg = EmailMultiAlternatives(
-                subject="Registration Successful",
-                body="",  # Plain text body (empty since we're using HTML)
-                from_email="noreply@example.com",
-                to=[email]
-            )
-            msg.attach_alternative(html_content, "text/html")
-            msg.send()
+            with transaction.atomic():
+                serializer.save()
+                enqueue_email(email, "Registration Successful", html_content, from_email="noreply@example.com")
 
             # Clear the OTP from cache
             cache.delete(f"otp_{email}")
@@ -288,21 +241,11 @@ class LoginView(APIView):
 
         elif login_type == 'candidate':
             try:
-                candidate = InternalCandidate.objects.filter(user_id=user_id).first() or \
-                            ExternalCandidate.objects.filter(user_id=user_id).first()
-
-                if candidate and check_password(password, candidate.password):
-                    # Create/get a temp user for JWT
-                    temp_user, _ = User.objects.get_or_create(username=f"{login_type}_{user_id}")
-                    refresh = RefreshToken.for_user(temp_user)
+                # Candidate tokens carry their identity as claims; no auth_user row is needed
+                auth_data, candidate = authenticate_candidate(user_id, password)
 
-                    return Response({
-                        "message": "Candidate login successful",
-                        "role": "internal" if isinstance(candidate, InternalCandidate) else "external",
-                        "candidate_id": str(candidate.id),
-                        "access": str(refresh.access_token),
-                        "refresh": str(refresh)
-                    }, status=status.HTTP_200_OK)
+                if auth_data:
+                    return Response(auth_data, status=status.HTTP_200_OK)
                 else:
                     return Response({"error": "Invalid credentials"}, status=status.HTTP_401_UNAUTHORIZED)
 
@@ -316,6 +259,9 @@ class LoginView(APIView):
 
 # View to get candidate details
 class CandidateListView(APIView):
+    # Candidates read their own profile from here too, with their candidate token
+    authentication_classes = [CandidateOrUserJWTAuthentication]
+
     def get(self, request):
         # Apply the filtering on InternalCandidate
         internal_candidates = InternalCandidate.objects.all()
@@ -339,6 +285,49 @@ class CandidateListView(APIView):
         }, status=status.HTTP_200_OK)  
 
 
+# Candidate picker: keyset-paginated over both candidate tables
+class CandidatePickerView(APIView):
+    """
+    GET /api/candidate/picker/?type=&designation=&city=&registered_from=&registered_to=&limit=&cursor=
+    """
+    def get(self, request):
+        params = request.query_params
+        try:
+            limit = min(max(int(params.get('limit') or DEFAULT_PAGE_SIZE), 1), MAX_PAGE_SIZE)
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            results, next_cursor = list_candidates(parse_filters(params), params.get('cursor'), limit)
+        except PickerError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({"results": results, "next_cursor": next_cursor}, status=status.HTTP_200_OK)
+
+
+# Streaming export of both candidate tables
+class CandidateExportView(APIView):
+    """
+    GET /api/candidate/export/?output=csv|ndjson&type=&designation=&city=&registered_from=&registered_to=
+    Staff only: the export carries every matching candidate's contact details.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        export_format = (request.query_params.get('output') or 'csv').lower()
+        if export_format not in EXPORT_FORMATS:
+            return Response({"error": "output must be csv or ndjson"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            filters = parse_filters(request.query_params)
+        except PickerError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        content_type = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+        response = StreamingHttpResponse(export_lines(export_format, filters), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="candidates.{export_format}"'
+        return response
+
+
 # Cache timeout (e.g., OTP is valid for 10 minutes)
 # View to send OTP for password reset
 class SendResetOTPView(APIView):
@@ -349,13 +338,8 @@ class SendResetOTPView(APIView):
             return Response({"error": "Email is required"}, status=status.HTTP_400_BAD_REQUEST)
 
         # Check if the user exists
-        try:
-            user = ExternalCandidate.objects.get(email=email)
-        except ExternalCandidate.DoesNotExist:
-            try:
-                user = InternalCandidate.objects.get(email=email)
-            except InternalCandidate.DoesNotExist:
-                return Response({"error": "No user found with this email address"}, status=status.HTTP_404_NOT_FOUND)
+        if find_by_email(email) is None:
+            return Response({"error": "No user found with this email address"}, status=status.HTTP_404_NOT_FOUND)
 
         # Generate OTP
         otp = generate_otp()
@@ -363,22 +347,14 @@ class SendResetOTPView(APIView):
         # Save OTP in cache with a timeout of 10 minutes (600 seconds)
         cache.set(f"otp_{email}", otp, timeout=600)
 
-        # Send OTP email with HTML template
+        # Queue the OTP email with HTML template; run_outbox sends it
         context = {
             'otp': otp,
-             "logo_url": "https://res.cloudinary.com/dwybblnpz/image/upload/ChatGPT_Image_May_14_2025_02_21_41_PM_ovhtkx_c_crop_w_810_h_389_x_0_y_0_szcgmn.png",
         }
         
-        html_content = render_to_string('emails/otp.html', context)
+        html_content = render_email('emails/otp.html', context)
         
-        msg = EmailMultiAlternatives(
-            subject="Your OTP for Password Reset",
-            body="",  # Plain text body (empty since we're using HTML)
-            from_email="noreply@example.com",
-            to=[email]
-        )
-        msg.attach_alternative(html_content, "text/html")
-        msg.send()
+        enqueue_email(email, "Your OTP for Password Reset", html_content, from_email="noreply@example.com")
 
         return Response({"message": "OTP sent to your email."}, status=status.HTTP_200_OK)
 
@@ -400,40 +376,31 @@ class ResetPasswordView(APIView):
             return Response({"error": "Invalid or expired OTP."}, status=status.HTTP_400_BAD_REQUEST)
 
         # Check if the user exists
-        user = None
-        try:
-            user = ExternalCandidate.objects.get(email=email)
-        except ExternalCandidate.DoesNotExist:
-            try:
-                user = InternalCandidate.objects.get(email=email)
-            except InternalCandidate.DoesNotExist:
-                return Response({"error": "No user found with this email address"}, status=status.HTTP_404_NOT_FOUND)
+        identity = find_by_email(email)
+        if identity is None:
+            return Response({"error": "No user found with this email address"}, status=status.HTTP_404_NOT_FOUND)
+        user = identity.get_candidate()
 
-        # ✅ Hash the new password and update
+        # ✅ Hash the new password
         user.password = make_password(new_password)
-        user.save()
 
         # ✅ Clear the OTP
         cache.delete(f"otp_{email}")
 
-        # ✅ Send email notification with HTML template
+        # ✅ Email notification with HTML template
         context = {
             'first_name': user.first_name,
             'user_id': user.user_id,
             'new_password': new_password,
-             "logo_url": "https://res.cloudinary.com/dwybblnpz/image/upload/ChatGPT_Image_May_14_2025_02_21_41_PM_ovhtkx_c_crop_w_810_h_389_x_0_y_0_szcgmn.png",
         }
         
-        html_content = render_to_string('emails/reset_password.html', context)
+        html_content = render_email('emails/reset_password.html', context)
         
-        msg = EmailMultiAlternatives(
-            subject="Your password has been changed",
-            body="",  # Plain text body (empty since we're using HTML)
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[user.email]
-        )
-        msg.attach_alternative(html_content, "text/html")
-        msg.send()
+        # ✅ Save it and queue the notice in one transaction; run_outbox sends it
+        with transaction.atomic():
+            user.save()
+            enqueue_email(user.email, "Your password has been changed", html_content,
+                          from_email=settings.DEFAULT_FROM_EMAIL)
 
         return Response({"message": "Password reset successful!"}, status=status.HTTP_200_OK)
 
@@ -0,0 +1,98 @@
+# exam_allotment/assignments.py
+
+import uuid
+from typing import NamedTuple
+
+from django.db import transaction
+from django.db.models import Q
+
+from candidate_enrollment.models import InternalCandidate, ExternalCandidate
+from .models import ExamAssignment
+
+INSERT_BATCH_SIZE = 2000
+SNAPSHOT_FIELDS = ('id', 'user_id', 'first_name', 'last_name', 'email', 'password')
+
+
+class AssignmentResult(NamedTuple):
+    created: list       # new ExamAssignment rows
+    existing: list      # candidate ids that already had an assignment for the exam
+    unknown: list       # requested ids that match no candidate
+
+
+def _parse_ids(candidate_ids):
+    """Deduplicate the requested ids, keeping their order; split off malformed ones."""
+    requested, invalid, seen = [], [], set()
+    for raw in candidate_ids:
+        try:
+            candidate_id = uuid.UUID(str(raw))
+        except ValueError:
+            invalid.append(str(raw))
+            continue
+        if candidate_id not in seen:
+            seen.add(candidate_id)
+            requested.append(candidate_id)
+    return requested, invalid
+
+
+def assign_candidates(exam, candidate_ids):
+    """
+    Assign internal and/or external candidates to an exam in bulk.
+
+    Candidate fields are snapshotted from two prefetched querysets and the
+    assignments are inserted with bulk_create, bypassing ExamAssignment.save()
+    and its per-row lookups and full_clean(). Candidates already assigned to
+    the exam are skipped; the (exam, candidate) unique constraints also make
+    concurrent calls safe. The caller decides whether to send invitations.
+    """
+    requested, unknown = _parse_ids(candidate_ids)
+
+    candidates = list(InternalCandidate.objects.filter(id__in=requested).only(*SNAPSHOT_FIELDS)) + \
+                 list(ExternalCandidate.objects.filter(id__in=requested).only(*SNAPSHOT_FIELDS))
+    found = {c.id for c in candidates}
+    unknown += [str(cid) for cid in requested if cid not in found]
+
+    already_assigned = set()
+    for internal_id, external_id in ExamAssignment.objects.filter(
+        Q(internal_candidate_id__in=found) | Q(external_candidate_id__in=found), exam=exam
+    ).values_list('internal_candidate_id', 'external_candidate_id'):
+        already_assigned.add(internal_id or external_id)
+
+    location = exam.location or ""
+    duration_minutes = int((exam.exam_end_time - exam.exam_start_time).total_seconds() / 60)
+
+    rows = []
+    for c in candidates:
+        if c.id in already_assigned:
+            continue
+        assignment = ExamAssignment(
+            exam=exam,
+            exam_token=exam.exam_token,
+            url_link=exam.exam_url,
+            location=location,
+            exam_start_time=exam.exam_start_time,
+            exam_end_time=exam.exam_end_time,
+            duration_minutes=duration_minutes,
+            user_id=c.user_id,
+            first_name=c.first_name,
+            last_name=c.last_name,
+            email=c.email,
+            password=c.password,
+        )
+        if isinstance(c, InternalCandidate):
+            assignment.internal_candidate = c
+        else:
+            assignment.external_candidate = c
+        rows.append(assignment)
+
+    created = []
+    if rows:
+        new_ids = [a.internal_candidate_id or a.external_candidate_id for a in rows]
+        with transaction.atomic():
+            # ignore_conflicts returns no primary keys, so read the new rows back
+            ExamAssignment.objects.bulk_create(rows, batch_size=INSERT_BATCH_SIZE, ignore_conflicts=True)
+            created = list(ExamAssignment.objects.filter(
+                Q(internal_candidate_id__in=new_ids) | Q(external_candidate_id__in=new_ids),
+                exam=exam, invitation_status='pending',
+            ).order_by('pk'))
+
+    return AssignmentResult(created, [str(cid) for cid in already_assigned], unknown)
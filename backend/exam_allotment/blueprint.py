@@ -0,0 +1,210 @@
+# exam_allotment/blueprint.py
+
+import math
+import random
+from array import array
+
+from django.core.cache import cache
+
+from .sampling import (
+    QUESTION_MODELS, DIFFICULTIES, POOL_CACHE_TIMEOUT,
+    Stratum, pool_version, rebalance_marks,
+)
+
+ANSWER_TYPES = ('Single', 'Multiple')
+MAX_PAPERS = 5000
+UNIQUE_RETRIES = 20
+
+
+class BlueprintError(ValueError):
+    """Raised for an invalid blueprint or one the question bank can't satisfy."""
+
+
+def get_index(question_type, subject):
+    """
+    {(difficulty, answer_type, marks): array of ids} for one question type and
+    subject (answer_type is None for FIB). Cached alongside the sampling pools
+    and invalidated by the same question signals.
+    """
+    key = f"blueprint_index_{question_type}_{subject}_v{pool_version(question_type, subject)}"
+    index = cache.get(key)
+    if index is None:
+        index = {}
+        fields = ['difficulty', 'answer_type', 'marks', 'id'] if question_type == 'MCQ' \
+            else ['difficulty', 'marks', 'id']
+        rows = QUESTION_MODELS[question_type].objects.filter(subject=subject) \
+            .values_list(*fields).order_by()
+        for row in rows.iterator(chunk_size=5000):
+            if question_type != 'MCQ':
+                row = (row[0], None) + row[1:]
+            index.setdefault(row[:3], array('q')).append(row[3])
+        cache.set(key, index, timeout=POOL_CACHE_TIMEOUT)
+    return index
+
+
+def parse_blueprint(data):
+    """
+    Validate a blueprint:
+    {"sections": [{"type": "MCQ", "subject": "Math", "difficulty": "Easy",
+                   "answer_type": "Single", "marks": 2, "count": 10}, ...],
+     "total_marks": 50}
+    difficulty, answer_type (MCQ only), marks and total_marks are optional.
+    Returns (sections, total_marks).
+    """
+    if not isinstance(data, dict) or not isinstance(data.get('sections'), list) or not data['sections']:
+        raise BlueprintError("Blueprint needs a non-empty list of sections")
+
+    sections = []
+    for i, raw in enumerate(data['sections']):
+        if not isinstance(raw, dict):
+            raise BlueprintError(f"Section {i} must be an object")
+        question_type = str(raw.get('type', '')).upper()
+        if question_type not in QUESTION_MODELS:
+            raise BlueprintError(f"Section {i}: type must be MCQ or FIB")
+        if not raw.get('subject'):
+            raise BlueprintError(f"Section {i}: subject is required")
+        if raw.get('difficulty') not in (None,) + DIFFICULTIES:
+            raise BlueprintError(f"Section {i}: difficulty must be one of {', '.join(DIFFICULTIES)}")
+        if raw.get('answer_type') not in (None,) + ANSWER_TYPES:
+            raise BlueprintError(f"Section {i}: answer_type must be Single or Multiple")
+        if raw.get('answer_type') and question_type != 'MCQ':
+            raise BlueprintError(f"Section {i}: answer_type only applies to MCQ")
+        try:
+            count = int(raw.get('count', 0))
+            marks = None if raw.get('marks') is None else int(raw['marks'])
+        except (TypeError, ValueError):
+            raise BlueprintError(f"Section {i}: count and marks must be integers")
+        if count <= 0:
+            raise BlueprintError(f"Section {i}: count must be > 0")
+        sections.append({
+            'type': question_type, 'subject': raw['subject'], 'difficulty': raw.get('difficulty'),
+            'answer_type': raw.get('answer_type'), 'marks': marks, 'count': count,
+        })
+
+    try:
+        total_marks = None if data.get('total_marks') is None else int(data['total_marks'])
+    except (TypeError, ValueError):
+        raise BlueprintError("total_marks must be an integer")
+
+    return sections, total_marks
+
+
+class _Section:
+    """
+    Candidates of one blueprint section, handed out round-robin over a random
+    permutation: consecutive papers get disjoint picks until the pool wraps,
+    which spreads question exposure evenly over the cohort.
+    """
+
+    def __init__(self, group, stratum, count):
+        self.group = group
+        self.stratum = stratum
+        self.count = count
+        self._order = list(range(stratum.size))
+        random.shuffle(self._order)
+        self._cursor = 0
+
+    def take(self, exclude):
+        picked = []
+        for _ in range(self.stratum.size):
+            if len(picked) == self.count:
+                break
+            if self._cursor == len(self._order):
+                random.shuffle(self._order)
+                self._cursor = 0
+            qid, marks = self.stratum.at(self._order[self._cursor])
+            self._cursor += 1
+            if qid not in exclude:
+                exclude.add(qid)
+                picked.append((self.group, qid, marks))
+        return picked
+
+    def sample(self, exclude):
+        picked = []
+        # Oversample a little so ids taken by other sections can be skipped
+        for qid, marks in self.stratum.sample(min(self.stratum.size, 4 * self.count)):
+            if len(picked) == self.count:
+                break
+            if qid not in exclude:
+                exclude.add(qid)
+                picked.append((self.group, qid, marks))
+        return picked
+
+
+def _build_sections(specs):
+    indexes = {}
+    sections = []
+    for i, spec in enumerate(specs):
+        key = (spec['type'], spec['subject'])
+        if key not in indexes:
+            indexes[key] = get_index(*key)
+        groups = {}
+        for (difficulty, answer_type, marks), ids in indexes[key].items():
+            if spec['difficulty'] and difficulty != spec['difficulty']:
+                continue
+            if spec['answer_type'] and answer_type != spec['answer_type']:
+                continue
+            if spec['marks'] is not None and marks != spec['marks']:
+                continue
+            groups[marks] = groups[marks] + ids if marks in groups else ids
+        stratum = Stratum(groups.items())
+        if stratum.size < spec['count']:
+            raise BlueprintError(
+                f"Section {i}: only {stratum.size} matching {spec['type']} questions, {spec['count']} requested"
+            )
+        sections.append(_Section((spec['type'], i), stratum, spec['count']))
+    return sections
+
+
+def generate_papers(sections_spec, total_marks=None, papers=1):
+    """
+    Assemble `papers` distinct question papers that all satisfy the blueprint.
+
+    Each section draws round-robin from its shuffled candidates; a paper that
+    repeats an earlier one is redrawn at random, and a marks target is met by
+    swapping within sections (see rebalance_marks). Works on the cached id
+    index only: besides one shuffle of each section's candidates, the cost
+    grows with papers x questions per paper. Returns a list of
+    {'mcq_question_ids', 'fib_question_ids', 'total_marks'} dicts.
+    """
+    if not 1 <= papers <= MAX_PAPERS:
+        raise BlueprintError(f"papers must be between 1 and {MAX_PAPERS}")
+    sections = _build_sections(sections_spec)
+
+    # Upper bound on distinct papers (exact when sections don't overlap)
+    combinations = math.prod(math.comb(s.stratum.size, s.count) for s in sections)
+    if combinations < papers:
+        raise BlueprintError(f"The question bank allows at most {combinations} distinct papers")
+
+    strata = {s.group: s.stratum for s in sections}
+    seen = set()
+    result = []
+    for _ in range(papers):
+        for attempt in range(UNIQUE_RETRIES):
+            taken = {'MCQ': set(), 'FIB': set()}
+            picked = []
+            for section in sections:
+                draw = section.take if attempt == 0 else section.sample
+                picked += draw(taken[section.group[0]])
+            if any(len([p for p in picked if p[0] == s.group]) < s.count for s in sections):
+                continue        # overlapping sections ran out of distinct questions
+
+            total = sum(marks for _, _, marks in picked)
+            if total_marks is not None and total != total_marks:
+                total = rebalance_marks(picked, strata, total_marks)
+                if total != total_marks:
+                    continue
+
+            mcq_ids = [qid for (qtype, _), qid, _ in picked if qtype == 'MCQ']
+            fib_ids = [qid for (qtype, _), qid, _ in picked if qtype == 'FIB']
+            key = (frozenset(mcq_ids), frozenset(fib_ids))
+            if key in seen:
+                continue
+            seen.add(key)
+            result.append({'mcq_question_ids': mcq_ids, 'fib_question_ids': fib_ids, 'total_marks': total})
+            break
+        else:
+            if total_marks is not None and not result:
+                raise BlueprintError(f"Cannot reach {total_marks} total marks with this blueprint")
+            raise BlueprintError(f"Only {len(result)} distinct papers could be generated")
+    return result
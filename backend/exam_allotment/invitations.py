@@ -0,0 +1,179 @@
+# exam_allotment/invitations.py
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connection as db_connection, transaction
+from django.utils import timezone
+
+from notifications.rendering import render_many
+from .models import ExamAssignment
+
+logger = logging.getLogger(__name__)
+
+INVITATION_TEMPLATE = "emails/exam_invitation.html"
+SENDABLE_STATUSES = ('pending', 'failed')
+
+
+def invitation_context(assignment, exam):
+    return {
+        "first_name": assignment.first_name,
+        "last_name": assignment.last_name,
+        "user_id": assignment.user_id,
+        "exam_title": exam.exam_title,
+        "start_time": exam.exam_start_time,
+        "end_time": exam.exam_end_time,
+        "location": exam.location or "",
+        "exam_url": exam.exam_url,
+    }
+
+
+def build_invitation(assignment, exam, html_content):
+    """The invitation email of one assignment around its rendered HTML body."""
+    location = exam.location or ""
+    text_content = (
+        f"Dear {assignment.first_name} {assignment.last_name},\n\n"
+        f"You are invited to the recruitment exam “{exam.exam_title}”.\n\n"
+        f"User ID: {assignment.user_id}\n"
+        f"Your password was sent in your registration email.\n\n"
+        f"Start Time: {exam.exam_start_time}\n"
+        f"End Time:   {exam.exam_end_time}\n"
+        f"Examination Center: {location}\n\n"
+        f"To begin your exam, open this link:\n{exam.exam_url}\n\n"
+        "Good luck!\nRecruitment Team"
+    )
+
+    msg = EmailMultiAlternatives(
+        f"Your Invitation: {exam.exam_title}", text_content, settings.EMAIL_HOST_USER, [assignment.email]
+    )
+    msg.attach_alternative(html_content, "text/html")
+    return msg
+
+
+def _claim(assignment_ids, statuses):
+    """
+    Lock a batch of sendable assignments and mark them as sending, so two
+    senders never deliver the same invitation. Rows another sender holds are skipped.
+    """
+    with transaction.atomic():
+        claimed = list(
+            ExamAssignment.objects.select_for_update(skip_locked=True, of=('self',))
+            .filter(pk__in=assignment_ids, invitation_status__in=statuses)
+            .select_related('exam')
+        )
+        ExamAssignment.objects.filter(pk__in=[a.pk for a in claimed]).update(invitation_status='sending')
+    return claimed
+
+
+def _send_with_retry(connection, assignment, html_content, max_attempts, retry_delay):
+    """Send one invitation over the shared connection, reconnecting between attempts."""
+    message = build_invitation(assignment, assignment.exam, html_content)
+    while assignment.invitation_attempts < max_attempts:
+        assignment.invitation_attempts += 1
+        try:
+            connection.send_messages([message])
+        except Exception as exc:
+            assignment.invitation_error = str(exc)
+            logger.warning("Invitation to %s failed (attempt %d): %s",
+                           assignment.email, assignment.invitation_attempts, exc)
+            # The SMTP session may be broken; start a new one before retrying
+            connection.close()
+            if assignment.invitation_attempts < max_attempts:
+                time.sleep(retry_delay * assignment.invitation_attempts)
+                try:
+                    connection.open()
+                except Exception:
+                    logger.exception("Could not reopen the mail connection")
+            continue
+
+        assignment.invitation_status = 'sent'
+        assignment.invitation_sent_flag = True
+        assignment.invitation_sent_at = timezone.now()
+        assignment.invitation_error = ''
+        return True
+
+    assignment.invitation_status = 'failed'
+    return False
+
+
+def send_invitations(assignment_ids=None, include_sending=False):
+    """
+    Deliver pending (and retryable failed) invitations in batches. Every batch
+    reuses one mail connection; each message is retried on its own up to
+    EXAM_INVITATION_MAX_ATTEMPTS in total, and the outcome is stored on the
+    assignment. include_sending also picks up rows a crashed sender left
+    behind. Returns a {'sent': n, 'failed': n} summary.
+    """
+    batch_size = settings.EXAM_INVITATION_BATCH_SIZE
+    max_attempts = settings.EXAM_INVITATION_MAX_ATTEMPTS
+    retry_delay = settings.EXAM_INVITATION_RETRY_DELAY
+    statuses = SENDABLE_STATUSES + (('sending',) if include_sending else ())
+
+    candidates = ExamAssignment.objects.filter(
+        invitation_status__in=statuses, invitation_attempts__lt=max_attempts
+    )
+    if assignment_ids is not None:
+        candidates = candidates.filter(pk__in=list(assignment_ids))
+    pending_ids = list(candidates.order_by('pk').values_list('pk', flat=True))
+
+    summary = {'sent': 0, 'failed': 0}
+    for i in range(0, len(pending_ids), batch_size):
+        claimed = _claim(pending_ids[i:i + batch_size], statuses)
+        if not claimed:
+            continue
+
+        # A batch usually shares one exam, so only the candidate fields vary between bodies
+        bodies = render_many(INVITATION_TEMPLATE, [invitation_context(a, a.exam) for a in claimed])
+        connection = get_connection(fail_silently=False)
+        try:
+            connection.open()
+        except Exception:
+            # send_messages() will try to connect again for each message
+            logger.exception("Could not open the mail connection")
+        try:
+            for assignment, html_content in zip(claimed, bodies):
+                ok = _send_with_retry(connection, assignment, html_content, max_attempts, retry_delay)
+                summary['sent' if ok else 'failed'] += 1
+        finally:
+            connection.close()
+            ExamAssignment.objects.bulk_update(claimed, [
+                'invitation_status', 'invitation_sent_flag', 'invitation_sent_at',
+                'invitation_attempts', 'invitation_error',
+            ])
+
+    logger.info("Invitations sent: %(sent)d, failed: %(failed)d", summary)
+    return summary
+
+
+def _send_in_background(assignment_ids):
+    try:
+        send_invitations(assignment_ids)
+    except Exception:
+        logger.exception("Invitation sender crashed; run the send_invitations command to resume")
+    finally:
+        db_connection.close()
+
+
+def dispatch_invitations(assignment_ids):
+    """
+    Send the invitations of freshly created assignments once the current
+    transaction commits: on a background thread, or inline when
+    EXAM_INVITATION_ASYNC is off (handy with the locmem email backend).
+    """
+    assignment_ids = list(assignment_ids)
+    if not assignment_ids:
+        return
+
+    def start():
+        if settings.EXAM_INVITATION_ASYNC:
+            threading.Thread(
+                target=_send_in_background, args=(assignment_ids,),
+                name='exam-invitations', daemon=True,
+            ).start()
+        else:
+            send_invitations(assignment_ids)
+
+    transaction.on_commit(start)
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from candidate_enrollment.models import InternalCandidate, ExternalCandidate
+from exam_allotment.assignments import assign_candidates
+from exam_allotment.invitations import send_invitations
+from exam_allotment.models import exam_creation
+
+
+class Command(BaseCommand):
+    help = "Assign candidates to an exam in bulk and send their invitations"
+
+    def add_arguments(self, parser):
+        parser.add_argument('exam_token')
+        parser.add_argument('candidate_ids', nargs='*', help="Candidate UUIDs")
+        parser.add_argument('--from-file', help="File with one candidate UUID per line")
+        parser.add_argument('--all-internal', action='store_true', help="Assign every internal candidate")
+        parser.add_argument('--all-external', action='store_true', help="Assign every external candidate")
+        parser.add_argument('--no-invite', action='store_true',
+                            help="Only create the assignments; send later with send_invitations")
+
+    def handle(self, *args, **options):
+        exam = exam_creation.objects.filter(exam_token=options['exam_token']).first()
+        if exam is None:
+            raise CommandError(f"No exam with token {options['exam_token']}")
+
+        candidate_ids = list(options['candidate_ids'])
+        if options['from_file']:
+            with open(options['from_file']) as f:
+                candidate_ids += [line.strip() for line in f if line.strip()]
+        if options['all_internal']:
+            candidate_ids += InternalCandidate.objects.values_list('id', flat=True)
+        if options['all_external']:
+            candidate_ids += ExternalCandidate.objects.values_list('id', flat=True)
+        if not candidate_ids:
+            raise CommandError("No candidates given")
+
+        result = assign_candidates(exam, candidate_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(result.created)} assignments, "
+            f"{len(result.existing)} already assigned, {len(result.unknown)} unknown"
+        ))
+        for candidate_id in result.unknown:
+            self.stderr.write(f"Unknown candidate: {candidate_id}")
+
+        if result.created and not options['no_invite']:
+            summary = send_invitations([a.assignment_id for a in result.created])
+            self.stdout.write(f"Invitations sent: {summary['sent']}, failed: {summary['failed']}")
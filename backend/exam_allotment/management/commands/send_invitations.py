@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from exam_allotment.invitations import send_invitations
+
+
+class Command(BaseCommand):
+    help = "Send pending exam invitations and retry failed ones"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--assignment', type=int, action='append', dest='assignment_ids',
+                            help="Only this assignment (repeatable)")
+        parser.add_argument('--include-sending', action='store_true',
+                            help="Also resend invitations a crashed sender left in 'sending'")
+
+    def handle(self, *args, **options):
+        summary = send_invitations(
+            assignment_ids=options['assignment_ids'],
+            include_sending=options['include_sending'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Invitations sent: {summary['sent']}, failed: {summary['failed']}"
+        ))
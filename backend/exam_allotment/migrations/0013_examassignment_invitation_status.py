@@ -0,0 +1,40 @@
+# Generated by Django 5.2 on 2026-10-18 12:23
+
+from django.db import migrations, models
+
+
+def mark_existing_invitations_sent(apps, schema_editor):
+    # Assignments created before this migration were invited synchronously
+    ExamAssignment = apps.get_model('exam_allotment', 'ExamAssignment')
+    ExamAssignment.objects.filter(invitation_sent_flag=True).update(invitation_status='sent')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam_allotment', '0012_examassignment_duration_minutes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='examassignment',
+            name='invitation_attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='examassignment',
+            name='invitation_error',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='examassignment',
+            name='invitation_sent_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='examassignment',
+            name='invitation_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=10),
+        ),
+        migrations.RunPython(mark_existing_invitations_sent, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2 on 2026-10-18 12:24
+
+from django.db import migrations, models
+
+
+def merge_duplicate_assignments(apps, schema_editor):
+    # Re-selecting a candidate used to create a second assignment for the same
+    # exam. Keep the oldest one and move attempts and login history onto it.
+    ExamAssignment = apps.get_model('exam_allotment', 'ExamAssignment')
+    ExamAttempt = apps.get_model('exam_taker', 'ExamAttempt')
+    LoginAttempt = apps.get_model('exam_taker', 'LoginAttempt')
+
+    keepers = {}
+    duplicates = {}
+    for pk, exam_id, internal_id, external_id in ExamAssignment.objects.order_by('pk').values_list(
+        'pk', 'exam_id', 'internal_candidate_id', 'external_candidate_id'
+    ):
+        key = (exam_id, internal_id, external_id)
+        if key in keepers:
+            duplicates[pk] = keepers[key]
+        else:
+            keepers[key] = pk
+
+    for duplicate, keeper in duplicates.items():
+        ExamAttempt.objects.filter(assignment_id=duplicate).update(assignment_id=keeper)
+        LoginAttempt.objects.filter(assignment_id=duplicate).update(assignment_id=keeper)
+    ExamAssignment.objects.filter(pk__in=list(duplicates)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidate_enrollment', '0006_remove_externalcandidate_unique_id_proof'),
+        ('exam_allotment', '0013_examassignment_invitation_status'),
+        ('exam_taker', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_assignments, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='examassignment',
+            constraint=models.UniqueConstraint(fields=('exam', 'internal_candidate'), name='uniq_exam_internal_candidate'),
+        ),
+        migrations.AddConstraint(
+            model_name='examassignment',
+            constraint=models.UniqueConstraint(fields=('exam', 'external_candidate'), name='uniq_exam_external_candidate'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2 on 2026-10-18 12:26
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_duplicate_tokens(apps, schema_editor):
+    # Candidates log in by exam token, so exams sharing one can't be told apart
+    # and the constraint can't be added. Which exam keeps the token decides
+    # which candidates' invitations stop working, so leave that to an admin.
+    exam_creation = apps.get_model('exam_allotment', 'exam_creation')
+    tokens = list(
+        exam_creation.objects.values('exam_token').annotate(n=Count('id')).filter(n__gt=1)
+        .values_list('exam_token', flat=True)
+    )
+    if not tokens:
+        return
+    exams = {}
+    for exam_id, token in exam_creation.objects.filter(exam_token__in=tokens).order_by('id') \
+            .values_list('id', 'exam_token'):
+        exams.setdefault(token, []).append(exam_id)
+    details = '; '.join(f"{token!r}: exams {ids}" for token, ids in exams.items())
+    raise RuntimeError(
+        "Cannot make exam_creation.exam_token unique, these tokens are shared by several exams: "
+        f"{details}. Give each exam its own token (and update its assignments' exam_token and "
+        "exam_url, then resend their invitations) before running this migration again."
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidate_enrollment', '0006_remove_externalcandidate_unique_id_proof'),
+        ('exam_allotment', '0014_examassignment_unique_candidate'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_tokens, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='exam_creation',
+            name='exam_token',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='examassignment',
+            index=models.Index(fields=['user_id', 'exam_token'], name='exam_assign_user_token_idx'),
+        ),
+    ]
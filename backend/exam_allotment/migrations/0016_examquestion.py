@@ -0,0 +1,72 @@
+# Generated by Django 5.2 on 2026-10-18 12:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def copy_question_lists(apps, schema_editor):
+    # One ExamQuestion per id in the JSON lists, MCQs first, in list order;
+    # ids of deleted questions and repeats are dropped
+    exam_creation = apps.get_model('exam_allotment', 'exam_creation')
+    ExamQuestion = apps.get_model('exam_allotment', 'ExamQuestion')
+    MCQQuestion = apps.get_model('exam_content', 'MCQQuestion')
+    FillInTheBlankQuestion = apps.get_model('exam_content', 'FillInTheBlankQuestion')
+
+    mcq_existing = set(MCQQuestion.objects.values_list('id', flat=True))
+    fib_existing = set(FillInTheBlankQuestion.objects.values_list('id', flat=True))
+
+    rows = []
+    for exam in exam_creation.objects.only('id', 'mcq_question_ids', 'fib_question_ids').iterator():
+        seen = set()
+        position = 0
+        for question_type, ids, existing in (
+            ('MCQ', exam.mcq_question_ids or [], mcq_existing),
+            ('FIB', exam.fib_question_ids or [], fib_existing),
+        ):
+            for qid in ids:
+                try:
+                    qid = int(qid)
+                except (TypeError, ValueError):
+                    continue
+                if qid not in existing or (question_type, qid) in seen:
+                    continue
+                seen.add((question_type, qid))
+                rows.append(ExamQuestion(
+                    exam_id=exam.id, question_type=question_type, position=position,
+                    mcq_question_id=qid if question_type == 'MCQ' else None,
+                    fib_question_id=qid if question_type == 'FIB' else None,
+                ))
+                position += 1
+        if len(rows) >= 5000:
+            ExamQuestion.objects.bulk_create(rows)
+            rows = []
+    ExamQuestion.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam_allotment', '0015_exam_token_indexes'),
+        ('exam_content', '0002_question_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExamQuestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('question_type', models.CharField(choices=[('MCQ', 'Multiple choice'), ('FIB', 'Fill in the blank')], max_length=3)),
+                ('position', models.PositiveIntegerField()),
+                ('marks_override', models.PositiveIntegerField(blank=True, null=True)),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exam_questions', to='exam_allotment.exam_creation')),
+                ('fib_question', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='exam_links', to='exam_content.fillintheblankquestion')),
+                ('mcq_question', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='exam_links', to='exam_content.mcqquestion')),
+            ],
+            options={
+                'db_table': 'exam_question',
+                'ordering': ['exam', 'position'],
+                'constraints': [models.UniqueConstraint(fields=('exam', 'position'), name='uniq_exam_question_position'), models.UniqueConstraint(fields=('exam', 'mcq_question'), name='uniq_exam_mcq_question'), models.UniqueConstraint(fields=('exam', 'fib_question'), name='uniq_exam_fib_question'), models.CheckConstraint(condition=models.Q(models.Q(('fib_question__isnull', True), ('mcq_question__isnull', False), ('question_type', 'MCQ')), models.Q(('fib_question__isnull', False), ('mcq_question__isnull', True), ('question_type', 'FIB')), _connector='OR'), name='exam_question_type_matches')],
+            },
+        ),
+        migrations.RunPython(copy_question_lists, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2 on 2026-10-18 12:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam_allotment', '0016_examquestion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaperSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField()),
+                ('content_hash', models.CharField(max_length=64)),
+                ('content', models.JSONField()),
+                ('question_count', models.PositiveIntegerField()),
+                ('published_by', models.IntegerField(blank=True, null=True)),
+                ('published_at', models.DateTimeField(auto_now_add=True)),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='exam_allotment.exam_creation')),
+            ],
+            options={
+                'db_table': 'exam_paper_snapshot',
+            },
+        ),
+        migrations.AddField(
+            model_name='exam_creation',
+            name='published_snapshot',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='exam_allotment.papersnapshot'),
+        ),
+        migrations.AddConstraint(
+            model_name='papersnapshot',
+            constraint=models.UniqueConstraint(fields=('exam', 'version'), name='uniq_exam_snapshot_version'),
+        ),
+    ]
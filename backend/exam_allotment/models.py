@@ -1,6 +1,6 @@
 # backend/exam_allotment/models.py
 
-from django.db import models
+from django.db import models, transaction
 import uuid
 from django.core.exceptions import ValidationError
 from exam_content.models import MCQQuestion, FillInTheBlankQuestion
@@ -27,8 +27,11 @@ class exam_creation(models.Model):
     total_marks = models.FloatField(blank=True, null=True)
 
     exam_url = models.CharField(max_length=500)
-    exam_token = models.CharField(max_length=100)
+    exam_token = models.CharField(max_length=100, unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # The frozen paper candidates get and are graded against; null while the exam is a draft
+    published_snapshot = models.ForeignKey('PaperSnapshot', on_delete=models.SET_NULL, null=True, blank=True,
+                                           related_name='+')
 
     class Meta:
         db_table = 'exam_creation'
@@ -37,6 +40,142 @@ class exam_creation(models.Model):
         if self.number_of_questions is not None and self.marks_per_question is not None:
             self.total_marks = self.number_of_questions * self.marks_per_question
         super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'mcq_question_ids', 'fib_question_ids'} & set(update_fields):
+            self.sync_questions()
+
+    def question_ids(self, question_type):
+        """Ordered ids of the paper's MCQ or FIB questions, read from ExamQuestion."""
+        field = 'mcq_question_id' if question_type == 'MCQ' else 'fib_question_id'
+        return list(self.exam_questions.filter(question_type=question_type)
+                    .order_by('position').values_list(field, flat=True))
+
+    def set_questions(self, items):
+        """
+        Replace the paper with `items`, an ordered list of (question_type, id)
+        or (question_type, id, marks_override). Ids of missing questions and
+        repeats are dropped. The JSON id lists are kept in step for API clients.
+        """
+        wanted = {'MCQ': set(), 'FIB': set()}
+        for item in items:
+            wanted[item[0]].add(item[1])
+        existing = {
+            'MCQ': set(MCQQuestion.objects.filter(id__in=wanted['MCQ']).values_list('id', flat=True)),
+            'FIB': set(FillInTheBlankQuestion.objects.filter(id__in=wanted['FIB']).values_list('id', flat=True)),
+        }
+
+        rows, seen = [], set()
+        for item in items:
+            question_type, qid = item[0], item[1]
+            if qid not in existing[question_type] or (question_type, qid) in seen:
+                continue
+            seen.add((question_type, qid))
+            rows.append(ExamQuestion(
+                exam=self, question_type=question_type, position=len(rows),
+                mcq_question_id=qid if question_type == 'MCQ' else None,
+                fib_question_id=qid if question_type == 'FIB' else None,
+                marks_override=item[2] if len(item) > 2 else None,
+            ))
+
+        self.mcq_question_ids = [r.mcq_question_id for r in rows if r.question_type == 'MCQ']
+        self.fib_question_ids = [r.fib_question_id for r in rows if r.question_type == 'FIB']
+        with transaction.atomic():
+            self.exam_questions.all().delete()
+            ExamQuestion.objects.bulk_create(rows)
+            exam_creation.objects.filter(pk=self.pk).update(
+                mcq_question_ids=self.mcq_question_ids, fib_question_ids=self.fib_question_ids
+            )
+
+    def sync_questions(self):
+        """
+        Rewrite the ExamQuestion rows after the JSON id lists were edited
+        directly (API updates, admin). Orderings and marks overrides of
+        questions that stay on the paper are kept.
+        """
+        current = list(self.exam_questions.order_by('position').values_list(
+            'question_type', 'mcq_question_id', 'fib_question_id', 'marks_override'
+        ))
+        current_mcq = [m for t, m, f, o in current if t == 'MCQ']
+        current_fib = [f for t, m, f, o in current if t == 'FIB']
+        if current_mcq == list(self.mcq_question_ids) and current_fib == list(self.fib_question_ids):
+            return
+
+        overrides = {(t, m or f): o for t, m, f, o in current if o is not None}
+        items = [('MCQ', qid) for qid in self.mcq_question_ids] + [('FIB', qid) for qid in self.fib_question_ids]
+        self.set_questions([item + (overrides.get(item),) for item in items])
+
+
+QUESTION_TYPE_CHOICES = [
+    ('MCQ', 'Multiple choice'),
+    ('FIB', 'Fill in the blank'),
+]
+
+
+class ExamQuestion(models.Model):
+    """One question of an exam paper, in paper order."""
+    exam = models.ForeignKey(exam_creation, on_delete=models.CASCADE, related_name='exam_questions')
+    question_type = models.CharField(max_length=3, choices=QUESTION_TYPE_CHOICES)
+    mcq_question = models.ForeignKey(MCQQuestion, on_delete=models.CASCADE, null=True, blank=True,
+                                     related_name='exam_links')
+    fib_question = models.ForeignKey(FillInTheBlankQuestion, on_delete=models.CASCADE, null=True, blank=True,
+                                     related_name='exam_links')
+    position = models.PositiveIntegerField()
+    # Marks of the question on this paper; the question's own marks when null
+    marks_override = models.PositiveIntegerField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'exam_question'
+        ordering = ['exam', 'position']
+        constraints = [
+            models.UniqueConstraint(fields=['exam', 'position'], name='uniq_exam_question_position'),
+            models.UniqueConstraint(fields=['exam', 'mcq_question'], name='uniq_exam_mcq_question'),
+            models.UniqueConstraint(fields=['exam', 'fib_question'], name='uniq_exam_fib_question'),
+            models.CheckConstraint(
+                condition=(
+                    models.Q(question_type='MCQ', mcq_question__isnull=False, fib_question__isnull=True) |
+                    models.Q(question_type='FIB', fib_question__isnull=False, mcq_question__isnull=True)
+                ),
+                name='exam_question_type_matches',
+            ),
+        ]
+
+    @property
+    def question_id(self):
+        return self.mcq_question_id if self.question_type == 'MCQ' else self.fib_question_id
+
+
+class PaperSnapshot(models.Model):
+    """
+    Immutable copy of an exam paper, answer keys included, written by
+    exam_allotment.publishing.publish_exam(). content_hash identifies the
+    content, so it doubles as cache key and ETag.
+    """
+    exam = models.ForeignKey(exam_creation, on_delete=models.CASCADE, related_name='snapshots')
+    version = models.PositiveIntegerField()
+    content_hash = models.CharField(max_length=64)
+    content = models.JSONField()
+    question_count = models.PositiveIntegerField()
+    published_by = models.IntegerField(null=True, blank=True)
+    published_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'exam_paper_snapshot'
+        constraints = [
+            models.UniqueConstraint(fields=['exam', 'version'], name='uniq_exam_snapshot_version'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValueError('Paper snapshots are immutable; publish a new version instead.')
+        super().save(*args, **kwargs)
+
+
+INVITATION_STATUS_CHOICES = [
+    ('pending', 'Pending'),
+    ('sending', 'Sending'),
+    ('sent', 'Sent'),
+    ('failed', 'Failed'),
+]
 
 
 class ExamAssignment(models.Model):
@@ -61,11 +200,25 @@ class ExamAssignment(models.Model):
     exam_end_time   = models.DateTimeField(null=True, blank=True)
 
     invitation_sent_flag = models.BooleanField(default=False)
+    # Invitation delivery, tracked by exam_allotment.invitations
+    invitation_status = models.CharField(max_length=10, choices=INVITATION_STATUS_CHOICES, default='pending')
+    invitation_attempts = models.PositiveSmallIntegerField(default=0)
+    invitation_error = models.TextField(blank=True, default='')
+    invitation_sent_at = models.DateTimeField(null=True, blank=True)
     exam_token = models.CharField(max_length=100)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         db_table = 'exam_assignment'
+        constraints = [
+            # One assignment per candidate and exam; bulk assignment relies on these to skip duplicates
+            models.UniqueConstraint(fields=['exam', 'internal_candidate'], name='uniq_exam_internal_candidate'),
+            models.UniqueConstraint(fields=['exam', 'external_candidate'], name='uniq_exam_external_candidate'),
+        ]
+        indexes = [
+            # Exam login and start look assignments up by (user_id, exam_token)
+            models.Index(fields=['user_id', 'exam_token'], name='exam_assign_user_token_idx'),
+        ]
 
     def clean(self):
         if not (self.internal_candidate or self.external_candidate):
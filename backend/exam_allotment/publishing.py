@@ -0,0 +1,137 @@
+# exam_allotment/publishing.py
+
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Max
+
+from exam_taker.models import ExamAttempt
+from .models import exam_creation, ExamQuestion, PaperSnapshot
+from .token_resolver import exam_tokens
+
+
+class PublishError(ValueError):
+    """Raised when an exam's paper can't be published."""
+
+
+def paper_content(exam):
+    """
+    The full paper of an exam read from the live question bank, in paper
+    order with marks overrides applied and answer keys included.
+    """
+    questions = []
+    links = ExamQuestion.objects.filter(exam=exam).select_related('mcq_question', 'fib_question') \
+        .order_by('position')
+    for link in links:
+        q = link.mcq_question if link.question_type == 'MCQ' else link.fib_question
+        data = {
+            "id": q.id,
+            "type": link.question_type,
+            "subject": q.subject,
+            "question_text": q.question_text,
+        }
+        if link.question_type == 'MCQ':
+            data.update({"options": q.options, "answer_type": q.answer_type})
+        data.update({
+            "difficulty": q.difficulty,
+            "marks": q.marks if link.marks_override is None else link.marks_override,
+            "correct_answers": q.correct_answers,
+        })
+        questions.append(data)
+
+    return {
+        "exam_title": exam.exam_title,
+        "instructions": exam.instruction,
+        "exam_uuid": str(exam.exam_uuid),
+        "questions": questions,
+    }
+
+
+def content_hash(content):
+    canonical = json.dumps(content, cls=DjangoJSONEncoder, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def _publish_locked(exam, published_by):
+    content = paper_content(exam)
+    if not content['questions']:
+        raise PublishError("The exam has no questions to publish")
+    digest = content_hash(content)
+
+    current = exam.published_snapshot
+    if current is not None:
+        if current.content_hash == digest:
+            return current, False
+        if ExamAttempt.objects.filter(exam_id=exam.pk).exists():
+            raise PublishError("Candidates have already started this exam; its published paper can't change")
+
+    version = (exam.snapshots.aggregate(latest=Max('version'))['latest'] or 0) + 1
+    snapshot = PaperSnapshot.objects.create(
+        exam=exam, version=version, content_hash=digest, content=content,
+        question_count=len(content['questions']), published_by=published_by,
+    )
+    exam_creation.objects.filter(pk=exam.pk).update(published_snapshot=snapshot)
+    exam.published_snapshot = snapshot
+
+    # Imported here: exam_taker.paper_cache builds draft papers from paper_content()
+    from exam_taker.paper_cache import invalidate_paper
+    exam_token = exam.exam_token
+    transaction.on_commit(lambda: invalidate_paper(exam_token))
+    return snapshot, True
+
+
+def publish_exam(exam_id, published_by=None):
+    """
+    Freeze the exam's current paper into a new PaperSnapshot and make it the
+    one candidates fetch and are graded against. Publishing unchanged content
+    returns the current snapshot; changing the paper after candidates have
+    started is refused. Returns (snapshot, created).
+    """
+    with transaction.atomic():
+        exam = exam_creation.objects.select_for_update(of=('self',)) \
+            .select_related('published_snapshot').get(pk=exam_id)
+        return _publish_locked(exam, published_by)
+
+
+def _empty_paper_key(exam_token, paper_version):
+    return f"exam_empty_paper_{exam_token}_v{paper_version}"
+
+
+def ensure_published(exam_id):
+    """
+    The id of the exam's published snapshot, publishing the current paper
+    first if the exam is still a draft. Returns None for a draft without
+    questions.
+
+    Called on every exam start, so the exam row is only locked while it is
+    still unpublished, and a paper found empty is remembered until the paper
+    version moves on (see exam_taker.paper_cache).
+    """
+    # Imported here: exam_taker.paper_cache builds draft papers from paper_content()
+    from exam_taker.paper_cache import PAPER_CACHE_TIMEOUT, current_version
+
+    exam_token, snapshot_id = exam_creation.objects.filter(pk=exam_id) \
+        .values_list('exam_token', 'published_snapshot_id').get()
+    if snapshot_id is None:
+        # Read before the paper, so an edit made meanwhile leaves this key behind
+        empty_key = _empty_paper_key(exam_token, current_version(exam_token))
+        if cache.get(empty_key):
+            return None
+        with transaction.atomic():
+            exam = exam_creation.objects.select_for_update(of=('self',)) \
+                .select_related('published_snapshot').get(pk=exam_id)
+            if exam.published_snapshot is not None:
+                snapshot_id = exam.published_snapshot_id
+            else:
+                try:
+                    snapshot_id = _publish_locked(exam, None)[0].pk
+                except PublishError:
+                    cache.set(empty_key, True, timeout=PAPER_CACHE_TIMEOUT)
+                    return None
+
+    # This worker's resolver may still hold the draft; others catch up within their TTL
+    exam_tokens.invalidate(exam_token)
+    return snapshot_id
@@ -0,0 +1,216 @@
+# exam_allotment/sampling.py
+
+import random
+import threading
+import time
+from array import array
+from bisect import bisect_right
+
+from django.core.cache import cache
+
+from exam_content.models import MCQQuestion, FillInTheBlankQuestion
+from exam_content.pools import invalidate_pool, pool_version
+
+QUESTION_MODELS = {'MCQ': MCQQuestion, 'FIB': FillInTheBlankQuestion}
+DIFFICULTIES = ('Easy', 'Medium', 'Hard')
+
+POOL_CACHE_TIMEOUT = 60 * 60        # signals invalidate; this only bounds missed bulk edits
+MAX_REBALANCE_PASSES = 20
+MEMO_MAX_POOLS = 256
+
+
+class SamplingError(ValueError):
+    """Raised when a request can't be met by the question bank."""
+
+
+class Stratum:
+    """
+    IDs of one (question type, subject, difficulty) bucket, grouped by marks.
+    Sampling works on positions, so it never copies or scans the bucket's
+    ids; the pool they live in is memoized per process (see get_pool).
+    """
+
+    def __init__(self, groups):
+        self._groups = list(groups)         # (marks, array of ids)
+        self.by_marks = dict(self._groups)  # used within one difficulty, where marks are unique
+        self._offsets = []                  # start position of each group
+        total = 0
+        for _, ids in self._groups:
+            self._offsets.append(total)
+            total += len(ids)
+        self.size = total
+
+    def at(self, position):
+        """The (id, marks) at a position of the bucket."""
+        i = bisect_right(self._offsets, position) - 1
+        marks, ids = self._groups[i]
+        return ids[position - self._offsets[i]], marks
+
+    def sample(self, count):
+        """`count` distinct (id, marks) pairs, uniformly at random."""
+        return [self.at(p) for p in random.sample(range(self.size), count)]
+
+    def pick_with_marks(self, marks, exclude, tries=32):
+        """A random id with the given marks that is not in `exclude`, or None."""
+        ids = self.by_marks.get(marks)
+        if not ids:
+            return None
+        for _ in range(tries):
+            qid = ids[random.randrange(len(ids))]
+            if qid not in exclude:
+                return qid
+        # Mostly taken already: fall back to a scan of this small group
+        free = [qid for qid in ids if qid not in exclude]
+        return random.choice(free) if free else None
+
+
+def _pool_key(question_type, subject, version):
+    return f"question_pool_{question_type}_{subject}_v{version}"
+
+
+def _build_pool(question_type, subject):
+    pool = {}
+    rows = QUESTION_MODELS[question_type].objects.filter(subject=subject) \
+        .values_list('difficulty', 'marks', 'id').order_by()
+    for difficulty, marks, qid in rows.iterator(chunk_size=5000):
+        pool.setdefault(difficulty, {}).setdefault(marks, array('q')).append(qid)
+    return pool
+
+
+_memo = {}
+_memo_lock = threading.Lock()
+
+
+def get_pool(question_type, subject):
+    """
+    {difficulty: {marks: array of ids}} for one question type and subject.
+    Only ids, difficulties and marks are read. The pool is kept in process
+    and in the shared cache under the subject's pool_version, so a call only
+    reads that version counter until a question of the subject is saved or
+    deleted; the pool itself is unpickled once per process and version.
+    """
+    version = pool_version(question_type, subject)
+    with _memo_lock:
+        memo = _memo.get((question_type, subject))
+    # Expiring like the cached copy bounds staleness if the version counter is evicted
+    if memo is not None and memo[0] == version and memo[1] > time.monotonic():
+        return memo[2]
+
+    key = _pool_key(question_type, subject, version)
+    pool = cache.get(key)
+    if pool is None:
+        pool = _build_pool(question_type, subject)
+        cache.set(key, pool, timeout=POOL_CACHE_TIMEOUT)
+    with _memo_lock:
+        if len(_memo) >= MEMO_MAX_POOLS:
+            _memo.clear()
+        _memo[(question_type, subject)] = (version, time.monotonic() + POOL_CACHE_TIMEOUT, pool)
+    return pool
+
+
+def _strata(question_type, subject):
+    return {d: Stratum(groups.items()) for d, groups in get_pool(question_type, subject).items()}
+
+
+def sample_ids(question_type, subject, count):
+    """Up to `count` random question ids of a subject, any difficulty."""
+    stratum = Stratum(
+        group for groups in get_pool(question_type, subject).values() for group in groups.items()
+    )
+    return [qid for qid, _ in stratum.sample(min(count, stratum.size))]
+
+
+def rebalance_marks(picked, strata, target):
+    """
+    Swap picked questions for others of the same group but different marks
+    until the total equals `target`. `picked` is a list of (group, id, marks)
+    where strata[group] is the group's Stratum and group[0] its question type.
+    Each pass is O(picked x distinct marks values). Returns the reached total.
+    """
+    total = sum(marks for _, _, marks in picked)
+    taken = {}
+    for group, qid, _ in picked:
+        taken.setdefault(group[0], set()).add(qid)
+
+    for _ in range(MAX_REBALANCE_PASSES):
+        if total == target:
+            break
+        improved = False
+        for i in random.sample(range(len(picked)), len(picked)):
+            gap = target - total
+            if gap == 0:
+                break
+            group, qid, marks = picked[i]
+            stratum = strata[group]
+            # Marks values that move the total closer to the target, best first
+            options = sorted(
+                (m for m in stratum.by_marks if m != marks and abs(gap - (m - marks)) < abs(gap)),
+                key=lambda m: abs(gap - (m - marks)),
+            )
+            for new_marks in options:
+                new_qid = stratum.pick_with_marks(new_marks, taken[group[0]])
+                if new_qid is None:
+                    continue
+                taken[group[0]].discard(qid)
+                taken[group[0]].add(new_qid)
+                picked[i] = (group, new_qid, new_marks)
+                total += new_marks - marks
+                improved = True
+                break
+        if not improved:
+            break
+    return total
+
+
+def sample_stratified(subject, spec, total_marks=None):
+    """
+    Sample a paper by question type and difficulty, e.g.
+    spec = {'MCQ': {'Easy': 10, 'Medium': 5, 'Hard': 5}, 'FIB': {'Easy': 2}},
+    optionally hitting an exact total of marks.
+
+    Works on memoized id pools only, so the cost is O(sample size) whatever the
+    size of the bank. Returns {'MCQ': [ids], 'FIB': [ids], 'total_marks': n};
+    raises SamplingError when the bank can't satisfy the request.
+    """
+    strata = {}
+    picked = []                     # ((type, difficulty), id, marks)
+    for question_type, counts in spec.items():
+        by_difficulty = _strata(question_type, subject)
+        for difficulty, count in counts.items():
+            if count <= 0:
+                continue
+            stratum = by_difficulty.get(difficulty)
+            available = stratum.size if stratum else 0
+            if available < count:
+                raise SamplingError(
+                    f"Only {available} {difficulty} {question_type} questions available in {subject}, {count} requested"
+                )
+            group = (question_type, difficulty)
+            strata[group] = stratum
+            picked += [(group, qid, marks) for qid, marks in stratum.sample(count)]
+
+    total = sum(marks for _, _, marks in picked)
+    if total_marks is not None and total != total_marks:
+        total = rebalance_marks(picked, strata, total_marks)
+        if total != total_marks:
+            raise SamplingError(
+                f"Cannot reach {total_marks} total marks with this mix; closest found is {total}"
+            )
+
+    result = {question_type: [] for question_type in spec}
+    for (question_type, _), qid, _ in picked:
+        result[question_type].append(qid)
+    result['total_marks'] = total
+    return result
+
+
+def fetch_in_order(question_type, subject, ids):
+    """
+    Load the sampled rows, keeping the sampled order. Returns None if any id
+    is gone or moved subject (a stale pool), after invalidating the pool.
+    """
+    rows = QUESTION_MODELS[question_type].objects.filter(id__in=ids, subject=subject).in_bulk()
+    if len(rows) != len(set(ids)):
+        invalidate_pool(question_type, subject)
+        return None
+    return [rows[qid] for qid in ids]
@@ -10,7 +10,7 @@ class ExamCreationSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = [
             'id','exam_url','exam_token','created_at',
-            'exam_uuid','total_marks'
+            'exam_uuid','total_marks','published_snapshot'
         ]
 
 
@@ -0,0 +1,50 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from exam_content.models import MCQQuestion
+
+from exam_allotment.blueprint import BlueprintError, generate_papers, parse_blueprint
+
+
+class BlueprintTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.marks = {}
+        for i, (difficulty, marks) in enumerate([('Easy', 1)] * 6 + [('Hard', 3)] * 4):
+            question = MCQQuestion.objects.create(
+                subject='Optics', question_text=f'Q{i}', options=['a', 'b'], answer_type='Single',
+                correct_answers=['a'], difficulty=difficulty, marks=marks,
+            )
+            self.marks[question.id] = marks
+
+    def sections(self, **spec):
+        return parse_blueprint({'sections': [{'type': 'MCQ', 'subject': 'Optics', **spec}]})[0]
+
+    def test_papers_are_distinct(self):
+        papers = generate_papers(self.sections(difficulty='Easy', count=3), papers=10)
+        self.assertEqual(len({frozenset(p['mcq_question_ids']) for p in papers}), 10)
+        for paper in papers:
+            self.assertEqual(len(set(paper['mcq_question_ids'])), 3)
+            self.assertEqual({self.marks[qid] for qid in paper['mcq_question_ids']}, {1})
+
+    def test_marks_target_is_met(self):
+        for paper in generate_papers(self.sections(count=4), total_marks=8, papers=10):
+            self.assertEqual(paper['total_marks'], 8)
+            self.assertEqual(sum(self.marks[qid] for qid in paper['mcq_question_ids']), 8)
+
+    def test_bank_that_cannot_satisfy_the_blueprint(self):
+        with self.assertRaisesMessage(BlueprintError, 'only 4 matching MCQ questions, 5 requested'):
+            generate_papers(self.sections(difficulty='Hard', count=5))
+        with self.assertRaisesMessage(BlueprintError, 'at most 4 distinct papers'):
+            generate_papers(self.sections(difficulty='Hard', count=3), papers=5)
+        # Four questions worth 1 or 3 can't add up to an odd total
+        with self.assertRaisesMessage(BlueprintError, 'Cannot reach 7 total marks'):
+            generate_papers(self.sections(count=4), total_marks=7)
+
+    def test_endpoint_generates_one_paper(self):
+        response = APIClient().post('/api/exam_allotment/blueprint/generate/', {
+            'sections': [{'type': 'MCQ', 'subject': 'Optics', 'count': 2}], 'total_marks': 4,
+        }, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['paper']['total_marks'], 4)
@@ -0,0 +1,81 @@
+# exam_allotment/token_resolver.py
+
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+from django.conf import settings
+
+from .models import exam_creation
+
+
+class ExamRef(NamedTuple):
+    exam_id: int
+    exam_start_time: object
+    exam_end_time: object
+    snapshot_id: object     # published PaperSnapshot, None for a draft
+    content_hash: object
+    paper_version: int      # exam_taker.paper_cache version when resolved
+
+
+class ExamTokenResolver:
+    """
+    Per-process LRU of exam token -> ExamRef with a short TTL.
+
+    Exam-taker requests resolve the same handful of tokens thousands of times
+    during an exam, so they skip the exam_creation fetch and the shared-cache
+    paper version read. invalidate() drops an entry in this process (it is
+    called by invalidate_paper()); other processes catch up within `ttl` seconds.
+    Unknown tokens are not cached.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()      # token -> (expires_at, ExamRef)
+        self._lock = threading.Lock()
+
+    def resolve(self, exam_token):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(exam_token)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(exam_token)
+                return entry[1]
+
+        ref = self._load(exam_token)
+        if ref is None:
+            return None
+
+        with self._lock:
+            self._entries[exam_token] = (now + self.ttl, ref)
+            self._entries.move_to_end(exam_token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return ref
+
+    def _load(self, exam_token):
+        # Imported here: exam_taker.paper_cache invalidates this resolver
+        from exam_taker.paper_cache import current_version
+
+        row = exam_creation.objects.filter(exam_token=exam_token).values_list(
+            'id', 'exam_start_time', 'exam_end_time', 'published_snapshot_id', 'published_snapshot__content_hash'
+        ).first()
+        if row is None:
+            return None
+        return ExamRef(*row, paper_version=current_version(exam_token))
+
+    def invalidate(self, exam_token):
+        with self._lock:
+            self._entries.pop(exam_token, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+exam_tokens = ExamTokenResolver(
+    max_size=getattr(settings, 'EXAM_TOKEN_CACHE_SIZE', 1024),
+    ttl=getattr(settings, 'EXAM_TOKEN_CACHE_TTL', 30),
+)
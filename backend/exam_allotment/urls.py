@@ -7,6 +7,8 @@ from .views import (
     ExamDetailView,
     CandidateExamAssignmentViewSet,
     CandidateSelectionView,  # Import the new view
+    InvitationStatusView,
+    BlueprintGenerateView,
 )
 
 router = DefaultRouter()
@@ -17,8 +19,10 @@ urlpatterns = [
     path('', include(router.urls)),
     path('subjects/', SubjectListView.as_view(), name='subject-list'),
     path('random-questions/', RandomQuestionsView.as_view(), name='random-questions'),
+    path('blueprint/generate/', BlueprintGenerateView.as_view(), name='blueprint-generate'),
     path('exams/<str:token>/questions/', ExamDetailView.as_view(), name='exam-detail'),
     
     # Add the new URL for selecting candidates and sending emails
     path('select-candidates/', CandidateSelectionView.as_view(), name='select-candidates'),
+    path('select-candidates/status/', InvitationStatusView.as_view(), name='invitation-status'),
 ]
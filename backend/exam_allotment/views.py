@@ -1,5 +1,5 @@
-import random
 import secrets
+import time
 import string
 from django.shortcuts import get_object_or_404
 from django.conf import settings
@@ -8,36 +8,49 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from django.core.mail import send_mail
 from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
 from django.utils import timezone
 import pytz
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
-from .models import exam_creation, ExamAssignment
+from .models import exam_creation, ExamAssignment, INVITATION_STATUS_CHOICES
+from .assignments import assign_candidates
+from .invitations import dispatch_invitations
+from .publishing import PublishError, publish_exam
+from .blueprint import BlueprintError, parse_blueprint, generate_papers
+from .sampling import DIFFICULTIES, SamplingError, sample_ids, sample_stratified, fetch_in_order
 from .serializers import (
     ExamCreationSerializer,
     CandidateExamAssignmentSerializer,
     ExamDetailSerializer,
 )
 from exam_content.models import MCQQuestion, FillInTheBlankQuestion
+from exam_content.catalog import get_catalog
 from exam_content.serializers import MCQQuestionSerializer, FillBlankQuestionSerializer
 from candidate_enrollment.models import InternalCandidate, ExternalCandidate
 from django.utils import timezone
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from exam_taker.paper_cache import invalidate_paper
 
 
 # ----- Dynamic Subject & Question Endpoints -----
 
 class SubjectListView(APIView):
-    """ GET /api/exam_allotment/subjects/ """
+    """ GET /api/exam_allotment/subjects/[?counts=true] """
     def get(self, request):
-        mcq_subs = MCQQuestion.objects.values_list('subject', flat=True).distinct()
-        fib_subs = FillInTheBlankQuestion.objects.values_list('subject', flat=True).distinct()
-        subjects = list(set(mcq_subs) | set(fib_subs))
-        return Response(subjects)
+        # Served from the cached subject catalog; counts adds per-difficulty question counts
+        catalog = get_catalog()
+        if request.query_params.get('counts', '').lower() == 'true':
+            return Response(catalog)
+        return Response([entry['name'] for entry in catalog])
 
 
 class RandomQuestionsView(APIView):
-    """ GET /api/exam_allotment/random-questions/?subject=SUBJ&mcq_count=N&fib_count=M """
+    """
+    GET  /api/exam_allotment/random-questions/?subject=SUBJ&mcq_count=N&fib_count=M
+    POST /api/exam_allotment/random-questions/
+         {"subject": SUBJ, "mcq": {"Easy": 10, "Medium": 5, "Hard": 5}, "fib": {...}, "total_marks": 50}
+    """
     def get(self, request):
         subject = request.query_params.get('subject')
         mcq_count = int(request.query_params.get('mcq_count') or 0)
@@ -46,17 +59,81 @@ class RandomQuestionsView(APIView):
         if not subject or (mcq_count <= 0 and fib_count <= 0):
             return Response({"error": "Provide subject and counts > 0"}, status=status.HTTP_400_BAD_REQUEST)
 
-        mcqs = list(MCQQuestion.objects.filter(subject=subject))
-        fibs = list(FillInTheBlankQuestion.objects.filter(subject=subject))
-
-        mcq_sample = random.sample(mcqs, min(mcq_count, len(mcqs)))
-        fib_sample = random.sample(fibs, min(fib_count, len(fibs)))
+        # Sample ids from the cached pools, then fetch only the chosen rows
+        for _ in range(2):
+            mcq_sample = fetch_in_order('MCQ', subject, sample_ids('MCQ', subject, mcq_count))
+            fib_sample = fetch_in_order('FIB', subject, sample_ids('FIB', subject, fib_count))
+            if mcq_sample is not None and fib_sample is not None:
+                break
+        else:
+            return Response({"error": "Question bank changed, please retry"}, status=status.HTTP_409_CONFLICT)
 
         return Response({
             'mcq': MCQQuestionSerializer(mcq_sample, many=True).data,
             'fib': FillBlankQuestionSerializer(fib_sample, many=True).data
         })
 
+    def post(self, request):
+        subject = request.data.get('subject')
+        total_marks = request.data.get('total_marks')
+
+        spec = {}
+        try:
+            for question_type, key in (('MCQ', 'mcq'), ('FIB', 'fib')):
+                counts = request.data.get(key) or {}
+                unknown = set(counts) - set(DIFFICULTIES)
+                if unknown:
+                    return Response({"error": f"Unknown difficulty: {sorted(unknown)}"},
+                                    status=status.HTTP_400_BAD_REQUEST)
+                spec[question_type] = {d: int(n) for d, n in counts.items()}
+            if total_marks is not None:
+                total_marks = int(total_marks)
+        except (TypeError, ValueError, AttributeError):
+            return Response({"error": "Counts and total_marks must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not subject or not any(n > 0 for counts in spec.values() for n in counts.values()):
+            return Response({"error": "Provide subject and counts > 0"}, status=status.HTTP_400_BAD_REQUEST)
+
+        for _ in range(2):
+            try:
+                sample = sample_stratified(subject, spec, total_marks)
+            except SamplingError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            mcq_sample = fetch_in_order('MCQ', subject, sample['MCQ'])
+            fib_sample = fetch_in_order('FIB', subject, sample['FIB'])
+            if mcq_sample is not None and fib_sample is not None:
+                break
+        else:
+            return Response({"error": "Question bank changed, please retry"}, status=status.HTTP_409_CONFLICT)
+
+        return Response({
+            'mcq': MCQQuestionSerializer(mcq_sample, many=True).data,
+            'fib': FillBlankQuestionSerializer(fib_sample, many=True).data,
+            'total_marks': sample['total_marks']
+        })
+
+
+class BlueprintGenerateView(APIView):
+    """
+    POST /api/exam_allotment/blueprint/generate/
+         {"sections": [{"type": "MCQ", "subject": SUBJ, "difficulty": "Easy", "answer_type": "Single",
+                        "marks": 2, "count": 10}, ...], "total_marks": 50}
+    Generates one paper for the author to post to the exam creation API. An
+    exam holds a single paper, so parallel papers per candidate aren't offered.
+    """
+    def post(self, request):
+        try:
+            sections, total_marks = parse_blueprint(request.data)
+            started = time.monotonic()
+            paper = generate_papers(sections, total_marks)[0]
+        except BlueprintError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "paper": paper,
+            "elapsed_seconds": round(time.monotonic() - started, 3)
+        })
+
 
 # ----- Exam Creation & Detail -----
 
@@ -79,6 +156,10 @@ class ExamCreationViewSet(viewsets.ModelViewSet):
         if missing:
             return Response({"error": f"Missing fields: {missing}"}, status=status.HTTP_400_BAD_REQUEST)
 
+        # Optional explicit paper order and marks overrides:
+        # [{"type": "MCQ", "id": 5, "marks_override": 2}, ...]
+        questions = self.parse_questions(data['questions']) if data.get('questions') else None
+
         token = self.generate_exam_token()
         exam = exam_creation.objects.create(
             exam_title=data['exam_title'],
@@ -93,8 +174,56 @@ class ExamCreationViewSet(viewsets.ModelViewSet):
             exam_token=token,
             exam_url=f"http://localhost:5173/login/{token}"
         )
+        if questions is not None:
+            exam.set_questions(questions)
         return Response(ExamCreationSerializer(exam).data, status=status.HTTP_201_CREATED)
  
+    def parse_questions(self, questions):
+        try:
+            return [
+                (str(q['type']).upper(), int(q['id']),
+                 None if q.get('marks_override') is None else int(q['marks_override']))
+                for q in questions if str(q['type']).upper() in ('MCQ', 'FIB')
+            ]
+        except (KeyError, TypeError, ValueError, AttributeError):
+            raise ValidationError({"questions": "Each question needs a type (MCQ or FIB), an id and an optional marks_override"})
+
+    def perform_update(self, serializer):
+        questions = self.request.data.get('questions')
+        questions = self.parse_questions(questions) if questions else None
+        exam = serializer.save()
+        if questions is not None:
+            exam.set_questions(questions)
+        invalidate_paper(exam.exam_token)
+
+    def perform_destroy(self, instance):
+        invalidate_paper(instance.exam_token)
+        instance.delete()
+
+    @action(detail=True, methods=['post'])
+    def publish(self, request, pk=None):
+        """ POST /api/exam_allotment/exams/{id}/publish/ freezes the current paper """
+        exam = self.get_object()
+        try:
+            published_by = request.data.get('published_by')
+            published_by = int(published_by) if published_by else None
+        except (TypeError, ValueError):
+            return Response({"error": "published_by must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            snapshot, created = publish_exam(exam.pk, published_by=published_by)
+        except PublishError as e:
+            return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
+
+        return Response({
+            "snapshot_id": snapshot.pk,
+            "version": snapshot.version,
+            "content_hash": snapshot.content_hash,
+            "question_count": snapshot.question_count,
+            "published_at": snapshot.published_at,
+            "created": created,
+        }, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
     @action(detail=False, methods=['get'])
     def get_by_token(self, request):
         token = request.query_params.get('token')
@@ -118,8 +247,9 @@ class ExamDetailView(APIView):
     """ GET /api/exam_allotment/exams/{token}/questions/ """
     def get(self, request, token):
         exam = get_object_or_404(exam_creation, exam_token=token)
-        mcq_qs = MCQQuestion.objects.filter(id__in=exam.mcq_question_ids)
-        fib_qs = FillInTheBlankQuestion.objects.filter(id__in=exam.fib_question_ids)
+        # Paper order, joined through ExamQuestion
+        mcq_qs = MCQQuestion.objects.filter(exam_links__exam=exam).order_by('exam_links__position')
+        fib_qs = FillInTheBlankQuestion.objects.filter(exam_links__exam=exam).order_by('exam_links__position')
         return Response(ExamDetailSerializer({'exam': exam, 'mcq': mcq_qs, 'fib': fib_qs}).data)
 
 
@@ -134,22 +264,13 @@ class CandidateSelectionView(APIView):
     """ GET lists candidates; POST sends emails and stores assignments """
 
     def get(self, request):
-        internal = InternalCandidate.objects.all()
-        external = ExternalCandidate.objects.all()
-
-        def serialize(c, kind):
-            d = {
-                'id': str(c.id), 'user_id': c.user_id,
-                'first_name': c.first_name, 'last_name': c.last_name,
-                'email': c.email, 'type': kind
-            }
-            if kind == 'internal':
-                d.update({'employee_id': c.employee_id, 'designation': c.designation})
-            else:
-                d.update({'dob': c.dob, 'city': c.city})
-            return d
-
-        data = [serialize(c, 'internal') for c in internal] + [serialize(c, 'external') for c in external]
+        # Unpaginated list kept for the existing page; large banks should use /api/candidate/picker/
+        common = ('id', 'user_id', 'first_name', 'last_name', 'email')
+        internal = InternalCandidate.objects.values(*common, 'employee_id', 'designation')
+        external = ExternalCandidate.objects.values(*common, 'dob', 'city')
+
+        data = [dict(c, id=str(c['id']), type='internal') for c in internal] + \
+               [dict(c, id=str(c['id']), type='external') for c in external]
         return Response(data)
 
     def post(self, request):
@@ -162,78 +283,19 @@ class CandidateSelectionView(APIView):
             return Response({"error": "No candidates selected"}, status=status.HTTP_400_BAD_REQUEST)
 
         exam = get_object_or_404(exam_creation, exam_token=exam_token)
-        exam_location = exam.location or ""
-
-        interns = InternalCandidate.objects.filter(id__in=selected)
-        externs = ExternalCandidate.objects.filter(id__in=selected)
-
-        assignments = []
-
-        for c in list(interns) + list(externs):
-            # Build email context
-            subj = f"Your Invitation: {exam.exam_title}"
-            to_email = c.email
-            from_email = settings.EMAIL_HOST_USER
-
-            context = {
-                "first_name": c.first_name,
-                "last_name": c.last_name,
-                "user_id": c.user_id,
-                "exam_title": exam.exam_title,
-                "start_time": exam.exam_start_time,
-                "end_time": exam.exam_end_time,
-                "location": exam_location,
-                "exam_url": exam.exam_url,
-                "logo_url": "https://res.cloudinary.com/dwybblnpz/image/upload/ChatGPT_Image_May_14_2025_02_21_41_PM_ovhtkx_c_crop_w_810_h_389_x_0_y_0_szcgmn.png",
-            }
-
-            # Render HTML and text
-            html_content = render_to_string("emails/exam_invitation.html", context)
-            text_content = (
-                f"Dear {c.first_name} {c.last_name},\n\n"
-                f"You are invited to the recruitment exam “{exam.exam_title}”.\n\n"
-                f"User ID: {c.user_id}\n"
-                f"Your password was sent in your registration email.\n\n"
-                f"Start Time: {exam.exam_start_time}\n"
-                f"End Time:   {exam.exam_end_time}\n"
-                f"Examination Center: {exam_location}\n\n"
-                f"To begin your exam, open this link:\n{exam.exam_url}\n\n"
-                "Good luck!\nRecruitment Team"
-            )
-
-            # Send email
-            msg = EmailMultiAlternatives(subj, text_content, from_email, [to_email])
-            msg.attach_alternative(html_content, "text/html")
-            msg.send(fail_silently=False)
-
-            duration_minutes = int((exam.exam_end_time - exam.exam_start_time).total_seconds() / 60)
-
-            # Create assignment record
-            assignment = ExamAssignment(
-                exam_token=exam.exam_token,
-                url_link=exam.exam_url,
-                invitation_sent_flag=True,
-                location=exam_location,
-                exam_start_time=exam.exam_start_time,
-                exam_end_time=exam.exam_end_time,
-                duration_minutes=duration_minutes,
-                user_id=c.user_id,
-                first_name=c.first_name,
-                last_name=c.last_name,
-                email=c.email,
-                password=c.password,
-            )
-            if isinstance(c, InternalCandidate):
-                assignment.internal_candidate = c
-            else:
-                assignment.external_candidate = c
-
-            assignment.save()
-            assignments.append(assignment)
+
+        # Store every assignment first, then send the emails outside the request
+        with transaction.atomic():
+            result = assign_candidates(exam, selected)
+            dispatch_invitations(a.assignment_id for a in result.created)
+
+        if not result.created and not result.existing:
+            return Response({"error": "No matching candidates found", "unknown": result.unknown},
+                            status=status.HTTP_400_BAD_REQUEST)
 
         # Return summary response
         return Response({
-            "message": "Emails sent and assignments created successfully.",
+            "message": "Assignments created; invitations are being sent.",
             "assignments": [
                 {
                     "assignment_id": a.assignment_id,
@@ -241,6 +303,30 @@ class CandidateSelectionView(APIView):
                     "url_link":      a.url_link,
                     "exam_start_time": a.exam_start_time,
                     "exam_end_time":   a.exam_end_time,
-                } for a in assignments
-            ]
-        }, status=status.HTTP_200_OK)
+                    "invitation_status": a.invitation_status,
+                } for a in result.created
+            ],
+            "already_assigned": result.existing,
+            "unknown": result.unknown,
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+class InvitationStatusView(APIView):
+    """ GET /api/exam_allotment/select-candidates/status/?exam_token=... """
+
+    def get(self, request):
+        exam_token = request.query_params.get('exam_token')
+        if not exam_token:
+            return Response({"error": "Exam token required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        exam = get_object_or_404(exam_creation, exam_token=exam_token)
+        assignments = ExamAssignment.objects.filter(exam=exam)
+
+        counts = {key: 0 for key, _ in INVITATION_STATUS_CHOICES}
+        for row in assignments.values('invitation_status').annotate(n=Count('pk')):
+            counts[row['invitation_status']] = row['n']
+
+        failed = assignments.filter(invitation_status='failed').values(
+            'assignment_id', 'user_id', 'email', 'invitation_attempts', 'invitation_error'
+        )
+        return Response({"exam_token": exam_token, "counts": counts, "failed": list(failed)})
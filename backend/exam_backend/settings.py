@@ -51,6 +51,7 @@ INSTALLED_APPS = [
     'exam_evaluation',
     'corsheaders',
     'Dashboard_module',
+    'notifications',
 ]
 
 MIDDLEWARE = [
@@ -161,6 +162,8 @@ EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 EMAIL_HOST = "smtp.gmail.com"
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
+# Seconds an SMTP call may block; keep it well below EMAIL_OUTBOX_LEASE
+EMAIL_TIMEOUT = int(os.environ.get('EMAIL_TIMEOUT', 20))
 
 # Use environment variables for email in production
 if DEBUG:
@@ -171,21 +174,49 @@ else:
     EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', 'keop ykgd elfu qdci')
 
 # Cache configuration
-if DEBUG:
-    # Use local memory caching for development
-    CACHES = {
-        'default': {
-            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-            'LOCATION': 'unique-snowflake',
-        }
-    }
-else:
-    # Use dummy cache for production (you can upgrade to Redis later)
-    CACHES = {
-        'default': {
-            'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
-        }
+# OTPs, paper and catalog caches and their version counters must be shared by
+# every gunicorn worker, so the default cache is a SQLite file on this host
+# (see exam_backend.cache_backends); point CACHE_LOCATION at a local disk.
+CACHES = {
+    'default': {
+        'BACKEND': 'exam_backend.cache_backends.SQLiteCache',
+        'LOCATION': os.environ.get('CACHE_LOCATION', str(BASE_DIR / 'cache.sqlite3')),
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 50000)),
+        },
     }
+}
+
+# Email outbox: views queue mail in their transaction; the run_outbox command delivers it
+EMAIL_OUTBOX_BATCH_SIZE = int(os.environ.get('EMAIL_OUTBOX_BATCH_SIZE', 100))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.environ.get('EMAIL_OUTBOX_MAX_ATTEMPTS', 5))
+EMAIL_OUTBOX_RETRY_DELAY = int(os.environ.get('EMAIL_OUTBOX_RETRY_DELAY', 30))  # seconds, doubles per attempt
+EMAIL_OUTBOX_POLL_INTERVAL = float(os.environ.get('EMAIL_OUTBOX_POLL_INTERVAL', 2))  # seconds
+EMAIL_OUTBOX_LEASE = int(os.environ.get('EMAIL_OUTBOX_LEASE', 300))  # seconds before a crashed worker's batch is retried
+
+# Exam taker autosave: answers are buffered per worker and written in batches
+EXAM_AUTOSAVE_BATCH_SIZE = int(os.environ.get('EXAM_AUTOSAVE_BATCH_SIZE', 500))
+# Also the most acknowledged autosave a killed worker can lose
+EXAM_AUTOSAVE_FLUSH_INTERVAL = int(os.environ.get('EXAM_AUTOSAVE_FLUSH_INTERVAL', 5))  # seconds
+
+# Exam login admission control: bounded password hashing pool per worker process
+EXAM_LOGIN_HASH_WORKERS = int(os.environ.get('EXAM_LOGIN_HASH_WORKERS', 0)) or None  # None = CPU count
+EXAM_LOGIN_QUEUE_SIZE = int(os.environ.get('EXAM_LOGIN_QUEUE_SIZE', 32))
+EXAM_LOGIN_QUEUE_TIMEOUT = int(os.environ.get('EXAM_LOGIN_QUEUE_TIMEOUT', 10))  # seconds
+
+# Exam invitations: sent after the assignments are stored, one mail connection per batch
+EXAM_INVITATION_ASYNC = os.environ.get('EXAM_INVITATION_ASYNC', 'True').lower() == 'true'
+EXAM_INVITATION_BATCH_SIZE = int(os.environ.get('EXAM_INVITATION_BATCH_SIZE', 100))
+EXAM_INVITATION_MAX_ATTEMPTS = int(os.environ.get('EXAM_INVITATION_MAX_ATTEMPTS', 3))
+EXAM_INVITATION_RETRY_DELAY = int(os.environ.get('EXAM_INVITATION_RETRY_DELAY', 2))  # seconds, grows per attempt
+
+# Exam token resolver: per-process LRU of token -> exam id, window and paper version
+EXAM_TOKEN_CACHE_SIZE = int(os.environ.get('EXAM_TOKEN_CACHE_SIZE', 1024))
+EXAM_TOKEN_CACHE_TTL = int(os.environ.get('EXAM_TOKEN_CACHE_TTL', 30))  # seconds other workers may lag an edit
+
+# Candidate user_ids: each process reserves this many ids at a time from the allocator
+CANDIDATE_USER_ID_BLOCK_SIZE = int(os.environ.get('CANDIDATE_USER_ID_BLOCK_SIZE', 50))
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
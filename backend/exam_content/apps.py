@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ExamContentConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'exam_content'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,89 @@
+# exam_content/catalog.py
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F
+
+from .models import MCQQuestion, FillInTheBlankQuestion, Subject
+
+QUESTION_MODELS = {'MCQ': MCQQuestion, 'FIB': FillInTheBlankQuestion}
+DIFFICULTIES = ('Easy', 'Medium', 'Hard')
+
+CATALOG_CACHE_KEY = 'subject_catalog'
+CATALOG_CACHE_TIMEOUT = 60 * 60     # signals invalidate; this only bounds missed bulk edits
+
+
+def count_field(question_type, difficulty):
+    """The Subject column counting questions of a type and difficulty, or None."""
+    if difficulty not in DIFFICULTIES:
+        return None
+    return f"{question_type.lower()}_{difficulty.lower()}"
+
+
+def adjust_count(question_type, subject, difficulty, delta):
+    """Move one subject's count by `delta` with an atomic UPDATE; called from the question signals."""
+    field = count_field(question_type, difficulty)
+    if field is None or not subject:
+        return
+    if delta > 0:
+        Subject.objects.get_or_create(name=subject)
+        Subject.objects.filter(name=subject).update(**{field: F(field) + delta})
+    else:
+        # Never below zero, even if the catalog missed a bulk insert
+        Subject.objects.filter(name=subject, **{f"{field}__gte": -delta}).update(**{field: F(field) + delta})
+    invalidate_catalog()
+
+
+def rebuild_catalog():
+    """
+    Recount every subject from the question tables, e.g. after bulk imports
+    that bypass the signals. Returns the number of subjects.
+    """
+    counts = {}
+    for question_type, model in QUESTION_MODELS.items():
+        rows = model.objects.values('subject', 'difficulty').annotate(n=Count('id')).order_by()
+        for row in rows:
+            field = count_field(question_type, row['difficulty'])
+            if field is not None:
+                counts.setdefault(row['subject'], {})[field] = row['n']
+
+    with transaction.atomic():
+        Subject.objects.all().delete()
+        Subject.objects.bulk_create([Subject(name=name, **fields) for name, fields in counts.items()])
+    invalidate_catalog()
+    return len(counts)
+
+
+def _entry(subject):
+    mcq = {d: getattr(subject, count_field('MCQ', d)) for d in DIFFICULTIES}
+    fib = {d: getattr(subject, count_field('FIB', d)) for d in DIFFICULTIES}
+    return {
+        'name': subject.name,
+        'mcq': mcq,
+        'fib': fib,
+        'total': sum(mcq.values()) + sum(fib.values()),
+    }
+
+
+def get_catalog():
+    """
+    Subjects that have questions, sorted by name, as
+    {'name', 'mcq': {difficulty: n}, 'fib': {difficulty: n}, 'total'} dicts.
+    Read from the cache; a miss costs one scan of the small Subject table.
+    """
+    catalog = cache.get(CATALOG_CACHE_KEY)
+    if catalog is None:
+        catalog = [entry for entry in map(_entry, Subject.objects.order_by('name')) if entry['total']]
+        cache.set(CATALOG_CACHE_KEY, catalog, timeout=CATALOG_CACHE_TIMEOUT)
+    return catalog
+
+
+def matching_subjects(term):
+    """Catalog subjects whose name contains `term`, ignoring case."""
+    term = term.casefold()
+    return [entry['name'] for entry in get_catalog() if term in entry['name'].casefold()]
+
+
+def invalidate_catalog():
+    # After commit, so no worker refills the cache from rows still being written
+    transaction.on_commit(lambda: cache.delete(CATALOG_CACHE_KEY))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from exam_content.catalog import rebuild_catalog
+
+
+class Command(BaseCommand):
+    help = "Recount the subject catalog from the question tables (after bulk imports)"
+
+    def handle(self, *args, **options):
+        count = rebuild_catalog()
+        self.stdout.write(self.style.SUCCESS(f"Subject catalog rebuilt: {count} subjects"))
@@ -0,0 +1,54 @@
+# Generated by Django 5.2 on 2026-10-18 12:36
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_subjects(apps, schema_editor):
+    Subject = apps.get_model('exam_content', 'Subject')
+    counts = {}
+    for prefix, model_name in (('mcq', 'MCQQuestion'), ('fib', 'FillInTheBlankQuestion')):
+        model = apps.get_model('exam_content', model_name)
+        for row in model.objects.values('subject', 'difficulty').annotate(n=Count('id')).order_by():
+            if row['difficulty'] in ('Easy', 'Medium', 'Hard'):
+                counts.setdefault(row['subject'], {})[f"{prefix}_{row['difficulty'].lower()}"] = row['n']
+    Subject.objects.bulk_create([Subject(name=name, **fields) for name, fields in counts.items()])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam_content', '0002_question_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Subject',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('mcq_easy', models.PositiveIntegerField(default=0)),
+                ('mcq_medium', models.PositiveIntegerField(default=0)),
+                ('mcq_hard', models.PositiveIntegerField(default=0)),
+                ('fib_easy', models.PositiveIntegerField(default=0)),
+                ('fib_medium', models.PositiveIntegerField(default=0)),
+                ('fib_hard', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'question_subject',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='fillintheblankquestion',
+            name='subject',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='mcqquestion',
+            name='subject',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+        migrations.RunPython(count_subjects, migrations.RunPython.noop),
+    ]
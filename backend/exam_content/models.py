@@ -15,7 +15,7 @@ class MCQQuestion(models.Model):
     ]
 
     id = models.AutoField(primary_key=True)
-    subject = models.CharField(max_length=100)
+    subject = models.CharField(max_length=100, db_index=True)
     question_text = models.TextField()
     options = models.JSONField(help_text="List of options like ['A', 'B', 'C', 'D']")
     answer_type = models.CharField(max_length=10, choices=ANSWER_TYPES)
@@ -23,6 +23,7 @@ class MCQQuestion(models.Model):
     difficulty = models.CharField(max_length=10, choices=DIFFICULTY_LEVELS)
     marks = models.IntegerField()
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'mcq_question'
@@ -39,15 +40,38 @@ class FillInTheBlankQuestion(models.Model):
     ]
 
     id = models.AutoField(primary_key=True)
-    subject = models.CharField(max_length=100)
+    subject = models.CharField(max_length=100, db_index=True)
     question_text = models.TextField()
     correct_answers = models.TextField()
     difficulty = models.CharField(max_length=10, choices=DIFFICULTY_LEVELS)
     marks = models.IntegerField()
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'fill_blank_question'
 
     def __str__(self):
         return f"Fill: {self.question_text[:50]}"
+
+
+class Subject(models.Model):
+    """
+    Catalog of question-bank subjects with question counts per type and
+    difficulty, kept current by exam_content.signals (see exam_content.catalog).
+    """
+    name = models.CharField(max_length=100, unique=True)
+    mcq_easy = models.PositiveIntegerField(default=0)
+    mcq_medium = models.PositiveIntegerField(default=0)
+    mcq_hard = models.PositiveIntegerField(default=0)
+    fib_easy = models.PositiveIntegerField(default=0)
+    fib_medium = models.PositiveIntegerField(default=0)
+    fib_hard = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'question_subject'
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
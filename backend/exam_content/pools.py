@@ -0,0 +1,30 @@
+# exam_content/pools.py
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+def _version_key(question_type, subject):
+    return f"question_pool_version_{question_type}_{subject}"
+
+
+def pool_version(question_type, subject):
+    """Bumped whenever a question of the subject changes; caches built from the bank key on it."""
+    return cache.get(_version_key(question_type, subject), 0)
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def invalidate_pool(question_type, subject):
+    """
+    Move the subject's pools to a new version once the current transaction
+    commits: bumped earlier, another worker could rebuild from the rows not
+    yet committed and cache them under the new version.
+    """
+    key = _version_key(question_type, subject)
+    transaction.on_commit(lambda: _bump(key))
@@ -0,0 +1,53 @@
+# exam_content/signals.py
+
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .catalog import adjust_count
+from .models import MCQQuestion, FillInTheBlankQuestion
+from .pools import invalidate_pool
+
+QUESTION_TYPES = {MCQQuestion: 'MCQ', FillInTheBlankQuestion: 'FIB'}
+
+
+@receiver(pre_save, sender=MCQQuestion)
+@receiver(pre_save, sender=FillInTheBlankQuestion)
+def remember_previous_subject(sender, instance, **kwargs):
+    # A question moved to another subject must leave the old subject's pool
+    # and catalog counts too
+    instance._previous_subject = instance._previous_difficulty = None
+    if instance.pk:
+        previous = sender.objects.filter(pk=instance.pk).values_list('subject', 'difficulty').first()
+        if previous:
+            instance._previous_subject, instance._previous_difficulty = previous
+
+
+@receiver(post_save, sender=MCQQuestion)
+@receiver(post_save, sender=FillInTheBlankQuestion)
+@receiver(post_delete, sender=MCQQuestion)
+@receiver(post_delete, sender=FillInTheBlankQuestion)
+def invalidate_question_pools(sender, instance, **kwargs):
+    question_type = QUESTION_TYPES[sender]
+    invalidate_pool(question_type, instance.subject)
+    previous = getattr(instance, '_previous_subject', None)
+    if previous and previous != instance.subject:
+        invalidate_pool(question_type, previous)
+
+
+@receiver(post_save, sender=MCQQuestion)
+@receiver(post_save, sender=FillInTheBlankQuestion)
+def count_saved_question(sender, instance, **kwargs):
+    question_type = QUESTION_TYPES[sender]
+    previous = (getattr(instance, '_previous_subject', None), getattr(instance, '_previous_difficulty', None))
+    current = (instance.subject, instance.difficulty)
+    if previous == current:
+        return
+    if previous[0] is not None:
+        adjust_count(question_type, *previous, -1)
+    adjust_count(question_type, *current, 1)
+
+
+@receiver(post_delete, sender=MCQQuestion)
+@receiver(post_delete, sender=FillInTheBlankQuestion)
+def count_deleted_question(sender, instance, **kwargs):
+    adjust_count(QUESTION_TYPES[sender], instance.subject, instance.difficulty, -1)
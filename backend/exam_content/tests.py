@@ -1,3 +1,28 @@
 from django.test import TestCase
 
-# Create your tests here.
+from .catalog import get_catalog
+from .models import MCQQuestion
+from .pools import pool_version
+
+
+class QuestionSignalTests(TestCase):
+    def create_question(self):
+        return MCQQuestion.objects.create(
+            subject='Physics', question_text='g?', options=['9.8', '10'], answer_type='Single',
+            correct_answers=['9.8'], difficulty='Easy', marks=1,
+        )
+
+    def test_pool_is_invalidated_on_commit(self):
+        before = pool_version('MCQ', 'Physics')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_question()
+            # A rebuild before the commit would still see the old bank
+            self.assertEqual(pool_version('MCQ', 'Physics'), before)
+        self.assertEqual(pool_version('MCQ', 'Physics'), before + 1)
+
+    def test_catalog_is_dropped_on_commit(self):
+        get_catalog()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_question()
+            self.assertNotIn('Physics', [entry['name'] for entry in get_catalog()])
+        self.assertIn('Physics', [entry['name'] for entry in get_catalog()])
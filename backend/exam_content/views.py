@@ -4,6 +4,8 @@ from rest_framework import status
 from .models import MCQQuestion, FillInTheBlankQuestion
 from .serializers import MCQQuestionSerializer, FillBlankQuestionSerializer
 from django.shortcuts import get_object_or_404
+from exam_taker.paper_cache import invalidate_papers_for_question
+from .catalog import matching_subjects
 
 
 # Create MCQ Question
@@ -24,7 +26,8 @@ class MCQListView(APIView):
         queryset = MCQQuestion.objects.all()
 
         if subject:
-            queryset = queryset.filter(subject__icontains=subject)
+            # Resolve the search term against the cached catalog so the lookup uses the subject index
+            queryset = queryset.filter(subject__in=matching_subjects(subject))
         if difficulty:
             queryset = queryset.filter(difficulty__iexact=difficulty)
 
@@ -49,11 +52,13 @@ class MCQDetailView(APIView):
         serializer = MCQQuestionSerializer(mcq, data=data)
         if serializer.is_valid():
             serializer.save()
+            invalidate_papers_for_question('MCQ', mcq.pk)
             return Response({"message": "MCQ question updated successfully."})
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def delete(self, request, pk):
         instance = self.get_object(pk)
+        invalidate_papers_for_question('MCQ', instance.pk)
         instance.delete()
         return Response({"message": "MCQ question deleted successfully."}, status=status.HTTP_204_NO_CONTENT)
     
@@ -81,7 +86,8 @@ class FillBlankListView(APIView):
         queryset = FillInTheBlankQuestion.objects.all()
 
         if subject:
-            queryset = queryset.filter(subject__icontains=subject)
+            # Resolve the search term against the cached catalog so the lookup uses the subject index
+            queryset = queryset.filter(subject__in=matching_subjects(subject))
         if difficulty:
             queryset = queryset.filter(difficulty__iexact=difficulty)
 
@@ -98,10 +104,12 @@ class FillBlankDetailView(APIView):
         serializer = FillBlankQuestionSerializer(instance, data=request.data)
         if serializer.is_valid():
             serializer.save()
+            invalidate_papers_for_question('FIB', instance.pk)
             return Response({"message": "Fill-in-the-Blank question updated successfully."}, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def delete(self, request, pk):
         instance = self.get_object(pk)
+        invalidate_papers_for_question('FIB', instance.pk)
         instance.delete()
         return Response({"message": "Fill-in-the-Blank question deleted successfully."}, status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,193 @@
+# exam_evaluation/answer_key.py
+
+import hashlib
+import threading
+from typing import NamedTuple, Optional
+
+from django.core.cache import cache
+
+from exam_allotment.models import exam_creation, ExamQuestion, PaperSnapshot
+from exam_content.models import MCQQuestion, FillInTheBlankQuestion
+
+MAX_OPTION_BITS = 64
+ANSWER_KEY_CACHE_TIMEOUT = 60 * 60 * 24
+MEMO_MAX_EXAMS = 256
+
+
+class MCQKey(NamedTuple):
+    bits: dict              # option value -> bit position
+    mask: Optional[int]     # bitmask of the correct options, None if they don't fit in 64 bits
+    correct: frozenset
+    marks: int
+    subject: str
+
+
+class FIBKey(NamedTuple):
+    accepted: frozenset     # normalized accepted answers
+    marks: int
+    subject: str
+
+
+def normalize_fib(text):
+    return (text or '').strip().lower()
+
+
+class AnswerKey:
+    """
+    Compiled answer key of one exam paper: MCQ keys as frozen bitmasks, FIB
+    keys as normalized accepted-answer sets, plus marks and subject per question.
+    """
+
+    def __init__(self, exam_id, version, mcq, fib):
+        self.exam_id = exam_id
+        self.version = version
+        self.mcq = mcq
+        self.fib = fib
+
+    def selection_mask(self, question_id, selected):
+        """
+        Encode a selection as a bitmask, or None when it can't match the key
+        (an option that isn't on the question) or the key has no mask.
+        """
+        key = self.mcq[question_id]
+        if key.mask is None:
+            return None
+        mask = 0
+        for value in selected:
+            bit = key.bits.get(str(value))
+            if bit is None:
+                return None
+            mask |= 1 << bit
+        return mask
+
+    def grade_mcq(self, question_id, selected):
+        key = self.mcq[question_id]
+        if key.mask is None:
+            return frozenset(str(v) for v in selected) == key.correct
+        return self.selection_mask(question_id, selected) == key.mask
+
+    def grade_fib(self, question_id, response):
+        return normalize_fib(response) in self.fib[question_id].accepted
+
+
+def _compile_mcq(question):
+    bits = {}
+    for value in list(question['options'] or []) + list(question['correct_answers'] or []):
+        bits.setdefault(str(value), len(bits))
+    correct = frozenset(str(v) for v in question['correct_answers'] or [])
+    mask = None
+    if len(bits) <= MAX_OPTION_BITS:
+        mask = 0
+        for value in correct:
+            mask |= 1 << bits[value]
+    return MCQKey(bits, mask, correct, question['marks'], question['subject'])
+
+
+def _paper_rows(exam_id):
+    """
+    The paper's (type, question id, marks override, question updated_at) rows
+    in paper order: one indexed join over the exam's ExamQuestion rows.
+    """
+    rows = ExamQuestion.objects.filter(exam_id=exam_id).order_by('position').values_list(
+        'question_type', 'mcq_question_id', 'fib_question_id', 'marks_override',
+        'mcq_question__updated_at', 'fib_question__updated_at',
+    )
+    return [(t, m or f, override, m_at or f_at) for t, m, f, override, m_at, f_at in rows]
+
+
+def _paper_version(rows):
+    """Version of a paper's key: its questions, their marks overrides and when they last changed."""
+    return hashlib.sha1(repr(rows).encode()).hexdigest()[:16]
+
+
+def compile_answer_key(exam_id, version, rows):
+    overrides = {(t, qid): override for t, qid, override, _ in rows if override is not None}
+    mcq_ids = [qid for t, qid, _, _ in rows if t == 'MCQ']
+    fib_ids = [qid for t, qid, _, _ in rows if t == 'FIB']
+
+    mcq = {}
+    for q in MCQQuestion.objects.filter(id__in=mcq_ids).values('id', 'options', 'correct_answers', 'marks', 'subject'):
+        q['marks'] = overrides.get(('MCQ', q['id']), q['marks'])
+        mcq[q['id']] = _compile_mcq(q)
+    fib = {
+        q['id']: FIBKey(
+            frozenset({normalize_fib(q['correct_answers'])}),
+            overrides.get(('FIB', q['id']), q['marks']), q['subject'],
+        )
+        for q in FillInTheBlankQuestion.objects.filter(id__in=fib_ids)
+        .values('id', 'correct_answers', 'marks', 'subject')
+    }
+    return AnswerKey(exam_id, version, mcq, fib)
+
+
+def compile_snapshot_key(exam_id, content_hash, content):
+    """Answer key of a published PaperSnapshot; its version is the content hash."""
+    mcq, fib = {}, {}
+    for q in content['questions']:
+        if q['type'] == 'MCQ':
+            mcq[q['id']] = _compile_mcq(q)
+        else:
+            fib[q['id']] = FIBKey(frozenset({normalize_fib(q['correct_answers'])}), q['marks'], q['subject'])
+    return AnswerKey(exam_id, content_hash, mcq, fib)
+
+
+_memo = {}
+_memo_lock = threading.Lock()
+
+
+def _remember(memo_key, key):
+    with _memo_lock:
+        if len(_memo) >= MEMO_MAX_EXAMS:
+            _memo.clear()
+        _memo[memo_key] = key
+    return key
+
+
+def _snapshot_answer_key(exam_id, snapshot_id):
+    # Snapshots are immutable, so a memoized key never needs revalidating
+    with _memo_lock:
+        key = _memo.get(('snapshot', snapshot_id))
+    if key is not None:
+        return key
+
+    cache_key = f"answer_key_snapshot_{snapshot_id}"
+    key = cache.get(cache_key)
+    if key is None:
+        content_hash, content = PaperSnapshot.objects.values_list('content_hash', 'content').get(pk=snapshot_id)
+        key = compile_snapshot_key(exam_id, content_hash, content)
+        cache.set(cache_key, key, timeout=ANSWER_KEY_CACHE_TIMEOUT)
+    return _remember(('snapshot', snapshot_id), key)
+
+
+def get_answer_key(exam):
+    """
+    Return the compiled answer key of an exam (an exam_creation or its id).
+
+    A published exam is graded against its frozen PaperSnapshot. A draft is
+    graded against the live bank; its keys are memoized in process and in the
+    shared cache under a version that changes whenever a question of the
+    paper is edited, added or removed, so no explicit invalidation is needed.
+    """
+    if isinstance(exam, exam_creation):
+        exam_id, snapshot_id = exam.pk, exam.published_snapshot_id
+    else:
+        exam_id = int(exam)
+        snapshot_id = exam_creation.objects.filter(pk=exam_id) \
+            .values_list('published_snapshot_id', flat=True).first()
+    if snapshot_id is not None:
+        return _snapshot_answer_key(exam_id, snapshot_id)
+
+    rows = _paper_rows(exam_id)
+    version = _paper_version(rows)
+
+    with _memo_lock:
+        key = _memo.get(exam_id)
+    if key is not None and key.version == version:
+        return key
+
+    cache_key = f"answer_key_{exam_id}_{version}"
+    key = cache.get(cache_key)
+    if key is None:
+        key = compile_answer_key(exam_id, version, rows)
+        cache.set(cache_key, key, timeout=ANSWER_KEY_CACHE_TIMEOUT)
+    return _remember(exam_id, key)
@@ -0,0 +1,184 @@
+# exam_evaluation/batch.py
+
+import logging
+
+import numpy as np
+from django.db import transaction
+
+from exam_taker.models import ExamAttempt, MCQAnswer, FIBAnswer
+from .answer_key import get_answer_key
+from .models import ExamResult, SubjectWiseResult, QuestionResult
+from .statistics import ScoreSample, snapshot_results, record_results
+
+logger = logging.getLogger(__name__)
+
+WRITE_BATCH_SIZE = 2000
+
+
+def evaluate_exam_batch(exam_id, attempt_ids=None):
+    """
+    Grade every submitted attempt of an exam in one pass.
+
+    MCQ selections of all attempts are encoded as an (attempts x questions)
+    uint64 bitmask matrix and compared with the compiled answer key's mask
+    vector in a single vectorized operation; FIB answers are normalized and
+    compared in Python. Scores follow evaluate_attempt(): only answered
+    questions count towards the marks possible. Results are written with
+    bulk_create/bulk_update, keeping the result_id of attempts that were
+    graded before.
+
+    Returns the number of attempts evaluated.
+    """
+    attempts = ExamAttempt.objects.filter(exam_id=exam_id, is_submitted=True)
+    if attempt_ids is not None:
+        attempts = attempts.filter(pk__in=attempt_ids)
+    attempt_pks = list(attempts.order_by('pk').values_list('pk', flat=True))
+    if not attempt_pks:
+        return 0
+    row_of = {pk: i for i, pk in enumerate(attempt_pks)}
+
+    key = get_answer_key(exam_id)
+    mcq_rows = list(MCQAnswer.objects.filter(attempt_id__in=attempt_pks)
+                    .values_list('attempt_id', 'question_id', 'selected_options'))
+    fib_rows = list(FIBAnswer.objects.filter(attempt_id__in=attempt_pks)
+                    .values_list('attempt_id', 'question_id', 'user_response'))
+
+    # Columns: MCQ questions first, then FIB questions
+    columns = [('MCQ', qid) for qid in sorted(key.mcq)] + [('FIB', qid) for qid in sorted(key.fib)]
+    col_of = {c: j for j, c in enumerate(columns)}
+    n_rows, n_cols = len(attempt_pks), len(columns)
+    n_mcq = len(key.mcq)
+
+    answered = np.zeros((n_rows, n_cols), dtype=bool)
+    correct = np.zeros((n_rows, n_cols), dtype=bool)
+
+    # MCQ: bitmask matrix vs. key vector
+    selected_mask = np.zeros((n_rows, n_mcq), dtype=np.uint64)
+    key_mask = np.zeros(n_mcq, dtype=np.uint64)
+    vector_idx = []
+    for qid, question in key.mcq.items():
+        if question.mask is not None:
+            j = col_of[('MCQ', qid)]
+            key_mask[j] = question.mask
+            vector_idx.append(j)
+
+    unmatched = []
+    for attempt_pk, qid, selected in mcq_rows:
+        if qid not in key.mcq:
+            continue
+        i, j = row_of[attempt_pk], col_of[('MCQ', qid)]
+        answered[i, j] = True
+        if key.mcq[qid].mask is None:
+            # Too many distinct options to fit a mask; compare as sets
+            correct[i, j] = key.grade_mcq(qid, selected)
+            continue
+        mask = key.selection_mask(qid, selected)
+        if mask is None:
+            # Selected an option the question doesn't have
+            unmatched.append((i, j))
+        else:
+            selected_mask[i, j] = mask
+
+    if vector_idx:
+        correct[:, vector_idx] = (
+            (selected_mask[:, vector_idx] == key_mask[vector_idx]) & answered[:, vector_idx]
+        )
+    for i, j in unmatched:
+        correct[i, j] = False
+
+    # FIB: normalized string comparison
+    for attempt_pk, qid, response in fib_rows:
+        if qid not in key.fib:
+            continue
+        i, j = row_of[attempt_pk], col_of[('FIB', qid)]
+        answered[i, j] = True
+        correct[i, j] = key.grade_fib(qid, response)
+
+    # Scores: one matrix product per aggregate
+    key_of = {'MCQ': key.mcq, 'FIB': key.fib}
+    marks = np.array([key_of[t][qid].marks for t, qid in columns], dtype=np.float64)
+    subjects = sorted({key_of[t][qid].subject for t, qid in columns})
+    subject_of = {s: k for k, s in enumerate(subjects)}
+    subject_onehot = np.zeros((n_cols, len(subjects)), dtype=np.float64)
+    for j, (t, qid) in enumerate(columns):
+        subject_onehot[j, subject_of[key_of[t][qid].subject]] = 1.0
+
+    obtained = correct * marks                      # attempts x questions
+    possible = answered * marks
+    total_obtained = obtained.sum(axis=1)
+    total_possible = possible.sum(axis=1)
+    subject_obtained = obtained @ subject_onehot    # attempts x subjects
+    subject_possible = possible @ subject_onehot
+    subject_answered = answered.astype(np.float64) @ subject_onehot
+
+    _write_results(
+        exam_id, attempt_pks, columns, key_of, subjects,
+        answered, correct, obtained, marks,
+        total_obtained, total_possible,
+        subject_obtained, subject_possible, subject_answered,
+    )
+    logger.info("Batch-evaluated %d attempts of exam %s", n_rows, exam_id)
+    return n_rows
+
+
+def _write_results(exam_id, attempt_pks, columns, key_of, subjects,
+                   answered, correct, obtained, marks,
+                   total_obtained, total_possible,
+                   subject_obtained, subject_possible, subject_answered):
+    with transaction.atomic():
+        existing = {
+            r.attempt_id: r for r in ExamResult.objects.select_for_update().filter(attempt_id__in=attempt_pks)
+        }
+        removed = snapshot_results(list(existing)).values() if existing else ()
+
+        results, new_results = [], []
+        for i, attempt_pk in enumerate(attempt_pks):
+            result = existing.get(attempt_pk) or ExamResult(attempt_id=attempt_pk)
+            result.total_marks_obtained = float(total_obtained[i])
+            result.total_marks_possible = float(total_possible[i])
+            result.calculate_scores()
+            results.append(result)
+            if result.pk is None:
+                new_results.append(result)
+
+        if existing:
+            ExamResult.objects.bulk_update(
+                list(existing.values()),
+                ['total_marks_obtained', 'total_marks_possible', 'percentage_score', 'is_passed'],
+                batch_size=WRITE_BATCH_SIZE,
+            )
+            # Breakdown rows of re-evaluated attempts are rebuilt from scratch
+            SubjectWiseResult.objects.filter(exam_result__in=existing.values()).delete()
+            QuestionResult.objects.filter(exam_result__in=existing.values()).delete()
+        ExamResult.objects.bulk_create(new_results, batch_size=WRITE_BATCH_SIZE)
+
+        subject_rows, question_rows = [], []
+        added = [ScoreSample(r.percentage_score, r.is_passed, {}) for r in results]
+        answered_cells = np.argwhere(answered)
+        for i, j in answered_cells:
+            question_type, qid = columns[j]
+            question_rows.append(QuestionResult(
+                exam_result=results[i],
+                subject=key_of[question_type][qid].subject,
+                question_type=question_type,
+                question_id=qid,
+                marks_obtained=float(obtained[i, j]),
+                total_marks=float(marks[j]),
+                is_correct=bool(correct[i, j]),
+            ))
+
+        for i, k in np.argwhere(subject_answered > 0):
+            row = SubjectWiseResult(
+                exam_result=results[i],
+                subject=subjects[k],
+                marks_obtained=float(subject_obtained[i, k]),
+                total_marks=float(subject_possible[i, k]),
+            )
+            row.calculate_scores()
+            subject_rows.append(row)
+            added[i].subjects[row.subject] = row.percentage_score
+
+        SubjectWiseResult.objects.bulk_create(subject_rows, batch_size=WRITE_BATCH_SIZE)
+        QuestionResult.objects.bulk_create(question_rows, batch_size=WRITE_BATCH_SIZE)
+
+        record_results(exam_id, removed=removed, added=added)
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from exam_allotment.models import exam_creation
+from exam_evaluation.statistics import rebuild_exam_statistics
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-exam statistics rollup from the stored results"
+
+    def add_arguments(self, parser):
+        parser.add_argument('exam_ids', nargs='*', type=int,
+                            help="Exams to rebuild (default: all exams)")
+
+    def handle(self, *args, **options):
+        exam_ids = options['exam_ids'] or exam_creation.objects.values_list('id', flat=True)
+        for exam_id in exam_ids:
+            stats = rebuild_exam_statistics(exam_id)
+            self.stdout.write(f"Exam {exam_id}: {stats.result_count} results")
+        self.stdout.write(self.style.SUCCESS("Exam statistics rebuilt"))
@@ -0,0 +1,51 @@
+# Generated by Django 5.2 on 2026-10-18 12:22
+
+import django.db.models.deletion
+import exam_evaluation.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam_allotment', '0012_examassignment_duration_minutes'),
+        ('exam_evaluation', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExamStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('result_count', models.IntegerField(default=0)),
+                ('score_sum', models.FloatField(default=0)),
+                ('score_sq_sum', models.FloatField(default=0)),
+                ('max_score', models.FloatField(blank=True, null=True)),
+                ('histogram', models.JSONField(default=exam_evaluation.models.empty_histogram)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('pass_count', models.IntegerField(default=0)),
+                ('exam', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='statistics', to='exam_allotment.exam_creation')),
+            ],
+            options={
+                'db_table': 'exam_statistics',
+            },
+        ),
+        migrations.CreateModel(
+            name='ExamSubjectStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('result_count', models.IntegerField(default=0)),
+                ('score_sum', models.FloatField(default=0)),
+                ('score_sq_sum', models.FloatField(default=0)),
+                ('max_score', models.FloatField(blank=True, null=True)),
+                ('histogram', models.JSONField(default=exam_evaluation.models.empty_histogram)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('subject', models.CharField(max_length=100)),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subject_statistics', to='exam_allotment.exam_creation')),
+            ],
+            options={
+                'db_table': 'exam_subject_statistics',
+                'unique_together': {('exam', 'subject')},
+            },
+        ),
+    ]
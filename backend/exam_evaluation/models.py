@@ -1,6 +1,13 @@
 # Create your models here.
 from django.db import models
 from exam_taker.models import ExamAttempt
+from exam_allotment.models import exam_creation
+
+HISTOGRAM_BUCKETS = 10
+
+
+def empty_histogram():
+    return [0] * HISTOGRAM_BUCKETS
 
 class ExamResult(models.Model):
     """
@@ -17,7 +24,8 @@ class ExamResult(models.Model):
     class Meta:
         db_table = 'exam_result'
     
-    def save(self, *args, **kwargs):
+    def calculate_scores(self):
+        """Derive percentage and pass flag; also used by bulk writes that bypass save()"""
         # Calculate percentage score
         if self.total_marks_possible > 0:
             self.percentage_score = (self.total_marks_obtained / self.total_marks_possible) * 100
@@ -26,7 +34,9 @@ class ExamResult(models.Model):
         
         # Default passing criteria (can be customized)
         self.is_passed = self.percentage_score >= 40  # Assuming 40% is pass
-        
+
+    def save(self, *args, **kwargs):
+        self.calculate_scores()
         super().save(*args, **kwargs)
 
 
@@ -45,13 +55,15 @@ class SubjectWiseResult(models.Model):
         db_table = 'subject_wise_result'
         unique_together = ('exam_result', 'subject')
     
-    def save(self, *args, **kwargs):
+    def calculate_scores(self):
         # Calculate percentage score
         if self.total_marks > 0:
             self.percentage_score = (self.marks_obtained / self.total_marks) * 100
         else:
             self.percentage_score = 0
-        
+
+    def save(self, *args, **kwargs):
+        self.calculate_scores()
         super().save(*args, **kwargs)
 
 
@@ -70,4 +82,69 @@ class QuestionResult(models.Model):
     
     class Meta:
         db_table = 'question_result'
-        unique_together = ('exam_result', 'question_type', 'question_id')
\ No newline at end of file
+        unique_together = ('exam_result', 'question_type', 'question_id')
+
+
+class ScoreRollup(models.Model):
+    """
+    Running aggregates of percentage scores, updated by +/- deltas so reports
+    never rescan the results they summarize
+    """
+    result_count = models.IntegerField(default=0)
+    score_sum = models.FloatField(default=0)
+    score_sq_sum = models.FloatField(default=0)
+    max_score = models.FloatField(null=True, blank=True)
+    histogram = models.JSONField(default=empty_histogram)  # 10 buckets of 10 points, 100 goes in the last
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+
+    def apply(self, score, sign=1):
+        """
+        Add (sign=1) or remove (sign=-1) one score. Returns True when the
+        maximum may have been removed and has to be recomputed.
+        """
+        self.result_count += sign
+        self.score_sum += sign * score
+        self.score_sq_sum += sign * score * score
+        bucket = min(max(int(score // (100 / HISTOGRAM_BUCKETS)), 0), HISTOGRAM_BUCKETS - 1)
+        self.histogram[bucket] += sign
+        if sign > 0:
+            self.max_score = score if self.max_score is None else max(self.max_score, score)
+            return False
+        return self.max_score is not None and score >= self.max_score
+
+    @property
+    def average_score(self):
+        return self.score_sum / self.result_count if self.result_count else 0
+
+    @property
+    def std_deviation(self):
+        if not self.result_count:
+            return 0
+        variance = self.score_sq_sum / self.result_count - self.average_score ** 2
+        return max(variance, 0) ** 0.5
+
+
+class ExamStatistics(ScoreRollup):
+    """
+    Per-exam rollup of ExamResult scores
+    """
+    exam = models.OneToOneField(exam_creation, on_delete=models.CASCADE, related_name='statistics')
+    pass_count = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'exam_statistics'
+
+
+class ExamSubjectStatistics(ScoreRollup):
+    """
+    Per-exam, per-subject rollup of SubjectWiseResult scores
+    """
+    exam = models.ForeignKey(exam_creation, on_delete=models.CASCADE, related_name='subject_statistics')
+    subject = models.CharField(max_length=100)
+
+    class Meta:
+        db_table = 'exam_subject_statistics'
+        unique_together = ('exam', 'subject')
@@ -0,0 +1,109 @@
+# exam_evaluation/services.py
+
+import logging
+from collections import defaultdict
+
+from django.db import transaction
+
+from exam_taker.models import ExamAttempt, MCQAnswer, FIBAnswer
+from .models import ExamResult, SubjectWiseResult, QuestionResult
+from .answer_key import get_answer_key
+from .batch import evaluate_exam_batch
+from .statistics import ScoreSample, snapshot_results, record_results
+
+logger = logging.getLogger(__name__)
+
+
+def evaluate_attempt(attempt):
+    """
+    Grade a submitted attempt against the exam's compiled answer key and store
+    its ExamResult, QuestionResult and SubjectWiseResult rows. Returns the ExamResult.
+    """
+    key = get_answer_key(attempt.exam_id)
+    mcq_answers = MCQAnswer.objects.filter(attempt=attempt).values_list('question_id', 'selected_options')
+    fib_answers = FIBAnswer.objects.filter(attempt=attempt).values_list('question_id', 'user_response')
+
+    total_marks_obtained = 0
+    total_marks_possible = 0
+    subject_scores = defaultdict(lambda: {'obtained': 0, 'total': 0})
+    question_rows = []
+
+    graded = [
+        ('MCQ', qid, key.mcq[qid], key.grade_mcq(qid, selected))
+        for qid, selected in mcq_answers if qid in key.mcq
+    ] + [
+        ('FIB', qid, key.fib[qid], key.grade_fib(qid, response))
+        for qid, response in fib_answers if qid in key.fib
+    ]
+    for question_type, qid, question, is_correct in graded:
+        marks_obtained = question.marks if is_correct else 0
+        total_marks_possible += question.marks
+        total_marks_obtained += marks_obtained
+        subject_scores[question.subject]['total'] += question.marks
+        subject_scores[question.subject]['obtained'] += marks_obtained
+        question_rows.append(QuestionResult(
+            subject=question.subject,
+            question_type=question_type,
+            question_id=qid,
+            marks_obtained=marks_obtained,
+            total_marks=question.marks,
+            is_correct=is_correct,
+        ))
+
+    with transaction.atomic():
+        removed = snapshot_results([attempt.pk]).values()
+        result, created = ExamResult.objects.update_or_create(
+            attempt=attempt,
+            defaults={
+                'total_marks_obtained': total_marks_obtained,
+                'total_marks_possible': total_marks_possible,
+            }
+        )
+        if not created:
+            result.subject_results.all().delete()
+            result.question_results.all().delete()
+
+        for row in question_rows:
+            row.exam_result = result
+        QuestionResult.objects.bulk_create(question_rows)
+
+        subject_rows = []
+        for subject, scores in subject_scores.items():
+            row = SubjectWiseResult(
+                exam_result=result,
+                subject=subject,
+                marks_obtained=scores['obtained'],
+                total_marks=scores['total'],
+            )
+            row.calculate_scores()
+            subject_rows.append(row)
+        SubjectWiseResult.objects.bulk_create(subject_rows)
+
+        record_results(attempt.exam_id, removed=removed, added=[ScoreSample(
+            result.percentage_score,
+            result.is_passed,
+            {row.subject: row.percentage_score for row in subject_rows},
+        )])
+
+    return result
+
+
+def evaluate_attempts(attempt_ids):
+    """
+    Grade a batch of submitted attempts, e.g. the ones auto-submitted by the
+    deadline scheduler, with one vectorized pass per exam. A failing exam is
+    logged and does not stop the rest. Returns the number of attempts evaluated.
+    """
+    by_exam = defaultdict(list)
+    for pk, exam_id in ExamAttempt.objects.filter(
+        pk__in=attempt_ids, is_submitted=True
+    ).values_list('pk', 'exam_id'):
+        by_exam[exam_id].append(pk)
+
+    evaluated = 0
+    for exam_id, pks in by_exam.items():
+        try:
+            evaluated += evaluate_exam_batch(exam_id, attempt_ids=pks)
+        except Exception:
+            logger.exception("Batch evaluation failed for exam %s", exam_id)
+    return evaluated
@@ -0,0 +1,146 @@
+# exam_evaluation/statistics.py
+
+from typing import NamedTuple
+
+from django.db import transaction
+from django.db.models import Max
+
+from .models import ExamResult, SubjectWiseResult, ExamStatistics, ExamSubjectStatistics
+
+
+class ScoreSample(NamedTuple):
+    percentage: float
+    is_passed: bool
+    subjects: dict      # subject -> percentage
+
+
+def snapshot_results(attempt_ids):
+    """
+    Current scores of the given attempts' results, keyed by attempt id. Taken
+    before a (re-)evaluation so the rollup can subtract what it replaces; call
+    it inside the transaction that rewrites the results, it locks them.
+    """
+    samples = {
+        attempt_id: ScoreSample(percentage, is_passed, {})
+        for attempt_id, percentage, is_passed in ExamResult.objects.select_for_update().filter(
+            attempt_id__in=attempt_ids
+        ).values_list('attempt_id', 'percentage_score', 'is_passed')
+    }
+    if samples:
+        for attempt_id, subject, percentage in SubjectWiseResult.objects.filter(
+            exam_result__attempt_id__in=samples
+        ).values_list('exam_result__attempt_id', 'subject', 'percentage_score'):
+            samples[attempt_id].subjects[subject] = percentage
+    return samples
+
+
+def _exam_max(exam_id):
+    return ExamResult.objects.filter(attempt__exam_id=exam_id).aggregate(m=Max('percentage_score'))['m']
+
+
+def _subject_max(exam_id, subject):
+    return SubjectWiseResult.objects.filter(
+        exam_result__attempt__exam_id=exam_id, subject=subject
+    ).aggregate(m=Max('percentage_score'))['m']
+
+
+def record_results(exam_id, removed=(), added=()):
+    """
+    Apply result changes of one exam to its rollup rows: `removed` samples are
+    subtracted, `added` ones added. Must run in the transaction that wrote the
+    results, after the write. The rollup rows are locked, so concurrent
+    evaluations of the same exam apply their deltas one after another.
+    """
+    removed, added = list(removed), list(added)
+    if not removed and not added:
+        return
+
+    with transaction.atomic():
+        stats, created = _lock_exam_statistics(exam_id)
+        if created:
+            # No rollup yet: build it from the results, which already include this change
+            _rebuild(stats)
+            return
+
+        subjects = {s for sample in removed + added for s in sample.subjects}
+        for subject in subjects:
+            ExamSubjectStatistics.objects.get_or_create(exam_id=exam_id, subject=subject)
+        subject_stats = {
+            row.subject: row for row in ExamSubjectStatistics.objects.select_for_update().filter(
+                exam_id=exam_id, subject__in=subjects
+            )
+        }
+
+        stale_max = False
+        stale_subjects = set()
+        for sign, samples in ((-1, removed), (1, added)):
+            for sample in samples:
+                stale_max |= stats.apply(sample.percentage, sign)
+                stats.pass_count += sign * int(sample.is_passed)
+                for subject, percentage in sample.subjects.items():
+                    if subject_stats[subject].apply(percentage, sign):
+                        stale_subjects.add(subject)
+
+        # A removed score may have been the maximum; only then rescan
+        if stale_max:
+            stats.max_score = _exam_max(exam_id)
+        for subject in stale_subjects:
+            subject_stats[subject].max_score = _subject_max(exam_id, subject)
+
+        stats.save()
+        fields = ['result_count', 'score_sum', 'score_sq_sum', 'max_score', 'histogram', 'updated_at']
+        for row in subject_stats.values():
+            row.save(update_fields=fields)
+
+
+def _lock_exam_statistics(exam_id):
+    """
+    The exam's rollup row, locked until the transaction ends, and whether it
+    was just created. A concurrent first evaluation waits on the new row's
+    insert and then finds it, instead of inserting a second one.
+    """
+    _, created = ExamStatistics.objects.get_or_create(exam_id=exam_id)
+    return ExamStatistics.objects.select_for_update().get(exam_id=exam_id), created
+
+
+def _rebuild(stats):
+    """Recompute the locked rollup row `stats` and its subject rows from the stored results."""
+    exam_id = stats.exam_id
+    fresh = ExamStatistics(pk=stats.pk, exam_id=exam_id)
+    for percentage, is_passed in ExamResult.objects.filter(
+        attempt__exam_id=exam_id
+    ).values_list('percentage_score', 'is_passed').iterator(chunk_size=2000):
+        fresh.apply(percentage)
+        fresh.pass_count += int(is_passed)
+
+    subject_stats = {}
+    for subject, percentage in SubjectWiseResult.objects.filter(
+        exam_result__attempt__exam_id=exam_id
+    ).values_list('subject', 'percentage_score').iterator(chunk_size=2000):
+        if subject not in subject_stats:
+            subject_stats[subject] = ExamSubjectStatistics(exam_id=exam_id, subject=subject)
+        subject_stats[subject].apply(percentage)
+
+    ExamSubjectStatistics.objects.filter(exam_id=exam_id).delete()
+    fresh.save()
+    ExamSubjectStatistics.objects.bulk_create(subject_stats.values())
+    return fresh
+
+
+def rebuild_exam_statistics(exam_id):
+    """Recompute an exam's rollup from its stored results."""
+    with transaction.atomic():
+        stats, _ = _lock_exam_statistics(exam_id)
+        return _rebuild(stats)
+
+
+def load_exam_statistics(exam_id):
+    """
+    Return (ExamStatistics, [ExamSubjectStatistics]) of an exam, building the
+    rollup from the stored results the first time it is asked for.
+    """
+    stats = ExamStatistics.objects.filter(exam_id=exam_id).first()
+    if stats is None:
+        stats = rebuild_exam_statistics(exam_id)
+    subject_stats = list(ExamSubjectStatistics.objects.filter(exam_id=exam_id).order_by('subject'))
+    return stats, subject_stats
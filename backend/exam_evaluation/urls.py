@@ -11,6 +11,9 @@ from .views import (
 urlpatterns = [
     # Evaluate an exam attempt
     path('evaluate/<uuid:attempt_id>/', views.evaluate_exam, name='evaluate_exam'),
+
+    # Evaluate all submitted attempts of an exam in one batch
+    path('evaluate-exam/<int:exam_id>/', views.evaluate_exam_attempts, name='evaluate_exam_attempts'),
     
     # Get details of a specific result
     path('result/<int:result_id>/', views.get_result, name='get_result'),
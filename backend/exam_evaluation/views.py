@@ -9,27 +9,40 @@ from django.db import transaction
 from django.db.models import Sum, F
 from django.utils import timezone
 
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 
+from candidate_enrollment.authentication import (
+    CandidateJWTAuthentication, CandidateOrUserJWTAuthentication, CandidateUser,
+)
+
 from exam_taker.models import ExamAttempt, MCQAnswer, FIBAnswer
 from exam_content.models import MCQQuestion, FillInTheBlankQuestion
 from exam_allotment.models import exam_creation, ExamAssignment
 from .models import ExamResult, SubjectWiseResult, QuestionResult
+from .services import evaluate_attempt
+from .batch import evaluate_exam_batch
+from .statistics import load_exam_statistics
 from django.db.models import Avg, Max
 import json
 from collections import defaultdict
 
 
 @api_view(['POST'])
+@authentication_classes([CandidateJWTAuthentication])
+@permission_classes([IsAuthenticated])
 def evaluate_exam(request, attempt_id):
     """
     Evaluate an exam attempt and generate results
     """
     try:
         # Get the exam attempt
-        attempt = get_object_or_404(ExamAttempt, attempt_id=attempt_id)
+        attempt = get_object_or_404(ExamAttempt.objects.select_related('assignment'), attempt_id=attempt_id)
+        if attempt.assignment.user_id != request.user.user_id:
+            return Response({'error': 'Attempt does not belong to this candidate'},
+                            status=status.HTTP_403_FORBIDDEN)
         
         # If already submitted and evaluated, return existing result
         if attempt.is_submitted and hasattr(attempt, 'result'):
@@ -51,104 +64,13 @@ def evaluate_exam(request, attempt_id):
             attempt.save()
         
         # Evaluate the exam
-        with transaction.atomic():
-            total_marks_obtained = 0
-            total_marks_possible = 0
-            subject_scores = defaultdict(lambda: {'obtained': 0, 'total': 0})
-            
-            # Create a new result record
-            result, created = ExamResult.objects.update_or_create(
-            attempt=attempt,
-            defaults={
-             'total_marks_obtained': 0,
-            'total_marks_possible': 0
-           }
-           )
-            
-            # Evaluate MCQ answers
-            mcq_answers = MCQAnswer.objects.filter(attempt=attempt).select_related('question')
-            for answer in mcq_answers:
-                question = answer.question
-                marks = question.marks
-                subject = question.subject
-                total_marks_possible += marks
-                subject_scores[subject]['total'] += marks
-                
-                # Check if answer is correct
-                is_correct = False
-                
-                # For single correct answer
-                if question.answer_type == 'Single':
-                    is_correct = set(answer.selected_options) == set(question.correct_answers)
-                # For multiple correct answers
-                else:  # Multiple
-                    # All selected options must be correct and all correct options must be selected
-                    is_correct = set(answer.selected_options) == set(question.correct_answers)
-                
-                # Award marks if correct
-                marks_obtained = marks if is_correct else 0
-                total_marks_obtained += marks_obtained
-                subject_scores[subject]['obtained'] += marks_obtained
-                
-                # Store question result
-                QuestionResult.objects.update_or_create(
-                    exam_result=result,
-                    subject=subject,
-                    question_type='MCQ',
-                    question_id=question.id,
-                    marks_obtained=marks_obtained,
-                    total_marks=marks,
-                    is_correct=is_correct
-                )
-            
-            # Evaluate FIB answers
-            fib_answers = FIBAnswer.objects.filter(attempt=attempt).select_related('question')
-            for answer in fib_answers:
-                question = answer.question
-                marks = question.marks
-                subject = question.subject
-                total_marks_possible += marks
-                subject_scores[subject]['total'] += marks
-                
-                # Simple exact match for FIB - can be enhanced for partial matching
-                is_correct = answer.user_response.strip().lower() == question.correct_answers.strip().lower()
-                
-                # Award marks if correct
-                marks_obtained = marks if is_correct else 0
-                total_marks_obtained += marks_obtained
-                subject_scores[subject]['obtained'] += marks_obtained
-                
-                # Store question result
-                QuestionResult.objects.update_or_create(
-                    exam_result=result,
-                    subject=subject,
-                    question_type='FIB',
-                    question_id=question.id,
-                    marks_obtained=marks_obtained,
-                    total_marks=marks,
-                    is_correct=is_correct
-                )
-            
-            # Update total marks in result
-            result.total_marks_obtained = total_marks_obtained
-            result.total_marks_possible = total_marks_possible
-            result.save()
-            
-            # Create subject-wise results
-            for subject, scores in subject_scores.items():
-                SubjectWiseResult.objects.update_or_create(
-                    exam_result=result,
-                    subject=subject,
-                    marks_obtained=scores['obtained'],
-                    total_marks=scores['total'],
-                    percentage_score=(scores['obtained'] / scores['total'] * 100) if scores['total'] > 0 else 0
-                )
+        result = evaluate_attempt(attempt)
         
         return Response({
             'message': 'Exam evaluated successfully',
             'result_id': result.result_id,
-            'total_marks': total_marks_obtained,
-            'total_possible': total_marks_possible,
+            'total_marks': result.total_marks_obtained,
+            'total_possible': result.total_marks_possible,
             'percentage': result.percentage_score,
             'passed': result.is_passed
         }, status=status.HTTP_201_CREATED)
@@ -159,13 +81,39 @@ def evaluate_exam(request, attempt_id):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def evaluate_exam_attempts(request, exam_id):
+    """
+    Evaluate every submitted attempt of an exam in one batch; staff only.
+    Errors propagate, so a failure is logged as a 500 without echoing its details.
+    """
+    exam = get_object_or_404(exam_creation, id=exam_id)
+
+    started = timezone.now()
+    evaluated = evaluate_exam_batch(exam.id)
+    elapsed = (timezone.now() - started).total_seconds()
+
+    return Response({
+        'message': 'Exam evaluated successfully',
+        'exam_id': exam.id,
+        'attempts_evaluated': evaluated,
+        'elapsed_seconds': round(elapsed, 3)
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(['GET'])
+@authentication_classes([CandidateOrUserJWTAuthentication])
+@permission_classes([IsAuthenticated])
 def get_result(request, result_id):
     """
-    Get detailed result for an exam
+    Get detailed result for an exam; candidates only see their own
     """
     try:
         result = get_object_or_404(ExamResult, result_id=result_id)
+        if isinstance(request.user, CandidateUser) and result.attempt.assignment.user_id != request.user.user_id:
+            return Response({'error': 'Result does not belong to this candidate'},
+                            status=status.HTTP_403_FORBIDDEN)
         
         # Get subject-wise results
         subject_results = SubjectWiseResult.objects.filter(exam_result=result)
@@ -239,44 +187,28 @@ def get_exam_statistics(request, exam_id):
     try:
         exam = get_object_or_404(exam_creation, id=exam_id)
         
-        # Get all attempts for this exam
-        attempts = ExamAttempt.objects.filter(exam=exam, is_submitted=True)
-        
-        # Get all results
-        results = ExamResult.objects.filter(attempt__in=attempts)
-        
-        if not results.exists():
+        # Read the incrementally maintained rollup instead of rescanning results
+        stats, subject_rollups = load_exam_statistics(exam.id)
+
+        if not stats.result_count:
             return Response({
                 'error': 'No results found for this exam'
             }, status=status.HTTP_404_NOT_FOUND)
         
-        # Calculate statistics
-        total_candidates = results.count()
-        passed_candidates = results.filter(is_passed=True).count()
-        
-        # Average score
-        avg_score = results.aggregate(avg=Sum('percentage_score') / total_candidates)['avg']
-        
-        # Get subject-wise statistics
-        subjects = SubjectWiseResult.objects.filter(exam_result__in=results).values('subject').distinct()
-        
-        subject_stats = []
-        for subject_data in subjects:
-            subject = subject_data['subject']
-            subject_results = SubjectWiseResult.objects.filter(
-                exam_result__in=results,
-                subject=subject
-            )
-            
-            total_subject_results = subject_results.count()
-            avg_subject_score = subject_results.aggregate(
-                avg=Sum('percentage_score') / total_subject_results
-            )['avg']
-            
-            subject_stats.append({
-                'subject': subject,
-                'average_score': avg_subject_score
-            })
+        total_candidates = stats.result_count
+        passed_candidates = stats.pass_count
+        avg_score = stats.average_score
+        
+        subject_stats = [
+            {
+                'subject': rollup.subject,
+                'average_score': rollup.average_score,
+                'highest_score': rollup.max_score,
+                'std_deviation': rollup.std_deviation,
+                'histogram': rollup.histogram
+            }
+            for rollup in subject_rollups if rollup.result_count
+        ]
         
         response_data = {
             'exam_id': exam_id,
@@ -285,6 +217,9 @@ def get_exam_statistics(request, exam_id):
             'passed_candidates': passed_candidates,
             'pass_percentage': (passed_candidates / total_candidates * 100) if total_candidates > 0 else 0,
             'average_score': avg_score,
+            'highest_score': stats.max_score,
+            'std_deviation': stats.std_deviation,
+            'histogram': stats.histogram,
             'subject_statistics': subject_stats
         }
         
@@ -477,53 +412,33 @@ def get_exam_details(request, exam_id):
     try:
         exam = get_object_or_404(exam_creation, id=exam_id)
         
-        # Get all attempts for this exam
-        attempts = ExamAttempt.objects.filter(exam=exam, is_submitted=True)
-        
-        # Get all results
-        results = ExamResult.objects.filter(attempt__in=attempts)
-        
-        if not results.exists():
+        stats, subject_rollups = load_exam_statistics(exam.id)
+
+        if not stats.result_count:
             return Response({
                 'error': 'No results found for this exam'
             }, status=status.HTTP_404_NOT_FOUND)
         
-        # Get all subjects for this exam
-        subjects = SubjectWiseResult.objects.filter(
-            exam_result__in=results
-        ).values_list('subject', flat=True).distinct()
-        
-        # Calculate statistics for each subject
-        subject_stats = []
-        for subject in subjects:
-            subject_results = SubjectWiseResult.objects.filter(
-                exam_result__in=results,
-                subject=subject
-            )
-            
-            avg_score = subject_results.aggregate(
-                avg=Avg('percentage_score')
-            )['avg']
-            
-            highest_score = subject_results.aggregate(
-                max=Max('percentage_score')
-            )['max']
-            
-            subject_stats.append({
-                'subject': subject,
-                'average_score': avg_score,
-                'highest_score': highest_score
-            })
+        # Subject statistics come from the rollup
+        subject_stats = [
+            {
+                'subject': rollup.subject,
+                'average_score': rollup.average_score,
+                'highest_score': rollup.max_score
+            }
+            for rollup in subject_rollups if rollup.result_count
+        ]
+        
+        # Candidate rows: results with assignments, then subject scores, in two queries
+        results = ExamResult.objects.filter(
+            attempt__exam=exam, attempt__is_submitted=True
+        ).select_related('attempt__assignment').prefetch_related('subject_results')
         
-        # Get candidate data with proper subject scores
         candidates = []
         for result in results:
-            # Get all subject scores for this candidate
-            subject_scores = SubjectWiseResult.objects.filter(exam_result=result)
-            
-            # Create candidate object
+            assignment = result.attempt.assignment
             candidate = {
-                'name': f"{result.attempt.assignment.first_name} {result.attempt.assignment.last_name}",
+                'name': f"{assignment.first_name} {assignment.last_name}",
                 'score': result.total_marks_obtained,
                 'percentage': result.percentage_score,
                 'passed': result.is_passed,
@@ -531,7 +446,7 @@ def get_exam_details(request, exam_id):
             }
             
             # Add all subject scores
-            for ss in subject_scores:
+            for ss in result.subject_results.all():
                 candidate['subjectScores'][ss.subject] = ss.marks_obtained
             
             candidates.append(candidate)
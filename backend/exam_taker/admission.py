@@ -0,0 +1,112 @@
+# exam_taker/admission.py
+
+import logging
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """Raised when the login queue is full or a queued hash took too long."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Login queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class LoginAdmissionGate:
+    """
+    Admission control for password hashing during exam login storms.
+
+    PBKDF2 hashing runs on a bounded per-process thread pool (hashlib releases
+    the GIL, so the threads really run in parallel). At most `workers` hashes
+    run at once and at most `queue_size` more may wait; anything beyond that
+    is rejected immediately with a retry-after estimate instead of piling up
+    until every request times out together.
+    """
+
+    def __init__(self, workers, queue_size, wait_timeout):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.wait_timeout = wait_timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='login-hash')
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._lock = threading.Lock()
+        self._pending = 0              # admitted and not finished (running + queued)
+        self._running = 0
+        self._admitted = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._max_queue_depth = 0
+        self._avg_hash_seconds = 0.5   # moving average, seeded with a typical PBKDF2 cost
+
+    def check_password(self, raw_password, encoded):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            retry_after = self.retry_after()
+            logger.warning("Exam login rejected, queue full (retry after %ss)", retry_after)
+            raise AdmissionRejected(retry_after)
+
+        with self._lock:
+            self._pending += 1
+            self._admitted += 1
+            self._max_queue_depth = max(self._max_queue_depth, self._pending - self._running)
+
+        future = self._executor.submit(self._run, raw_password, encoded)
+        try:
+            return future.result(timeout=self.wait_timeout)
+        except TimeoutError:
+            # The hash still completes in the background and frees its slot
+            with self._lock:
+                self._timed_out += 1
+            raise AdmissionRejected(self.retry_after())
+
+    def _run(self, raw_password, encoded):
+        with self._lock:
+            self._running += 1
+        started = time.monotonic()
+        try:
+            return check_password(raw_password, encoded)
+        finally:
+            elapsed = time.monotonic() - started
+            with self._lock:
+                self._running -= 1
+                self._pending -= 1
+                self._avg_hash_seconds = 0.9 * self._avg_hash_seconds + 0.1 * elapsed
+            self._slots.release()
+
+    def retry_after(self):
+        """Seconds until the current backlog should have drained."""
+        with self._lock:
+            backlog = self._pending
+            avg = self._avg_hash_seconds
+        return max(1, math.ceil((backlog / self.workers + 1) * avg))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'queue_size': self.queue_size,
+                'running': self._running,
+                'queue_depth': self._pending - self._running,
+                'max_queue_depth': self._max_queue_depth,
+                'admitted': self._admitted,
+                'rejected': self._rejected,
+                'timed_out': self._timed_out,
+                'avg_hash_seconds': round(self._avg_hash_seconds, 4),
+            }
+
+
+login_gate = LoginAdmissionGate(
+    workers=getattr(settings, 'EXAM_LOGIN_HASH_WORKERS', None) or os.cpu_count() or 2,
+    queue_size=getattr(settings, 'EXAM_LOGIN_QUEUE_SIZE', 32),
+    wait_timeout=getattr(settings, 'EXAM_LOGIN_QUEUE_TIMEOUT', 10),
+)
@@ -0,0 +1,88 @@
+# exam_taker/answers.py
+
+from django.db.models import Value
+
+from exam_content.models import MCQQuestion, FillInTheBlankQuestion
+from exam_evaluation.answer_key import get_answer_key
+from .models import MCQAnswer, FIBAnswer
+
+
+def paper_question_ids(exam):
+    """
+    The MCQ and FIB question ids of the paper candidates are served: the
+    published snapshot's, or the live paper's for a draft. Read from the
+    memoized answer key, so a published paper costs no query.
+    """
+    key = get_answer_key(exam)
+    return key.mcq.keys(), key.fib.keys()
+
+
+def existing_question_ids(mcq_ids, fib_ids):
+    """
+    Return the subsets of the given MCQ and FIB question IDs that still exist,
+    using a single UNION query for both question tables.
+    """
+    mcq_ids, fib_ids = set(mcq_ids), set(fib_ids)
+    if not mcq_ids and not fib_ids:
+        return set(), set()
+
+    rows = MCQQuestion.objects.filter(id__in=mcq_ids).annotate(
+        question_type=Value('MCQ')
+    ).values_list('question_type', 'id').union(
+        FillInTheBlankQuestion.objects.filter(id__in=fib_ids).annotate(
+            question_type=Value('FIB')
+        ).values_list('question_type', 'id'),
+        all=True,
+    )
+
+    found = {'MCQ': set(), 'FIB': set()}
+    for question_type, question_id in rows:
+        found[question_type].add(question_id)
+    return found['MCQ'], found['FIB']
+
+
+def delete_unanswered(attempt_pk, mcq_ids, fib_ids):
+    """
+    Delete an attempt's stored answers to questions other than the given
+    ones, e.g. autosaved answers the candidate cleared before submitting.
+    """
+    MCQAnswer.objects.filter(attempt_id=attempt_pk).exclude(question_id__in=mcq_ids).delete()
+    FIBAnswer.objects.filter(attempt_id=attempt_pk).exclude(question_id__in=fib_ids).delete()
+
+
+def upsert_mcq_answers(rows):
+    """
+    Insert or update MCQ answers in a single statement.
+    rows: iterable of (attempt_pk, question_id, selected_options)
+    """
+    objs = [
+        MCQAnswer(attempt_id=attempt_pk, question_id=question_id, selected_options=selected)
+        for attempt_pk, question_id, selected in rows
+    ]
+    if objs:
+        MCQAnswer.objects.bulk_create(
+            objs,
+            update_conflicts=True,
+            unique_fields=['attempt', 'question'],
+            update_fields=['selected_options'],
+        )
+    return len(objs)
+
+
+def upsert_fib_answers(rows):
+    """
+    Insert or update fill-in-the-blank answers in a single statement.
+    rows: iterable of (attempt_pk, question_id, user_response)
+    """
+    objs = [
+        FIBAnswer(attempt_id=attempt_pk, question_id=question_id, user_response=response)
+        for attempt_pk, question_id, response in rows
+    ]
+    if objs:
+        FIBAnswer.objects.bulk_create(
+            objs,
+            update_conflicts=True,
+            unique_fields=['attempt', 'question'],
+            update_fields=['user_response'],
+        )
+    return len(objs)
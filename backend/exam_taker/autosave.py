@@ -0,0 +1,157 @@
+# exam_taker/autosave.py
+
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .answers import existing_question_ids, upsert_mcq_answers, upsert_fib_answers
+from .models import ExamAttempt
+
+logger = logging.getLogger(__name__)
+
+
+class AnswerBuffer:
+    """
+    Per-process write-behind buffer for autosaved answers.
+
+    Autosave requests only merge the changed answers into memory; the buffer is
+    written to MCQAnswer/FIBAnswer with one bulk upsert per answer type when it
+    holds `batch_size` answers, or `flush_interval` seconds after the first
+    buffered change, whichever comes first. A later change to the same question
+    overwrites the buffered one, so a candidate toggling an option ten times
+    costs a single row write.
+
+    The final SubmitAnswersView sheet stays authoritative: a flush locks the
+    attempt rows it writes for and skips submitted ones in the same
+    transaction as its upsert, so a submit committed by any worker is never
+    overwritten by answers still buffered here.
+
+    Durability: an autosave is acknowledged (202) once it is in memory. If the
+    worker is killed before the next flush, up to EXAM_AUTOSAVE_FLUSH_INTERVAL
+    seconds of acknowledged answers are lost; a clean shutdown flushes.
+    """
+
+    def __init__(self, batch_size, flush_interval):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._mcq = {}   # (attempt_pk, question_id) -> selected_options
+        self._fib = {}   # (attempt_pk, question_id) -> user_response
+        self._timer = None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._mcq) + len(self._fib)
+
+    def add(self, attempt_pk, mcq_answers, fib_answers):
+        with self._lock:
+            for question_id, selected in mcq_answers:
+                self._mcq[(attempt_pk, question_id)] = selected
+            for question_id, response in fib_answers:
+                self._fib[(attempt_pk, question_id)] = response
+
+            size = len(self._mcq) + len(self._fib)
+            if size and self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+
+        if size >= self.batch_size:
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Autosave flush failed")
+
+    def discard_attempt(self, attempt_pk):
+        """
+        Forget this worker's buffered answers of an attempt whose full sheet
+        was submitted. Other workers' buffers are skipped at their next flush.
+        """
+        with self._lock:
+            self._mcq = {k: v for k, v in self._mcq.items() if k[0] != attempt_pk}
+            self._fib = {k: v for k, v in self._fib.items() if k[0] != attempt_pk}
+
+    def _drain(self):
+        with self._lock:
+            mcq, fib = self._mcq, self._fib
+            self._mcq, self._fib = {}, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        return mcq, fib
+
+    def _restore(self, mcq, fib):
+        # Put back answers of a failed flush without clobbering newer changes
+        with self._lock:
+            for key, value in mcq.items():
+                self._mcq.setdefault(key, value)
+            for key, value in fib.items():
+                self._fib.setdefault(key, value)
+
+    def flush(self):
+        """Write all buffered answers to the database. Returns the number of rows written."""
+        mcq, fib = self._drain()
+        if not mcq and not fib:
+            return 0
+
+        try:
+            return self._write(mcq, fib)
+        except Exception:
+            self._restore(mcq, fib)
+            raise
+
+    def _write(self, mcq, fib):
+        attempt_pks = {k[0] for k in mcq} | {k[0] for k in fib}
+        # Questions deleted since the paper was issued would violate the FK
+        mcq_ids, fib_ids = existing_question_ids({k[1] for k in mcq}, {k[1] for k in fib})
+
+        with transaction.atomic():
+            # Row locks serialize this with SubmitAnswersView's conditional UPDATE of the
+            # attempt: an attempt submitted first is skipped, and a submit arriving later
+            # waits and then overwrites these rows with the final sheet. Locking in pk
+            # order keeps concurrent flushes from deadlocking.
+            open_attempts = set(
+                ExamAttempt.objects.select_for_update()
+                .filter(pk__in=attempt_pks, is_submitted=False)
+                .order_by('pk').values_list('pk', flat=True)
+            )
+            mcq_rows = [
+                (attempt_pk, question_id, selected)
+                for (attempt_pk, question_id), selected in mcq.items()
+                if attempt_pk in open_attempts and question_id in mcq_ids
+            ]
+            fib_rows = [
+                (attempt_pk, question_id, response)
+                for (attempt_pk, question_id), response in fib.items()
+                if attempt_pk in open_attempts and question_id in fib_ids
+            ]
+            written = upsert_mcq_answers(mcq_rows) + upsert_fib_answers(fib_rows)
+
+        logger.debug("Autosave flushed %d answers for %d attempts", written, len(open_attempts))
+        return written
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Autosave flush failed")
+        finally:
+            # Timer threads get their own DB connection; don't leak it
+            connection.close()
+
+
+answer_buffer = AnswerBuffer(
+    batch_size=getattr(settings, 'EXAM_AUTOSAVE_BATCH_SIZE', 500),
+    flush_interval=getattr(settings, 'EXAM_AUTOSAVE_FLUSH_INTERVAL', 5),
+)
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        answer_buffer.flush()
+    except Exception:
+        logger.exception("Autosave flush on shutdown failed")
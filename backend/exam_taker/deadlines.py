@@ -0,0 +1,108 @@
+# exam_taker/deadlines.py
+
+import heapq
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ExamAttempt
+
+logger = logging.getLogger(__name__)
+
+
+def attempt_deadline(started_at, duration_minutes, exam_end_time):
+    """
+    When an attempt expires: its start plus the assignment duration, or the
+    end of the exam window when no duration was recorded.
+    """
+    if duration_minutes:
+        return started_at + timedelta(minutes=duration_minutes)
+    return exam_end_time
+
+
+class DeadlineScheduler:
+    """
+    Min-heap of open attempts keyed by deadline.
+
+    Each load compares the open attempt pks with the ones already tracked and
+    only fetches the details of the others. It doesn't rely on a pk watermark,
+    since concurrent starts can commit a lower pk after a higher one was read.
+    Due attempts are popped in deadline order and closed with one SELECT and
+    one bulk UPDATE per batch, so closing an exam never loops over rows with
+    per-attempt requests.
+    """
+
+    def __init__(self, batch_size=500, grace_seconds=60):
+        self.batch_size = batch_size
+        self.grace = timedelta(seconds=grace_seconds)
+        self._heap = []        # (deadline, attempt_pk)
+        self._tracked = set()  # pks in the heap, or open without a deadline
+
+    def __len__(self):
+        return len(self._heap)
+
+    def load_new_attempts(self):
+        """Push open attempts that aren't tracked yet onto the heap."""
+        open_pks = set(ExamAttempt.objects.filter(is_submitted=False).values_list('pk', flat=True))
+        # Attempts submitted meanwhile stay in the heap until popped; submit_expired skips them
+        self._tracked &= open_pks
+        new_pks = sorted(open_pks - self._tracked)
+
+        loaded = 0
+        for i in range(0, len(new_pks), self.batch_size):
+            rows = ExamAttempt.objects.filter(pk__in=new_pks[i:i + self.batch_size]).values_list(
+                'pk', 'started_at', 'assignment__duration_minutes', 'assignment__exam_end_time'
+            )
+            for pk, started_at, duration_minutes, exam_end_time in rows:
+                self._tracked.add(pk)
+                deadline = attempt_deadline(started_at, duration_minutes, exam_end_time)
+                if deadline is None:
+                    continue
+                heapq.heappush(self._heap, (deadline + self.grace, pk))
+                loaded += 1
+        return loaded
+
+    def next_deadline(self):
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now=None):
+        """Pop every attempt whose deadline (plus grace) has passed."""
+        now = now or timezone.now()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            pk = heapq.heappop(self._heap)[1]
+            self._tracked.discard(pk)
+            due.append(pk)
+        return due
+
+    def submit_expired(self, attempt_pks):
+        """
+        Close the given attempts in batches. Attempts the candidate already
+        submitted are skipped. Returns the pks that were auto-submitted.
+        """
+        submitted = []
+        for i in range(0, len(attempt_pks), self.batch_size):
+            batch = attempt_pks[i:i + self.batch_size]
+            with transaction.atomic():
+                attempts = list(
+                    ExamAttempt.objects.select_for_update(of=('self',))
+                    .filter(pk__in=batch, is_submitted=False)
+                    .select_related('assignment')
+                )
+                for attempt in attempts:
+                    ended_at = attempt_deadline(
+                        attempt.started_at,
+                        attempt.assignment.duration_minutes,
+                        attempt.assignment.exam_end_time,
+                    )
+                    attempt.is_submitted = True
+                    attempt.ended_at = ended_at
+                    attempt.duration_seconds = max(0, int((ended_at - attempt.started_at).total_seconds()))
+                ExamAttempt.objects.bulk_update(
+                    attempts, ['is_submitted', 'ended_at', 'duration_seconds']
+                )
+            submitted.extend(a.pk for a in attempts)
+            logger.info("Auto-submitted %d expired attempts", len(attempts))
+        return submitted
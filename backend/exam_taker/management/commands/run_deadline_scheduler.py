@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from exam_evaluation.services import evaluate_attempts
+from exam_taker.deadlines import DeadlineScheduler
+
+
+class Command(BaseCommand):
+    help = "Auto-submit exam attempts whose time has run out and queue them for evaluation"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help="Close everything that is due now and exit (for cron)")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--grace-seconds', type=int, default=60,
+                            help="Extra time for the browser's own auto-submit to arrive first")
+        parser.add_argument('--poll-interval', type=int, default=30,
+                            help="Seconds between scans for newly started attempts")
+        parser.add_argument('--no-evaluate', action='store_true',
+                            help="Only submit expired attempts, don't grade them")
+
+    def handle(self, *args, **options):
+        scheduler = DeadlineScheduler(
+            batch_size=options['batch_size'],
+            grace_seconds=options['grace_seconds'],
+        )
+        poll_interval = options['poll_interval']
+
+        while True:
+            close_old_connections()
+            loaded = scheduler.load_new_attempts()
+            if loaded:
+                self.stdout.write(f"Tracking {loaded} new attempts ({len(scheduler)} open)")
+
+            due = scheduler.pop_due()
+            if due:
+                submitted = scheduler.submit_expired(due)
+                self.stdout.write(self.style.SUCCESS(f"Auto-submitted {len(submitted)} attempts"))
+                if submitted and not options['no_evaluate']:
+                    evaluated = evaluate_attempts(submitted)
+                    self.stdout.write(f"Evaluated {evaluated} attempts")
+
+            if options['once']:
+                return
+
+            # Sleep until the next deadline, but wake up to pick up new attempts
+            now = timezone.now()
+            next_deadline = scheduler.next_deadline()
+            sleep_for = poll_interval
+            if next_deadline is not None:
+                sleep_for = min(poll_interval, max(0.0, (next_deadline - now).total_seconds()))
+            time.sleep(sleep_for)
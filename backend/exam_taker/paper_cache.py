@@ -0,0 +1,149 @@
+# exam_taker/paper_cache.py
+
+import json
+import time
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+
+from exam_allotment.models import exam_creation, PaperSnapshot
+from exam_allotment.publishing import paper_content
+from exam_allotment.token_resolver import exam_tokens
+
+
+PAPER_CACHE_TIMEOUT = 60 * 60 * 12   # a paper is only useful for the exam day
+BUILD_LOCK_TIMEOUT = 30              # seconds a builder may hold the fill lock
+BUILD_WAIT_INTERVAL = 0.05           # seconds between polls while another worker builds
+BUILD_WAIT_ATTEMPTS = 100
+
+
+def _version_key(exam_token):
+    return f"exam_paper_version_{exam_token}"
+
+
+def _paper_key(exam_token, version):
+    return f"exam_paper_{exam_token}_v{version}"
+
+
+def _lock_key(exam_token, version):
+    return f"exam_paper_lock_{exam_token}_v{version}"
+
+
+def _snapshot_key(content_hash):
+    return f"exam_paper_snapshot_{content_hash}"
+
+
+def render_paper(content):
+    """
+    Candidate-facing JSON bytes of a paper (see publishing.paper_content), in
+    the exact shape returned by FetchExamQuestionsView: answer keys are left out.
+    """
+    payload = {
+        "message": "Questions fetched successfully",
+        "exam_title": content["exam_title"],
+        "instructions": content["instructions"],
+        "exam_uuid": content["exam_uuid"],
+        "questions": [
+            {k: v for k, v in q.items() if k != "correct_answers"} for q in content["questions"]
+        ],
+    }
+    return json.dumps(payload, cls=DjangoJSONEncoder).encode("utf-8")
+
+
+def build_paper(exam):
+    """Compile the live paper of a draft exam, in paper order with marks overrides applied."""
+    return render_paper(paper_content(exam))
+
+
+def _build_for_token(exam_token):
+    exam = exam_creation.objects.filter(exam_token=exam_token).first()
+    if exam is None:
+        return None
+    return build_paper(exam)
+
+
+def current_version(exam_token):
+    return cache.get(_version_key(exam_token), 0)
+
+
+def _get_or_build(paper_key, lock_key, build):
+    """
+    Cache misses are filled single-flight: the worker that wins the fill lock
+    builds the paper while the others poll the cache until it appears, so a
+    thundering herd at exam start costs one build instead of one per request.
+    """
+    paper = cache.get(paper_key)
+    if paper is not None:
+        return paper
+
+    for _ in range(BUILD_WAIT_ATTEMPTS):
+        if cache.add(lock_key, 1, timeout=BUILD_LOCK_TIMEOUT):
+            try:
+                paper = build()
+                if paper is not None:
+                    cache.set(paper_key, paper, timeout=PAPER_CACHE_TIMEOUT)
+                return paper
+            finally:
+                cache.delete(lock_key)
+
+        time.sleep(BUILD_WAIT_INTERVAL)
+        paper = cache.get(paper_key)
+        if paper is not None:
+            return paper
+
+    # The builder is stuck or the cache is unavailable; serve this request directly.
+    return build()
+
+
+def get_paper(exam_token, version=None):
+    """
+    Return the compiled live paper for an exam token, or None if the token is
+    unknown. Callers that already know the paper version (from the token
+    resolver) can pass it to skip reading it.
+    """
+    if version is None:
+        version = current_version(exam_token)
+    return _get_or_build(
+        _paper_key(exam_token, version), _lock_key(exam_token, version),
+        lambda: _build_for_token(exam_token),
+    )
+
+
+def get_snapshot_paper(snapshot_id, content_hash):
+    """
+    Return the compiled paper of a published snapshot, or None if it is gone.
+    Snapshots never change, so the cached bytes are keyed by content hash
+    alone and need no invalidation.
+    """
+    def build():
+        content = PaperSnapshot.objects.filter(pk=snapshot_id).values_list('content', flat=True).first()
+        return None if content is None else render_paper(content)
+
+    return _get_or_build(_snapshot_key(content_hash), f"{_snapshot_key(content_hash)}_lock", build)
+
+
+def invalidate_paper(exam_token):
+    """
+    Drop the cached paper of an exam by moving it to a new version, so a build
+    that is already in flight cannot write stale data back under the live key.
+    """
+    key = _version_key(exam_token)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+    exam_tokens.invalidate(exam_token)
+
+
+def invalidate_papers_for_question(question_type, question_id):
+    """
+    Invalidate every draft exam paper that references the given question.
+    Published exams serve their frozen snapshot and are left alone.
+    question_type is 'MCQ' or 'FIB'.
+    """
+    field = 'mcq_question' if question_type == 'MCQ' else 'fib_question'
+    tokens = exam_creation.objects.filter(
+        **{f"exam_questions__{field}": question_id}, published_snapshot__isnull=True
+    ).values_list('exam_token', flat=True)
+    for exam_token in tokens:
+        invalidate_paper(exam_token)
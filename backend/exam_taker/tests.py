@@ -1,3 +1,229 @@
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from candidate_enrollment.models import ExternalCandidate
+from exam_allotment.assignments import assign_candidates
+from exam_allotment.publishing import ensure_published
+from exam_allotment.models import ExamAssignment, exam_creation
+from exam_content.models import MCQQuestion
+from exam_taker.autosave import AnswerBuffer, answer_buffer
+from exam_taker.deadlines import DeadlineScheduler
+from exam_taker.models import ExamAttempt, MCQAnswer
+from exam_taker.paper_cache import invalidate_paper
+
+
+class CandidateExamFlowTests(TestCase):
+    """A candidate token from exam-login must carry the candidate through submit and evaluation."""
+
+    def setUp(self):
+        self.question = MCQQuestion.objects.create(
+            subject='Math', question_text='2 + 2?', options=['3', '4'], answer_type='Single',
+            correct_answers=['4'], difficulty='Easy', marks=2,
+        )
+        now = timezone.now()
+        self.exam = exam_creation.objects.create(
+            exam_title='Arithmetic', instruction='', exam_start_time=now - timedelta(minutes=5),
+            exam_end_time=now + timedelta(hours=1), created_by=1, role_or_department='QA',
+            mcq_question_ids=[self.question.id], exam_url='http://exam', exam_token='TOKEN1',
+        )
+        candidates = [
+            ExternalCandidate.objects.create(
+                first_name=f'C{i}', last_name='L', gender='F', email=f'c{i}@example.com',
+                phone_number='1', user_id=f'EXT{1001 + i}', password=make_password('secret'),
+            )
+            for i in range(2)
+        ]
+        assign_candidates(self.exam, [c.id for c in candidates])
+
+    def login(self, user_id):
+        response = APIClient().post('/api/exam-view/exam-login/', {
+            'user_id': user_id, 'password': 'secret', 'exam_token': 'TOKEN1',
+        }, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.json()['access']}")
+        return client
+
+    def start(self, client):
+        response = client.get('/api/exam-view/start-exam/', {'exam_token': 'TOKEN1'})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()['attempt_id']
+
+    def submit(self, client, attempt_id):
+        return client.post('/api/exam-view/submit-answers/', {
+            'attempt_id': attempt_id,
+            'mcq_answers': [{'question_id': self.question.id, 'selected_options': ['4']}],
+            'fib_answers': [],
+        }, format='json')
+
+    def test_login_submit_evaluate(self):
+        client = self.login('EXT1001')
+        attempt_id = self.start(client)
+
+        self.assertEqual(self.submit(client, attempt_id).status_code, 200)
+
+        response = client.post(f'/api/evaluation/evaluate/{attempt_id}/')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()['total_marks'], 2)
+
+        response = client.get(f"/api/evaluation/result/{response.json()['result_id']}/")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['total_marks_obtained'], 2)
+
+    def test_first_start_freezes_the_served_paper(self):
+        client = self.login('EXT1001')
+        attempt_id = self.start(client)
+        self.exam.refresh_from_db()
+        self.assertIsNotNone(self.exam.published_snapshot_id)
+
+        # Editing the draft afterwards must not drop answers to the paper the candidate holds
+        other = MCQQuestion.objects.create(
+            subject='Math', question_text='3 + 3?', options=['6', '7'], answer_type='Single',
+            correct_answers=['6'], difficulty='Easy', marks=1,
+        )
+        self.exam.set_questions([('MCQ', other.id)])
+
+        self.assertEqual(self.submit(client, attempt_id).status_code, 200)
+        response = client.post(f'/api/evaluation/evaluate/{attempt_id}/')
+        self.assertEqual(response.json()['total_marks'], 2)
+
+    def test_stale_autosave_does_not_overwrite_submit(self):
+        client = self.login('EXT1001')
+        attempt_id = self.start(client)
+        attempt = ExamAttempt.objects.get(attempt_id=attempt_id)
+        # Another worker's buffer still holds an earlier answer when the sheet is submitted
+        other_worker = AnswerBuffer(batch_size=100, flush_interval=60)
+        other_worker.add(attempt.pk, [(self.question.id, ['3'])], [])
+
+        self.assertEqual(self.submit(client, attempt_id).status_code, 200)
+        self.assertEqual(other_worker.flush(), 0)
+        answer = MCQAnswer.objects.get(attempt=attempt)
+        self.assertEqual(answer.selected_options, ['4'])
+
+    def test_answer_cleared_after_autosave_is_not_graded(self):
+        client = self.login('EXT1001')
+        attempt_id = self.start(client)
+        response = client.post('/api/exam-view/autosave-answers/', {
+            'attempt_id': attempt_id,
+            'mcq_answers': [{'question_id': self.question.id, 'selected_options': ['4']}],
+        }, format='json')
+        self.assertEqual(response.status_code, 202, response.content)
+        answer_buffer.flush()
+        self.assertTrue(MCQAnswer.objects.filter(attempt__attempt_id=attempt_id).exists())
+
+        # The candidate clears the answer, so the final sheet leaves it out
+        response = client.post('/api/exam-view/submit-answers/', {
+            'attempt_id': attempt_id, 'mcq_answers': [], 'fib_answers': [],
+        }, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertFalse(MCQAnswer.objects.filter(attempt__attempt_id=attempt_id).exists())
+        response = client.post(f'/api/evaluation/evaluate/{attempt_id}/')
+        self.assertEqual(response.json()['total_marks'], 0)
+
+    def test_ensure_published_only_locks_a_draft_once(self):
+        self.exam.set_questions([])
+        invalidate_paper('TOKEN1')
+        self.assertIsNone(ensure_published(self.exam.id))
+        # An empty draft is remembered until its paper changes
+        with self.assertNumQueries(1):
+            self.assertIsNone(ensure_published(self.exam.id))
+
+        self.exam.set_questions([('MCQ', self.question.id)])
+        invalidate_paper('TOKEN1')
+        snapshot_id = ensure_published(self.exam.id)
+        self.assertIsNotNone(snapshot_id)
+        with self.assertNumQueries(1):
+            self.assertEqual(ensure_published(self.exam.id), snapshot_id)
+
+    def test_other_candidate_is_refused(self):
+        attempt_id = self.start(self.login('EXT1001'))
+        intruder = self.login('EXT1002')
+
+        self.assertEqual(self.submit(intruder, attempt_id).status_code, 403)
+        self.assertEqual(intruder.post(f'/api/evaluation/evaluate/{attempt_id}/').status_code, 403)
+
+    def test_candidate_token_reads_candidate_list(self):
+        response = self.login('EXT1001').get('/api/candidate/candidateList/', {'user_id': 'EXT1001'})
+        self.assertEqual(response.status_code, 200, response.content)
+
+    def test_login_stats_need_a_staff_user(self):
+        client = APIClient()
+        user = User.objects.create_user('author', password='secret')
+        client.force_authenticate(user)
+        self.assertEqual(client.get('/api/exam-view/exam-login/stats/').status_code, 403)
+        user.is_staff = True
+        self.assertEqual(client.get('/api/exam-view/exam-login/stats/').status_code, 200)
+
+    def test_anonymous_submit_is_refused(self):
+        attempt_id = self.start(self.login('EXT1001'))
+        self.assertEqual(self.submit(APIClient(), attempt_id).status_code, 401)
+
+
+class DeadlineSchedulerTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        exam = exam_creation.objects.create(
+            exam_title='Timed', instruction='', exam_start_time=self.now - timedelta(hours=1),
+            exam_end_time=self.now + timedelta(hours=1), created_by=1, role_or_department='QA',
+            exam_url='http://exam', exam_token='TOKEN2',
+        )
+        candidates = [
+            ExternalCandidate.objects.create(
+                first_name=f'D{i}', last_name='L', gender='F', email=f'd{i}@example.com',
+                phone_number='1', user_id=f'EXT{2001 + i}', password=make_password('secret'),
+            )
+            for i in range(4)
+        ]
+        assign_candidates(exam, [c.id for c in candidates])
+        self.assignments = list(ExamAssignment.objects.filter(exam=exam).order_by('pk'))
+        self.scheduler = DeadlineScheduler(batch_size=2, grace_seconds=60)
+
+    def attempt(self, assignment, duration_minutes, started_minutes_ago, **fields):
+        ExamAssignment.objects.filter(pk=assignment.pk).update(duration_minutes=duration_minutes)
+        attempt = ExamAttempt.objects.create(assignment=assignment, exam_id=assignment.exam_id, **fields)
+        started_at = self.now - timedelta(minutes=started_minutes_ago)
+        ExamAttempt.objects.filter(pk=attempt.pk).update(started_at=started_at)
+        attempt.started_at = started_at
+        return attempt
+
+    def test_due_attempts_pop_in_deadline_order_after_grace(self):
+        late = self.attempt(self.assignments[0], 10, 20)
+        early = self.attempt(self.assignments[1], 5, 20)
+        running = self.attempt(self.assignments[2], 120, 20)
+        self.assertEqual(self.scheduler.load_new_attempts(), 3)
+
+        # The grace period holds an attempt back past its deadline
+        self.assertEqual(self.scheduler.pop_due(early.started_at + timedelta(minutes=5, seconds=30)), [])
+        self.assertEqual(self.scheduler.pop_due(self.now), [early.pk, late.pk])
+        self.assertEqual(len(self.scheduler), 1)
+        self.assertEqual(
+            self.scheduler.next_deadline(), running.started_at + timedelta(minutes=120, seconds=60)
+        )
+
+    def test_submit_expired_closes_at_the_deadline(self):
+        expired = [self.attempt(a, 5, 20) for a in self.assignments[:3]]
+        done = self.attempt(self.assignments[3], 5, 20, is_submitted=True)
+
+        pks = [a.pk for a in expired] + [done.pk]
+        self.assertEqual(sorted(self.scheduler.submit_expired(pks)), sorted(a.pk for a in expired))
+        for attempt in expired:
+            attempt.refresh_from_db()
+            self.assertTrue(attempt.is_submitted)
+            self.assertEqual(attempt.ended_at, attempt.started_at + timedelta(minutes=5))
+            self.assertEqual(attempt.duration_seconds, 300)
+        done.refresh_from_db()
+        self.assertIsNone(done.ended_at)
 
-# Create your tests here.
+    def test_attempt_committed_below_a_loaded_pk_is_tracked(self):
+        self.attempt(self.assignments[0], 5, 20, pk=100)
+        self.assertEqual(self.scheduler.load_new_attempts(), 1)
+        # A concurrent start that took a lower pk commits after the first load
+        straggler = self.attempt(self.assignments[1], 5, 20, pk=50)
+        self.assertEqual(self.scheduler.load_new_attempts(), 1)
+        self.assertEqual(self.scheduler.load_new_attempts(), 0)
+        self.assertIn(straggler.pk, self.scheduler.pop_due(self.now))
@@ -1,13 +1,15 @@
 # exam_taker/urls.py
 
 from django.urls import path
-from .views import ExamLoginView, ExamDashboardView, StartExamView, FetchExamQuestionsView, SubmitAnswersView
+from .views import ExamLoginView, ExamLoginStatsView, ExamDashboardView, StartExamView, FetchExamQuestionsView, AutosaveAnswersView, SubmitAnswersView
 
 urlpatterns = [
     path('exam-login/', ExamLoginView.as_view(), name='exam-login'),
+    path('exam-login/stats/', ExamLoginStatsView.as_view(), name='exam-login-stats'),
     path('exam-dashboard/', ExamDashboardView.as_view(), name='exam-dashboard'),
     path('start-exam/', StartExamView.as_view(), name='start-exam'), #http://127.0.0.1:8000/api/exam-view/start-exam/?exam_token=
     path('fetch-questions/', FetchExamQuestionsView.as_view(), name='fetch_exam_questions'),  #http://127.0.0.1:8000/api/exam-view/fetch-questions/?exam_token=
+    path('autosave-answers/', AutosaveAnswersView.as_view(), name='autosave-answers'),
     path('submit-answers/', SubmitAnswersView.as_view(), name='submit-answers'),
 ]
 
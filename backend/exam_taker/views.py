@@ -1,16 +1,25 @@
 from django.shortcuts import render
+from django.http import HttpResponse
+from django.utils.http import parse_etags
+from django.core.exceptions import ValidationError
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from exam_allotment.models import ExamAssignment
-from candidate_enrollment.utils import authenticate_candidate
-from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework.permissions import IsAuthenticated
-from candidate_enrollment.models import InternalCandidate, ExternalCandidate
+from candidate_enrollment.utils import verify_candidate, issue_candidate_tokens
+from candidate_enrollment.authentication import CandidateJWTAuthentication
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from django.utils import timezone
-from exam_content.models import MCQQuestion, FillInTheBlankQuestion
-from exam_allotment.models import exam_creation
-from .models import ExamAttempt, MCQAnswer, FIBAnswer
+from django.db import transaction
+from exam_allotment.token_resolver import exam_tokens
+from exam_allotment.publishing import ensure_published
+from .models import ExamAttempt
+from .paper_cache import get_paper, get_snapshot_paper
+from .admission import AdmissionRejected, login_gate
+from .autosave import answer_buffer
+from .answers import (
+    delete_unanswered, existing_question_ids, paper_question_ids, upsert_mcq_answers, upsert_fib_answers,
+)
 
 
 class ExamLoginView(APIView):
@@ -23,9 +32,16 @@ class ExamLoginView(APIView):
             return Response({"error": "Missing credentials or exam token"},
                             status=status.HTTP_400_BAD_REQUEST)
 
-        # Step 1: Authenticate user
-        auth_data, candidate = authenticate_candidate(user_id, password)
-        if not auth_data:
+        # Step 1: Authenticate user; hashing goes through the login admission gate
+        try:
+            candidate = verify_candidate(user_id, password, password_checker=login_gate.check_password)
+        except AdmissionRejected as e:
+            response = Response({"error": "Too many logins right now, please retry shortly",
+                                 "retry_after": e.retry_after},
+                                status=status.HTTP_503_SERVICE_UNAVAILABLE)
+            response['Retry-After'] = str(e.retry_after)
+            return response
+        if not candidate:
             return Response({"error": "Invalid credentials"}, status=status.HTTP_401_UNAUTHORIZED)
 
         # Step 2: Check if candidate is assigned to this exam
@@ -39,7 +55,8 @@ class ExamLoginView(APIView):
             return Response({"error": "Multiple exam assignments found for the same user and token. Contact admin."},
                             status=status.HTTP_400_BAD_REQUEST)
 
-        # Step 3: Return auth + exam info
+        # Step 3: Return auth + exam info; the token embeds the candidate and assignment claims
+        auth_data = issue_candidate_tokens(candidate, [assignment.assignment_id])
         return Response({
             "message": "Login successful and exam verified",
             "candidate_id": str(candidate.id),
@@ -50,43 +67,36 @@ class ExamLoginView(APIView):
         }, status=status.HTTP_200_OK)
 
 
-class ExamDashboardView(APIView):
-    authentication_classes = [JWTAuthentication]
-    permission_classes = [IsAuthenticated]
+class ExamLoginStatsView(APIView):
+    """ GET login admission metrics of this worker process (staff tokens only) """
+    permission_classes = [IsAdminUser]
 
     def get(self, request):
-        user = request.user  # this is the temp_user created during login
-        username = user.username  # e.g., 'candidate_12345'
+        return Response(login_gate.stats())
 
-        # Extract actual user_id from temp_user.username
-        if "_" in username:
-            _, user_id = username.split("_", 1)
-        else:
-            return Response({"error": "Invalid user"}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Try to fetch candidate info
-        candidate = InternalCandidate.objects.filter(user_id=user_id).first() or \
-                    ExternalCandidate.objects.filter(user_id=user_id).first()
+class ExamDashboardView(APIView):
+    authentication_classes = [CandidateJWTAuthentication]
+    permission_classes = [IsAuthenticated]
 
-        if not candidate:
-            return Response({"error": "Candidate not found"}, status=status.HTTP_404_NOT_FOUND)
+    def get(self, request):
+        # Everything we need is in the token claims, so this costs no queries
+        candidate = request.user
 
         return Response({
             "message": f"Welcome {candidate.first_name}!",
-            "candidate_id": str(candidate.id),
+            "candidate_id": candidate.candidate_id,
             "user_id": candidate.user_id,
-            "role": "internal" if isinstance(candidate, InternalCandidate) else "external"
+            "role": candidate.kind
         }, status=status.HTTP_200_OK)
 
 
 class StartExamView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CandidateJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        user = request.user
-        username = user.username
-        _, user_id = username.split("_", 1)
+        user_id = request.user.user_id
 
         exam_token = request.query_params.get('exam_token')
         if not exam_token:
@@ -101,6 +111,13 @@ class StartExamView(APIView):
             return Response({"error": "Multiple exam assignments found for the same user and token. Contact admin."},
                             status=status.HTTP_400_BAD_REQUEST)
 
+        # Freeze the paper when the first candidate starts an exam that was never published.
+        # This runs before the "already started" branch: assignments copy the exam's start
+        # time, so most candidates take that branch on their very first start.
+        exam = exam_tokens.resolve(exam_token)
+        if exam is not None and exam.snapshot_id is None:
+            ensure_published(assignment.exam_id)
+
         # If exam has already started
         if assignment.exam_start_time:
           try:
@@ -110,7 +127,7 @@ class StartExamView(APIView):
             # Option 1: Recreate attempt safely
             attempt = ExamAttempt.objects.create(
             assignment=assignment,
-            exam=assignment.exam,
+            exam_id=assignment.exam_id,
           )
 
           return Response({
@@ -120,14 +137,14 @@ class StartExamView(APIView):
           "attempt_id": str(attempt.attempt_id),
           })
 
-        # Set start time
+        # Set start time; a plain UPDATE skips save()'s candidate and exam lookups
         assignment.exam_start_time = timezone.now()
-        assignment.save()
+        ExamAssignment.objects.filter(pk=assignment.pk).update(exam_start_time=assignment.exam_start_time)
 
         # Create ExamAttempt
         attempt = ExamAttempt.objects.create(
             assignment=assignment,
-            exam=assignment.exam,  # make sure your ExamAssignment has a ForeignKey to exam
+            exam_id=assignment.exam_id,  # no need to fetch the exam row for its id
         )
 
         return Response({
@@ -142,7 +159,7 @@ class StartExamView(APIView):
 
 
 class FetchExamQuestionsView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CandidateJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
@@ -151,86 +168,139 @@ class FetchExamQuestionsView(APIView):
         if not exam_token:
             return Response({"error": "Missing exam token"}, status=400)
 
-        try:
-            exam = exam_creation.objects.get(exam_token=exam_token)
-        except exam_creation.DoesNotExist:
+        exam = exam_tokens.resolve(exam_token)
+        if exam is None:
             return Response({"error": "Invalid exam token"}, status=404)
 
-        # Fetch MCQs
-        mcq_questions = MCQQuestion.objects.filter(id__in=exam.mcq_question_ids)
-        mcq_data = [{
-            "id": q.id,
-            "type": "MCQ",
-            "subject": q.subject,
-            "question_text": q.question_text,
-            "options": q.options,
-            "answer_type": q.answer_type,
-            "difficulty": q.difficulty,
-            "marks": q.marks
-        } for q in mcq_questions]
-
-        # Fetch Fill in the Blanks
-        fib_questions = FillInTheBlankQuestion.objects.filter(id__in=exam.fib_question_ids)
-        fib_data = [{
-            "id": q.id,
-            "type": "FIB",
-            "subject": q.subject,
-            "question_text": q.question_text,
-            "difficulty": q.difficulty,
-            "marks": q.marks
-        } for q in fib_questions]
-
-        # Combine
-        all_questions = mcq_data + fib_data
+        if exam.snapshot_id is None:
+            # Draft exam: serve the live paper
+            paper = get_paper(exam_token, version=exam.paper_version)
+            etag = None
+        else:
+            # Published exam: the frozen snapshot, tagged with its content hash
+            etag = f'"{exam.content_hash}"'
+            if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+            if etag in if_none_match or '*' in if_none_match:
+                response = HttpResponse(status=304)
+                response['ETag'] = etag
+                return response
+            paper = get_snapshot_paper(exam.snapshot_id, exam.content_hash)
+        if paper is None:
+            return Response({"error": "Invalid exam token"}, status=404)
+
+        # The paper is cached as ready-to-send JSON bytes, so skip DRF rendering
+        response = HttpResponse(paper, content_type="application/json")
+        if etag:
+            response['ETag'] = etag
+        return response
+
+#Incremental autosave of changed answers
+class AutosaveAnswersView(APIView):
+    """
+    Buffer changed answers; 202 means they are held in this worker's memory,
+    not yet stored. A killed worker loses up to EXAM_AUTOSAVE_FLUSH_INTERVAL
+    seconds of them (see exam_taker.autosave); the submitted sheet is final.
+    """
+    authentication_classes = [CandidateJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        attempt_id = request.data.get('attempt_id')
+        mcq_answers = request.data.get('mcq_answers', [])
+        fib_answers = request.data.get('fib_answers', [])
+
+        if not attempt_id:
+            return Response({'error': 'Missing attempt_id'}, status=400)
+
+        try:
+            attempt = ExamAttempt.objects.select_related('assignment', 'exam').get(attempt_id=attempt_id)
+        except (ExamAttempt.DoesNotExist, ValueError, ValidationError):
+            return Response({'error': 'Invalid attempt_id'}, status=400)
+
+        if attempt.assignment.user_id != request.user.user_id:
+            return Response({'error': 'Attempt does not belong to this candidate'}, status=403)
+
+        if attempt.is_submitted:
+            return Response({'error': 'Answers already submitted'}, status=400)
+
+        # Only keep answers to questions on the paper the candidate was served
+        mcq_paper, fib_paper = paper_question_ids(attempt.exam)
+        try:
+            mcq_changes = [
+                (int(a['question_id']), a['selected_options'])
+                for a in mcq_answers if int(a['question_id']) in mcq_paper
+            ]
+            fib_changes = [
+                (int(a['question_id']), a['user_response'])
+                for a in fib_answers if int(a['question_id']) in fib_paper
+            ]
+        except (KeyError, TypeError, ValueError):
+            return Response({'error': 'Malformed answers'}, status=400)
+
+        answer_buffer.add(attempt.pk, mcq_changes, fib_changes)
 
         return Response({
-            "message": "Questions fetched successfully",
-            "exam_title": exam.exam_title,
-            "instructions": exam.instruction,
-            "exam_uuid": str(exam.exam_uuid),
-            "questions": all_questions
-        })
+            'message': 'Answers saved',
+            'saved': len(mcq_changes) + len(fib_changes),
+        }, status=202)
 
 #Answer submission
 class SubmitAnswersView(APIView):
+    authentication_classes = [CandidateJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
     def post(self, request):
         attempt_id = request.data.get('attempt_id')
         mcq_answers = request.data.get('mcq_answers', [])
         fib_answers = request.data.get('fib_answers', [])
 
         try:
-            attempt = ExamAttempt.objects.get(attempt_id=attempt_id)
-        except ExamAttempt.DoesNotExist:
+            attempt = ExamAttempt.objects.select_related('assignment', 'exam').get(attempt_id=attempt_id)
+        except (ExamAttempt.DoesNotExist, ValueError, ValidationError):
             return Response({'error': 'Invalid attempt_id'}, status=400)
 
+        if attempt.assignment.user_id != request.user.user_id:
+            return Response({'error': 'Attempt does not belong to this candidate'}, status=403)
+
         if attempt.is_submitted:
             return Response({'error': 'Answers already submitted'}, status=400)
 
-        for mcq in mcq_answers:
-            try:
-                question = MCQQuestion.objects.get(id=mcq['question_id'])
-                MCQAnswer.objects.update_or_create(
-                    attempt=attempt,
-                    question=question,
-                    defaults={'selected_options': mcq['selected_options']}
-                )
-            except MCQQuestion.DoesNotExist:
-                continue
-
-        for fib in fib_answers:
-            try:
-                question = FillInTheBlankQuestion.objects.get(id=fib['question_id'])
-                FIBAnswer.objects.update_or_create(
-                    attempt=attempt,
-                    question=question,
-                    defaults={'user_response': fib['user_response']}
-                )
-            except FillInTheBlankQuestion.DoesNotExist:
-                continue
-
-        attempt.is_submitted = True
-        attempt.ended_at = timezone.now()
-        attempt.duration_seconds = (attempt.ended_at - attempt.started_at).seconds
-        attempt.save()
+        # Keep only answers to questions on the paper the candidate was served; the last answer wins
+        mcq_paper, fib_paper = paper_question_ids(attempt.exam)
+        try:
+            mcq_sheet = {
+                int(a['question_id']): a['selected_options']
+                for a in mcq_answers if int(a['question_id']) in mcq_paper
+            }
+            fib_sheet = {
+                int(a['question_id']): a['user_response']
+                for a in fib_answers if int(a['question_id']) in fib_paper
+            }
+        except (KeyError, TypeError, ValueError):
+            return Response({'error': 'Malformed answers'}, status=400)
+
+        # One query validates every answered question, whatever the paper size
+        mcq_ids, fib_ids = existing_question_ids(mcq_sheet, fib_sheet)
+
+        ended_at = timezone.now()
+        with transaction.atomic():
+            # Conditional update so two concurrent submits can't both succeed
+            submitted = ExamAttempt.objects.filter(pk=attempt.pk, is_submitted=False).update(
+                is_submitted=True,
+                ended_at=ended_at,
+                duration_seconds=int((ended_at - attempt.started_at).total_seconds()),
+            )
+            if not submitted:
+                return Response({'error': 'Answers already submitted'}, status=400)
+
+            # The sheet is final: an autosaved answer left out of it was cleared
+            mcq_kept = [qid for qid in mcq_sheet if qid in mcq_ids]
+            fib_kept = [qid for qid in fib_sheet if qid in fib_ids]
+            delete_unanswered(attempt.pk, mcq_kept, fib_kept)
+            upsert_mcq_answers((attempt.pk, qid, mcq_sheet[qid]) for qid in mcq_kept)
+            upsert_fib_answers((attempt.pk, qid, fib_sheet[qid]) for qid in fib_kept)
+
+        # The submitted sheet supersedes anything still waiting to be autosaved
+        answer_buffer.discard_attempt(attempt.pk)
 
         return Response({'message': 'Answers submitted successfully'}, status=200)
\ No newline at end of file
@@ -0,0 +1,32 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from notifications.outbox import process_outbox
+
+
+class Command(BaseCommand):
+    help = "Deliver queued emails from the outbox, polling for new ones until stopped"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Deliver what is due now and exit")
+        parser.add_argument('--batch-size', type=int, help="Emails per mail connection")
+        parser.add_argument('--interval', type=float, default=settings.EMAIL_OUTBOX_POLL_INTERVAL,
+                            help="Seconds to wait when nothing is due")
+
+    def handle(self, *args, **options):
+        if options['once']:
+            summary = process_outbox(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f"Emails sent: {summary['sent']}, retrying: {summary['retrying']}, failed: {summary['failed']}"
+            ))
+            return
+
+        self.stdout.write(f"Delivering outbox emails every {options['interval']}s; Ctrl+C to stop")
+        try:
+            while True:
+                process_outbox(batch_size=options['batch_size'])
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
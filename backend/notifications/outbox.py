@@ -0,0 +1,156 @@
+# notifications/outbox.py
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+MAX_RETRY_DELAY = 60 * 60   # seconds; backoff stops doubling here
+
+
+def _row(to, subject, html_body, text_body, from_email, now):
+    return EmailOutbox(
+        subject=subject,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=[to] if isinstance(to, str) else list(to),
+        text_body=text_body,
+        html_body=html_body,
+        next_attempt_at=now,
+    )
+
+
+def enqueue_email(to, subject, html_body, text_body='', from_email=None):
+    """
+    Queue one email for the run_outbox worker. Call it inside the transaction
+    of the change the email announces: a rollback then drops the email too.
+    """
+    row = _row(to, subject, html_body, text_body, from_email, timezone.now())
+    row.save()
+    return row
+
+
+def enqueue_emails(messages):
+    """Queue many emails with one INSERT; `messages` holds enqueue_email() keyword dicts."""
+    now = timezone.now()
+    EmailOutbox.objects.bulk_create([
+        _row(m['to'], m['subject'], m['html_body'], m.get('text_body', ''), m.get('from_email'), now)
+        for m in messages
+    ])
+
+
+def _claim(batch_size, lease):
+    """
+    Lock a batch of due rows and lease them to this worker by moving their
+    next_attempt_at past the lease, so concurrent workers skip them and a
+    crashed worker's rows become due again once the lease runs out.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        claimed = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True)
+            .filter(Q(status='pending') | Q(status='sending'), next_attempt_at__lte=now)
+            .order_by('next_attempt_at')[:batch_size]
+        )
+        EmailOutbox.objects.filter(pk__in=[row.pk for row in claimed]) \
+            .update(status='sending', next_attempt_at=now + timedelta(seconds=lease))
+    return claimed
+
+
+def _message(row):
+    msg = EmailMultiAlternatives(row.subject, row.text_body, row.from_email, row.to)
+    if row.html_body:
+        msg.attach_alternative(row.html_body, "text/html")
+    return msg
+
+
+def retry_delay(attempts):
+    """Seconds before retry number `attempts`: EMAIL_OUTBOX_RETRY_DELAY, doubling each time."""
+    return min(settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+
+
+def _deliver(connection, row, max_attempts):
+    row.attempts += 1
+    try:
+        connection.send_messages([_message(row)])
+    except Exception as exc:
+        row.last_error = str(exc)
+        if row.attempts >= max_attempts:
+            row.status = 'failed'
+            row.text_body = row.html_body = ''
+            logger.error("Email %s to %s failed for good: %s", row.pk, row.to, exc)
+        else:
+            row.status = 'pending'
+            row.next_attempt_at = timezone.now() + timedelta(seconds=retry_delay(row.attempts))
+            logger.warning("Email %s to %s failed (attempt %d): %s", row.pk, row.to, row.attempts, exc)
+        # The SMTP session may be broken; the next message starts a new one
+        connection.close()
+        try:
+            connection.open()
+        except Exception:
+            logger.exception("Could not reopen the mail connection")
+        return False
+
+    row.status = 'sent'
+    row.sent_at = timezone.now()
+    row.last_error = ''
+    # Bodies are dropped once final (here and on giving up): registration and reset mails carry passwords
+    row.text_body = row.html_body = ''
+    return True
+
+
+def process_outbox(batch_size=None):
+    """
+    Deliver due outbox emails a batch at a time until none are due. Every
+    batch reuses one mail connection; a failed email is retried with
+    exponential backoff up to EMAIL_OUTBOX_MAX_ATTEMPTS. Sending stops when
+    less than EMAIL_TIMEOUT is left of the batch's lease; the rest of the
+    batch is claimed again once the lease runs out.
+    Returns a {'sent': n, 'retrying': n, 'failed': n} summary.
+    """
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    max_attempts = settings.EMAIL_OUTBOX_MAX_ATTEMPTS
+    summary = {'sent': 0, 'retrying': 0, 'failed': 0}
+    send_timeout = timedelta(seconds=settings.EMAIL_TIMEOUT or 0)
+
+    while True:
+        lease_end = timezone.now() + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE)
+        claimed = _claim(batch_size, settings.EMAIL_OUTBOX_LEASE)
+        if not claimed:
+            break
+
+        connection = get_connection(fail_silently=False)
+        try:
+            connection.open()
+        except Exception:
+            # send_messages() will try to connect again for each message
+            logger.exception("Could not open the mail connection")
+        attempted = []
+        try:
+            for row in claimed:
+                # Another worker may claim the row once the lease ends; don't race it
+                if timezone.now() + send_timeout >= lease_end:
+                    break
+                attempted.append(row)
+                if _deliver(connection, row, max_attempts):
+                    summary['sent'] += 1
+                elif row.status == 'failed':
+                    summary['failed'] += 1
+                else:
+                    summary['retrying'] += 1
+        finally:
+            connection.close()
+            EmailOutbox.objects.bulk_update(attempted, [
+                'status', 'attempts', 'last_error', 'next_attempt_at', 'sent_at', 'text_body', 'html_body',
+            ])
+
+    if any(summary.values()):
+        logger.info("Outbox sent: %(sent)d, retrying: %(retrying)d, failed: %(failed)d", summary)
+    return summary
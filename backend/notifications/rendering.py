@@ -0,0 +1,136 @@
+# notifications/rendering.py
+
+import re
+from functools import lru_cache
+
+from django.template import Context, engines
+from django.template.base import Node, TextNode, Variable, VariableNode, render_value_in_context
+from django.template.loader_tags import ExtendsNode, IncludeNode
+
+LOGO_URL = "https://res.cloudinary.com/dwybblnpz/image/upload/ChatGPT_Image_May_14_2025_02_21_41_PM_ovhtkx_c_crop_w_810_h_389_x_0_y_0_szcgmn.png"
+# Layout variables every email template gets unless the context overrides them
+LAYOUT_CONTEXT = {'logo_url': LOGO_URL}
+
+SHELL_CACHE_SIZE = 256
+SLOT = re.compile('\x00(\\d+)\x00')
+WORD = re.compile(r'\w+')
+
+
+def _engine():
+    return engines['django'].engine
+
+
+@lru_cache(maxsize=None)
+def get_email_template(name):
+    """The compiled template, parsed once per process."""
+    return _engine().get_template(name)
+
+
+def _context(values):
+    return Context(values, autoescape=_engine().autoescape)
+
+
+def _is_slot(node, keys):
+    """Whether the node is a plain {{ key }}, with no filters or attribute lookups."""
+    if not isinstance(node, VariableNode):
+        return False
+    var = node.filter_expression.var
+    return (
+        isinstance(var, Variable) and var.lookups is not None and len(var.lookups) == 1
+        and var.lookups[0] in keys and not node.filter_expression.filters
+    )
+
+
+def _accepts_shell(template, keys):
+    """
+    A shell can stand in for the template when every per-recipient variable
+    is only ever printed as a plain {{ key }}: used by a tag or a filter, or
+    in a template that extends or includes others, it could change more than
+    its own slot.
+    """
+    for node in template.nodelist.get_nodes_by_type(Node):
+        if isinstance(node, (ExtendsNode, IncludeNode)):
+            return False
+        if isinstance(node, TextNode) or _is_slot(node, keys):
+            continue
+        if keys.intersection(WORD.findall(node.token.contents)):
+            return False
+    return True
+
+
+def _build_shell(name, keys, static):
+    """
+    Render the template once with the static values and a marker in place of
+    each per-recipient variable, then split the output at the markers into
+    (fragments, slot keys). Returns None if the template can't be shelled.
+    """
+    template = get_email_template(name)
+    if not _accepts_shell(template, set(keys)):
+        return None
+    markers = {key: f'\x00{i}\x00' for i, key in enumerate(keys)}
+    parts = SLOT.split(template.render(_context({**static, **markers})))
+    return tuple(parts[0::2]), tuple(keys[int(i)] for i in parts[1::2])
+
+
+@lru_cache(maxsize=SHELL_CACHE_SIZE)
+def _cached_shell(name, keys, static_items):
+    return _build_shell(name, keys, dict(static_items))
+
+
+def _shell(name, keys, static):
+    try:
+        return _cached_shell(name, keys, tuple(sorted(static.items())))
+    except TypeError:
+        # Unhashable static values; build the shell for this call only
+        return _build_shell(name, keys, static)
+
+
+def _fill(shell, values):
+    fragments, slots = shell
+    context = _context({})
+    missing = _engine().string_if_invalid
+    out = [fragments[0]]
+    for key, fragment in zip(slots, fragments[1:]):
+        out.append(render_value_in_context(values[key], context) if key in values else missing)
+        out.append(fragment)
+    return ''.join(out)
+
+
+def _render(name, contexts, keys):
+    static = {k: v for k, v in {**LAYOUT_CONTEXT, **contexts[0]}.items() if k not in keys}
+    shell = _shell(name, keys, static)
+    # Templates call callables; the shell would print them instead
+    if shell is None or any(callable(c.get(k)) for c in contexts for k in keys):
+        template = get_email_template(name)
+        return [template.render(_context({**LAYOUT_CONTEXT, **c})) for c in contexts]
+    return [_fill(shell, c) for c in contexts]
+
+
+def render_email(name, context):
+    """
+    Render an email template, like render_to_string() but with the layout
+    variables added. The template's static markup is rendered once per
+    process and each call only fills the context's values into it.
+    """
+    return _render(name, [context], tuple(sorted(context)))[0]
+
+
+def render_many(name, contexts):
+    """
+    Render one email per context. Values shared by every context (e.g. the
+    exam of a batch of invitations) are rendered into the shell once, so
+    each email only costs filling in the values that differ, such as the
+    recipient's name and user_id.
+    """
+    contexts = list(contexts)
+    if not contexts:
+        return []
+    if len(contexts) == 1:
+        # Nothing to share, and its values (e.g. a password) must not key the shell cache
+        return [render_email(name, contexts[0])]
+    first = contexts[0]
+    keys = set().union(*contexts)
+    varying = tuple(sorted(
+        k for k in keys if any(k not in c or c[k] != first.get(k) for c in contexts)
+    ))
+    return _render(name, contexts, varying)
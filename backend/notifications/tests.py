@@ -0,0 +1,140 @@
+import re
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone as django_timezone
+
+from notifications import rendering
+from notifications.models import EmailOutbox
+from notifications.outbox import MAX_RETRY_DELAY, _claim, enqueue_email, process_outbox, retry_delay
+from notifications.rendering import LAYOUT_CONTEXT, render_email, render_many
+
+EMAIL_TEMPLATES = sorted(
+    f'emails/{path.name}' for path in (Path(settings.BASE_DIR) / 'templates' / 'emails').glob('*.html')
+)
+DATES = {'now', 'start_time', 'end_time'}
+
+
+def recipient(template, n):
+    """A context filling every variable of the template, with markup to escape."""
+    source = (Path(settings.BASE_DIR) / 'templates' / template).read_text()
+    names = set(re.findall(r'\{\{\s*(\w+)', source)) - set(LAYOUT_CONTEXT)
+    return {
+        name: datetime(2026, 3, n, 9, 30, tzinfo=timezone.utc) if name in DATES else f'<{name}&{n}>'
+        for name in names
+    }
+
+
+class RenderingTests(SimpleTestCase):
+    def test_shells_match_render_to_string(self):
+        self.assertTrue(EMAIL_TEMPLATES)
+        for template in EMAIL_TEMPLATES:
+            with self.subTest(template=template):
+                contexts = [recipient(template, n) for n in (1, 2)]
+                expected = [render_to_string(template, {**LAYOUT_CONTEXT, **c}) for c in contexts]
+                self.assertEqual(render_email(template, contexts[0]), expected[0])
+                self.assertEqual(render_many(template, contexts), expected)
+                self.assertEqual(render_many(template, contexts[:1]), expected[:1])
+
+    def test_single_recipient_values_stay_out_of_the_shell_cache(self):
+        context = {'first_name': 'Asha', 'user_id': 'EXT1', 'password': 'hunter2'}
+        with mock.patch.object(rendering, '_cached_shell', wraps=rendering._cached_shell) as cached:
+            render_many('emails/registration.html', [context])
+        for call in cached.call_args_list:
+            self.assertNotIn('hunter2', str(call))
+
+
+class FailingBackend(BaseEmailBackend):
+    """A mail server that refuses every message."""
+
+    def send_messages(self, messages):
+        raise ConnectionRefusedError("SMTP server unavailable")
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend', EMAIL_OUTBOX_MAX_ATTEMPTS=3,
+    EMAIL_OUTBOX_RETRY_DELAY=30, EMAIL_OUTBOX_LEASE=300, EMAIL_TIMEOUT=20,
+)
+class OutboxTests(TestCase):
+    def enqueue(self, to='asha@example.com'):
+        return enqueue_email(to, 'Your password', '<p>secret</p>', 'secret')
+
+    def make_due(self):
+        EmailOutbox.objects.update(next_attempt_at=django_timezone.now() - timedelta(seconds=1))
+
+    def test_delivers_and_drops_the_bodies(self):
+        mail.outbox = []
+        self.enqueue('a@example.com')
+        self.enqueue('b@example.com')
+
+        self.assertEqual(process_outbox(), {'sent': 2, 'retrying': 0, 'failed': 0})
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ['a@example.com', 'b@example.com'])
+        self.assertEqual(mail.outbox[0].alternatives[0][0], '<p>secret</p>')
+        for row in EmailOutbox.objects.all():
+            self.assertEqual((row.status, row.attempts, row.html_body, row.text_body), ('sent', 1, '', ''))
+            self.assertIsNotNone(row.sent_at)
+
+    def test_rolled_back_email_is_never_queued(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.enqueue()
+            raise RuntimeError
+        self.assertFalse(EmailOutbox.objects.exists())
+
+    @override_settings(EMAIL_BACKEND='notifications.tests.FailingBackend')
+    def test_failures_back_off_then_give_up(self):
+        row = self.enqueue()
+
+        started = django_timezone.now()
+        self.assertEqual(process_outbox(), {'sent': 0, 'retrying': 1, 'failed': 0})
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts), ('pending', 1))
+        self.assertIn('SMTP server unavailable', row.last_error)
+        self.assertEqual(row.html_body, '<p>secret</p>')
+        self.assertGreaterEqual(row.next_attempt_at, started + timedelta(seconds=30))
+        # Not due again before its retry time
+        self.assertEqual(process_outbox(), {'sent': 0, 'retrying': 0, 'failed': 0})
+
+        self.make_due()
+        started = django_timezone.now()
+        process_outbox()
+        row.refresh_from_db()
+        self.assertEqual(row.attempts, 2)
+        self.assertGreaterEqual(row.next_attempt_at, started + timedelta(seconds=60))
+
+        self.make_due()
+        self.assertEqual(process_outbox(), {'sent': 0, 'retrying': 0, 'failed': 1})
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts, row.html_body, row.text_body), ('failed', 3, '', ''))
+
+    def test_retry_delay_doubles_up_to_the_cap(self):
+        self.assertEqual([retry_delay(n) for n in (1, 2, 3)], [30, 60, 120])
+        self.assertEqual(retry_delay(30), MAX_RETRY_DELAY)
+
+    def test_claimed_rows_are_leased(self):
+        row = self.enqueue()
+        started = django_timezone.now()
+        self.assertEqual([r.pk for r in _claim(10, 300)], [row.pk])
+        row.refresh_from_db()
+        self.assertEqual(row.status, 'sending')
+        self.assertGreaterEqual(row.next_attempt_at, started + timedelta(seconds=300))
+        self.assertEqual(_claim(10, 300), [])
+
+        # A crashed worker's row is claimed again once its lease runs out
+        self.make_due()
+        self.assertEqual([r.pk for r in _claim(10, 300)], [row.pk])
+
+    @override_settings(EMAIL_OUTBOX_LEASE=10)
+    def test_no_send_starts_that_could_outlive_the_lease(self):
+        mail.outbox = []
+        row = self.enqueue()
+        self.assertEqual(process_outbox(), {'sent': 0, 'retrying': 0, 'failed': 0})
+        self.assertEqual(mail.outbox, [])
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts, row.html_body), ('sending', 0, '<p>secret</p>'))
@@ -1,8 +1,11 @@
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
 import { useNavigate } from "react-router-dom";
 import useFullScreen from "./useFullScreen";
 import { apiClient } from '../../config/api';
 
+// How often changed answers are pushed to the server while the exam runs
+const AUTOSAVE_INTERVAL_MS = 5000;
+
 /**
  * Custom hook for handling exam screen logic
  * @returns {Object} Exam state and methods
@@ -21,6 +24,11 @@ const useExamScreen = () => {
   const [dialogMessage, setDialogMessage] = useState("");
   const navigate = useNavigate();
 
+  // Answers changed since the last successful autosave, keyed like `answers`
+  const dirtyKeys = useRef(new Set());
+  const answersRef = useRef(answers);
+  answersRef.current = answers;
+
   // Security integration with fullscreen hook
   const { showWarning, securityViolations, setShowWarning } = useFullScreen(
     (violations) => {
@@ -226,9 +234,69 @@ const useExamScreen = () => {
     }
   }, [answers]);
 
+  // Periodically send only the changed answers to the server-side autosave
+  useEffect(() => {
+    if (!attemptId || questions.length === 0) return;
+
+    const autosave = async () => {
+      if (dirtyKeys.current.size === 0) return;
+
+      const keys = Array.from(dirtyKeys.current);
+      dirtyKeys.current.clear();
+
+      const mcqAnswers = [];
+      const fibAnswers = [];
+      questions.forEach((question, index) => {
+        const uniqueKey = getUniqueQuestionKey(index, question.id);
+        if (!keys.includes(uniqueKey)) return;
+
+        const answer = answersRef.current[uniqueKey];
+        if (answer === null || answer === undefined) return;
+
+        if (question.type === "MCQ") {
+          mcqAnswers.push({
+            question_id: question.id,
+            selected_options: Array.isArray(answer) ? answer : [answer],
+          });
+        } else {
+          fibAnswers.push({
+            question_id: question.id,
+            user_response: answer || "",
+          });
+        }
+      });
+
+      if (mcqAnswers.length === 0 && fibAnswers.length === 0) return;
+
+      try {
+        await apiClient.post(
+          "/api/exam-view/autosave-answers/",
+          {
+            attempt_id: attemptId,
+            mcq_answers: mcqAnswers,
+            fib_answers: fibAnswers,
+          },
+          {
+            headers: {
+              Authorization: `Bearer ${localStorage.getItem("accessToken")}`,
+            },
+          }
+        );
+      } catch (err) {
+        // Keep the answers dirty so the next tick retries them
+        console.error("Autosave failed:", err);
+        keys.forEach((key) => dirtyKeys.current.add(key));
+      }
+    };
+
+    const autosaveInterval = setInterval(autosave, AUTOSAVE_INTERVAL_MS);
+    return () => clearInterval(autosaveInterval);
+  }, [attemptId, questions]);
+
   const handleAnswerChange = (questionIndex, questionId, value) => {
     const uniqueKey = getUniqueQuestionKey(questionIndex, questionId);
     console.log(`Handling answer change for ${uniqueKey}:`, value);
+    dirtyKeys.current.add(uniqueKey);
 
     setAnswers((prev) => ({
       ...prev,